@@ -1,12 +1,14 @@
 import sys
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QPixmap
+from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (QApplication, QMainWindow, QLabel, QLineEdit,
                                QPushButton, QWidget, QMessageBox, QVBoxLayout,
                                QHBoxLayout)
  
 from bancodedados import autenticar_usuario
 from contatos import Ui_Form
+from executor_banco import executar
+import recursos
 
 
  
@@ -52,14 +54,12 @@ class Ui_Tela_Login(QWidget):
         """)
         self.label_foto.setAlignment(Qt.AlignCenter)
         self.label_foto.setScaledContents(True)
-        self.label_foto.setText("agendafoto.png")
-        caminho_imagem = "agendafoto.png"  # Ajuste o caminho se necessário!
-        pixmap = QPixmap(caminho_imagem)
+        # Já no tamanho máximo do label: a imagem original tem 512px
+        pixmap = recursos.pixmap("agendafoto.png", 150)
         if not pixmap.isNull():
             self.label_foto.setPixmap(pixmap)
         else:
             self.label_foto.setText("Erro ao carregar imagem")
-            print(f"Erro: Não foi possível carregar {caminho_imagem}")
 
         self.frame_layout.addWidget(self.label_foto, alignment=Qt.AlignHCenter)
 
@@ -195,35 +195,42 @@ class TelaLogin(QMainWindow):
     def realizar_login(self):
         email = self.ui.line_email.text()
         senha = self.ui.line_senha.text()
-        try:
-            autenticado, usuario_id, nome_usuario, foto = autenticar_usuario(email, senha)
-        except Exception as e:
-            QMessageBox.warning(self, "Erro", f"Erro ao autenticar: {str(e)}")
-            return
- 
+        self.definir_ocupado(True)
+        executar(autenticar_usuario, email, senha,
+                 ao_concluir=self.login_concluido, ao_falhar=self.login_falhou, dono=self)
+
+    def definir_ocupado(self, ocupado):
+        # Enquanto a autenticação roda em segundo plano a janela continua respondendo
+        self.ui.pushButton_Entrar.setEnabled(not ocupado)
+        self.ui.link_cadastrar.setEnabled(not ocupado)
+        self.ui.pushButton_Entrar.setText("Entrando..." if ocupado else "Entrar")
+        if ocupado:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def login_falhou(self, erro):
+        self.definir_ocupado(False)
+        QMessageBox.warning(self, "Erro", f"Erro ao autenticar: {str(erro)}")
+
+    def login_concluido(self, resultado):
+        self.definir_ocupado(False)
+        autenticado, usuario_id, nome_usuario, foto_hash = resultado
         if autenticado:
             QMessageBox.information(self, "Sucesso", f"Bem-vindo, {nome_usuario}!")
-            if foto and isinstance(foto, bytes):
-                pixmap = QPixmap()
-                if pixmap.loadFromData(foto):
-                    self.ui.label_foto.setPixmap(pixmap)
-                else:
-                    QMessageBox.warning(self, "Aviso", "A foto do usuário está corrompida ou inválida.")
-                    self.ui.label_foto.setText("Foto Inválida")
-            else:
-                self.ui.label_foto.setText("Sem Foto")
+            # A foto fica a cargo da tela de contatos, que a carrega pela referência (foto_hash)
             self.abrir_tela_contatos(usuario_id)
             self.close()
         else:
             QMessageBox.warning(self, "Erro", "Email ou senha incorretos.")
- 
+
     def abrir_tela_contatos(self, usuario_id):
         self.tela_contatos = QMainWindow()
         self.ui_contatos = Ui_Form(usuario_id)
+        # setupUi já dispara o carregamento dos contatos em segundo plano
         self.ui_contatos.setupUi(self.tela_contatos)
         self.tela_contatos.show()
-        self.ui_contatos.carregar_contatos()
- 
+
     def abrir_tela_cadastro(self):
         from cadastro_proj import Ui_Tela_Cadastro
         self.tela_cadastro = QMainWindow()
@@ -1,11 +1,16 @@
 from PySide6.QtCore import Qt, QDate
-from PySide6.QtGui import QFont, QIcon
+from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (QMainWindow, QWidget, QFrame, QLabel, QLineEdit, QPushButton, 
                                QDateEdit, QTextEdit, QMessageBox, QScrollArea, QVBoxLayout, 
                                QHBoxLayout)
 from bancodedados import salvar_contato
+from executor_banco import executar
+from registro import obter_logger
+import recursos
 from datetime import datetime
 
+log = obter_logger("add_cntt")
+
 class Ui_tela_add_contato(object):
     def __init__(self):
         self.usuario_id = None
@@ -17,7 +22,7 @@ class Ui_tela_add_contato(object):
         tela_add_contato.setObjectName("tela_add_contato")
         tela_add_contato.resize(800, 600)
         tela_add_contato.setWindowTitle("Agenda de Contatos")
-        tela_add_contato.setWindowIcon(QIcon("icone.ico"))
+        tela_add_contato.setWindowIcon(recursos.icone("icone.ico"))
         self.centralwidget = QWidget(tela_add_contato)
         self.centralwidget.setStyleSheet("""
             background: qlineargradient(
@@ -248,7 +253,33 @@ class Ui_tela_add_contato(object):
             self.line_nome.setStyleSheet(self.line_nome.styleSheet().replace("rgb(80, 80, 100)", "rgb(255, 100, 100)"))
             return
 
-        if salvar_contato(nome, email, telefone, data_nascimento_str, perfil_rede_social, notas, self.usuario_id, None):
+        # Grava em segundo plano; a janela fica ocupada até o resultado chegar
+        self.definir_ocupado(True)
+        # O que a lista de contatos guarda (exibição e índice da busca)
+        contato = {"nome": nome, "telefone": telefone, "email": email, "perfil_rede_social": perfil_rede_social,
+                   "notas": notas}
+        executar(salvar_contato, nome, email, telefone, data_nascimento_str, perfil_rede_social, notas, self.usuario_id, None,
+                 ao_concluir=lambda contato_id: self.contato_salvo(contato_id, contato, data_nascimento_str),
+                 ao_falhar=lambda erro: self.falha_ao_salvar(erro, contato, data_nascimento_str),
+                 dono=self.tela_add_contato)
+
+    def definir_ocupado(self, ocupado):
+        self.pushButton_salvar.setEnabled(not ocupado)
+        self.pushButton_voltar.setEnabled(not ocupado)
+        self.pushButton_salvar.setText("Salvando..." if ocupado else "Salvar")
+        if ocupado:
+            self.tela_add_contato.setCursor(Qt.BusyCursor)
+        else:
+            self.tela_add_contato.unsetCursor()
+
+    def falha_ao_salvar(self, erro, contato, data_nascimento_str):
+        log.error("Erro ao salvar contato: %s", erro)
+        self.contato_salvo(False, contato, data_nascimento_str)
+
+    def contato_salvo(self, contato_id, contato, data_nascimento_str):
+        # contato_id: id do contato criado, ou False se não foi salvo
+        self.definir_ocupado(False)
+        if contato_id:
             QMessageBox.information(None, "Sucesso", "Contato salvo com sucesso!")
             
             # Verificar se o contato salvo faz aniversário hoje
@@ -259,9 +290,9 @@ class Ui_tela_add_contato(object):
                 data_nasc = datetime.strptime(data_nascimento_str, "%Y-%m-%d")
                 if data_nasc.day == dia_atual and data_nasc.month == mes_atual:
                     if not self.tela_contatos.mensagem_aniversario_exibida:
-                        self.tela_contatos.exibir_mensagem_aniversario([nome])
+                        self.tela_contatos.exibir_mensagem_aniversario([contato["nome"]])
 
-            self.tela_contatos.carregar_contatos()
+            self.tela_contatos.contato_gravado(dict(contato, id=contato_id))
             self.tela_add_contato.close()
         else:
             QMessageBox.warning(None, "Erro", "Erro ao salvar contato. Tente novamente.")
\ No newline at end of file
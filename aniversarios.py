@@ -0,0 +1,28 @@
+# Rotina diária: lista os aniversariantes de todos os usuários com uma única consulta indexada.
+#
+# Uso:
+#     python aniversarios.py              # aniversariantes de hoje
+#     python aniversarios.py --dias 7     # próximos 7 dias
+#     python aniversarios.py --data 2025-12-30 --dias 5
+import argparse
+import sys
+from datetime import date
+
+from bancodedados import obter_aniversariantes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista os aniversariantes de todos os usuários.")
+    parser.add_argument("--data", type=date.fromisoformat, default=date.today(), help="AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument("--dias", type=int, default=0, help="tamanho da janela após a data")
+    parser.add_argument("--usuario", type=int, help="limita a um usuário")
+    args = parser.parse_args()
+
+    for contato in obter_aniversariantes(args.usuario, args.data, args.dias):
+        print(f"{contato['dia_nascimento']:02d}/{contato['mes_nascimento']:02d}  "
+              f"usuário {contato['usuario_id']}  {contato['nome']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
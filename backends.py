@@ -0,0 +1,164 @@
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+import config
+
+
+class BackendMySQL(object):
+    nome = "mysql"
+
+    def __init__(self):
+        # Importado aqui para que instalações só com SQLite não precisem do conector
+        import mysql.connector
+        self._mysql = mysql.connector
+        self.Error = mysql.connector.Error
+
+    def abrir_conexao(self):
+        return self._mysql.connect(
+            host=config.MYSQL_HOST,
+            port=config.MYSQL_PORTA,
+            user=config.MYSQL_USUARIO,
+            password=config.MYSQL_SENHA,
+            database=config.MYSQL_BANCO
+        )
+
+    def cursor_preparado(self, conexao, dictionary=False):
+        return conexao.cursor(prepared=True, dictionary=dictionary)
+
+
+@lru_cache(maxsize=256)
+def _converter_placeholders(sql):
+    # Os helpers de bancodedados usam o estilo %s do mysql.connector
+    return sql.replace("%s", "?")
+
+
+def _linha_dicionario(cursor, linha):
+    return {coluna[0]: valor for coluna, valor in zip(cursor.description, linha)}
+
+
+class CursorSQLite(object):
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        if dictionary:
+            self._cursor.row_factory = _linha_dicionario
+
+    def execute(self, sql, parametros=()):
+        self._cursor.execute(_converter_placeholders(sql), parametros)
+
+    def executemany(self, sql, sequencia):
+        self._cursor.executemany(_converter_placeholders(sql), sequencia)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, tamanho=None):
+        if tamanho is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(tamanho)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexaoSQLite(object):
+    # Expõe a mesma interface usada de mysql.connector (cursor(dictionary=True), is_connected...)
+    def __init__(self, conexao):
+        self._conexao = conexao
+
+    def cursor(self, dictionary=False, **_opcoes):
+        return CursorSQLite(self._conexao.cursor(), dictionary)
+
+    def commit(self):
+        self._conexao.commit()
+
+    def rollback(self):
+        self._conexao.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conexao.in_transaction
+
+    def is_connected(self):
+        try:
+            self._conexao.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._conexao.close()
+
+
+class BackendSQLite(object):
+    nome = "sqlite"
+    Error = sqlite3.Error
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA temp_store = MEMORY",
+    )
+
+    def __init__(self):
+        self.caminho = config.SQLITE_CAMINHO
+
+    def abrir_conexao(self):
+        conexao = sqlite3.connect(
+            self.caminho,
+            timeout=config.SQLITE_BUSY_TIMEOUT,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=max(config.DECLARACOES_POR_CONEXAO, 16),
+            check_same_thread=False  # o pool garante uma thread por vez em cada conexão
+        )
+        for pragma in self.PRAGMAS:
+            conexao.execute(pragma)
+        conexao.execute(f"PRAGMA cache_size = {-int(config.SQLITE_CACHE_KB)}")
+        conexao.execute(f"PRAGMA mmap_size = {int(config.SQLITE_MMAP_BYTES)}")
+        return ConexaoSQLite(conexao)
+
+    # O sqlite3 já reaproveita a instrução compilada para o mesmo texto SQL
+    # (cached_statements); um cache próprio por cima só acrescentaria custo
+    cursor_preparado = None
+
+
+def _converter_data(valor):
+    return date.fromisoformat(valor.decode())
+
+
+def _converter_data_hora(valor):
+    return datetime.fromisoformat(valor.decode())
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_converter("DATE", _converter_data)
+sqlite3.register_converter("DATETIME", _converter_data_hora)
+
+BACKENDS = {
+    "mysql": BackendMySQL,
+    "sqlite": BackendSQLite,
+}
+
+
+def criar_backend(nome=None):
+    nome = (nome or config.DB_BACKEND).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de banco desconhecido: {nome} (opções: {', '.join(BACKENDS)})")
+    return BACKENDS[nome]()
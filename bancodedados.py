@@ -1,107 +1,275 @@
-import mysql.connector
-from datetime import datetime
+import atexit
+import hashlib
+import threading
+from datetime import datetime, date, timedelta
 
+import config
+from backends import criar_backend
+from cache_contatos import CacheUsuarios, chave_ordenacao
+from metricas import CursorMedido, medido, registrar_erro
+from normalizacao import chave_nome, normalizar_telefone
+from pool import PoolConexoes, ErroPool
+from registro import obter_logger
+
+backend = criar_backend()
+ErroBanco = backend.Error
+
+log = obter_logger("bancodedados")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Contatos e fotos já lidos, por usuário; as gravações abaixo atualizam o cache no lugar
+cache = CacheUsuarios(
+    capacidade=config.CACHE_USUARIOS,
+    ttl=config.CACHE_TTL,
+    max_contatos=config.CACHE_CONTATOS_POR_USUARIO,
+    bytes_imagens=config.CACHE_IMAGENS_BYTES
+)
+
+def abrir_conexao():
+    return backend.abrir_conexao()
+
+def hash_senha(senha):
+    # Mesmo resultado de SHA2(senha, 256) no MySQL, calculado aqui para funcionar em qualquer backend
+    return hashlib.sha256(senha.encode("utf-8")).hexdigest()
+
+def obter_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(
+                    abrir_conexao,
+                    tamanho=config.POOL_TAMANHO,
+                    timeout=config.POOL_TIMEOUT,
+                    ociosidade_maxima=config.POOL_OCIOSIDADE_MAXIMA,
+                    verificar_apos=config.POOL_VERIFICAR_APOS,
+                    criar_cursor_preparado=backend.cursor_preparado,
+                    declaracoes_por_conexao=config.DECLARACOES_POR_CONEXAO,
+                    envolver_cursor=CursorMedido if config.METRICAS else None
+                )
+                atexit.register(_pool.fechar_todas)
+    return _pool
+
+@medido
 def conectar():
+    # Empresta uma conexão do pool; conexao.close() a devolve
     try:
-        conexao = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="agenda"
-        )
-        return conexao
-    except mysql.connector.Error as e:
-        print(f"Erro ao conectar ao banco: {e}")
+        return obter_pool().obter()
+    except (ErroBanco, ErroPool) as e:
+        registrar_erro()
+        log.error("Erro ao conectar ao banco: %s", e)
         return None
 
-def criar_tabela_usuarios():
+SQL_INSERIR_IGNORANDO = {
+    "mysql": "INSERT IGNORE",
+    "sqlite": "INSERT OR IGNORE",
+}
+
+# Horário do servidor com fração de segundo, usado em contatos.atualizado_em
+SQL_AGORA = {
+    "mysql": "CURRENT_TIMESTAMP(6)",
+    "sqlite": "strftime('%Y-%m-%d %H:%M:%f', 'now')",
+}
+
+def hash_foto(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+def _gravar_foto(cursor, dados):
+    # Grava a imagem no repositório de fotos (se ainda não existir) e devolve o hash
+    foto_hash = hash_foto(dados)
+    cursor.execute("SELECT hash FROM fotos WHERE hash = %s", (foto_hash,))
+    if cursor.fetchone() is None:
+        sql = f"{SQL_INSERIR_IGNORANDO[backend.nome]} INTO fotos (hash, dados, tamanho) VALUES (%s, %s, %s)"
+        cursor.execute(sql, (foto_hash, dados, len(dados)))
+    return foto_hash
+
+@medido
+def salvar_usuario(nome, email, contato, senha, foto=None):
     conexao = conectar()
     if conexao is None:
-        print("Erro ao conectar ao banco.")
-        return
+        registrar_erro()
+        return False
 
     cursor = None
     try:
         cursor = conexao.cursor()
-        sql = """
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                nome VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                contato VARCHAR(20),
-                senha_hash VARCHAR(256) NOT NULL,
-                foto BLOB
-            )
-        """
-        cursor.execute(sql)
+        cursor.execute("SELECT id FROM usuarios WHERE email = %s", (email,))
+        if cursor.fetchone():
+            log.info("Cadastro recusado: email já registrado")
+            return False
+
+        foto_hash = _gravar_foto(cursor, foto) if foto else None
+        sql = "INSERT INTO usuarios (nome, email, contato, senha_hash, foto_hash) VALUES (%s, %s, %s, %s, %s)"
+        valores = (nome, email, contato, hash_senha(senha), foto_hash)
+        cursor.execute(sql, valores)
         conexao.commit()
-        print("Tabela 'usuarios' criada ou já existe.")
-    except mysql.connector.Error as e:
-        print(f"Erro ao criar tabela usuarios: {e}")
+        log.info("Usuário salvo", extra={"usuario_id": cursor.lastrowid})
+        return True
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao salvar usuario: %s", e)
+        return False
+    except Exception as e:
+        registrar_erro()
+        log.exception("Erro inesperado ao salvar usuario")
+        return False
     finally:
         if cursor:
             cursor.close()
         if conexao:
             conexao.close()
 
-def criar_tabela_contatos():
+@medido
+def autenticar_usuario(email, senha):
     conexao = conectar()
     if conexao is None:
-        print("Erro ao conectar ao banco.")
-        return
+        registrar_erro()
+        return False, None, None, None
 
     cursor = None
     try:
-        cursor = conexao.cursor()
-        cursor.execute("DROP TABLE IF EXISTS contatos")
+        cursor = conexao.cursor(prepared=True)
+        # Só a referência da foto: a autenticação nunca transfere a imagem
+        sql = "SELECT id, nome, foto_hash FROM usuarios WHERE email = %s AND senha_hash = %s"
+        cursor.execute(sql, (email, hash_senha(senha)))
+        usuario = cursor.fetchone()
+        if usuario:
+            return True, usuario[0], usuario[1], usuario[2]
+        return False, None, None, None
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao autenticar usuario: %s", e)
+        return False, None, None, None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_foto_usuario(usuario_id):
+    em_cache, foto_hash = cache.foto_hash(usuario_id)
+    if em_cache:
+        return obter_foto(foto_hash) if foto_hash else None
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True)
         sql = """
-            CREATE TABLE contatos (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                usuario_id INT,
-                nome VARCHAR(255),
-                telefone VARCHAR(20),
-                email VARCHAR(255),
-                perfil_rede_social VARCHAR(255),
-                notas TEXT,
-                data_nascimento DATE,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-            )
+            SELECT u.foto_hash, f.dados
+            FROM usuarios u
+            LEFT JOIN fotos f ON f.hash = u.foto_hash
+            WHERE u.id = %s
         """
-        cursor.execute(sql)
-        conexao.commit()
-        print("Tabela 'contatos' recriada com sucesso.")
-    except mysql.connector.Error as e:
-        print(f"Erro ao criar tabela contatos: {e}")
+        cursor.execute(sql, (usuario_id,))
+        resultado = cursor.fetchone()
+        if resultado is None:
+            return None
+        cache.guardar_foto_hash(usuario_id, resultado[0])
+        if resultado[1] is None:
+            return None
+        dados = bytes(resultado[1])
+        cache.guardar_imagem(resultado[0], None, dados)
+        return dados
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter foto: %s", e)
+        return None
     finally:
         if cursor:
             cursor.close()
         if conexao:
             conexao.close()
 
-def salvar_usuario(nome, email, contato, senha, foto=None):
+@medido
+def obter_ref_foto_usuario(usuario_id):
+    # Hash da foto atual do usuário, para saber se a imagem mudou sem transferi-la
+    em_cache, foto_hash = cache.foto_hash(usuario_id)
+    if em_cache:
+        return foto_hash
+
     conexao = conectar()
     if conexao is None:
-        return False
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True)
+        cursor.execute("SELECT foto_hash FROM usuarios WHERE id = %s", (usuario_id,))
+        resultado = cursor.fetchone()
+        if resultado is None:
+            return None
+        cache.guardar_foto_hash(usuario_id, resultado[0])
+        return resultado[0]
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter referência da foto: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_foto(foto_hash):
+    dados = cache.imagem(foto_hash)
+    if dados is not None:
+        return dados
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
 
     cursor = None
     try:
         cursor = conexao.cursor()
-        cursor.execute("SELECT id FROM usuarios WHERE email = %s", (email,))
-        if cursor.fetchone():
-            print(f"Erro: Email {email} já está registrado.")
-            return False
+        cursor.execute("SELECT dados FROM fotos WHERE hash = %s", (foto_hash,))
+        resultado = cursor.fetchone()
+        if resultado is None:
+            return None
+        dados = bytes(resultado[0])
+        cache.guardar_imagem(foto_hash, None, dados)
+        return dados
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter foto: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
 
-        sql = "INSERT INTO usuarios (nome, email, contato, senha_hash, foto) VALUES (%s, %s, %s, SHA2(%s, 256), %s)"
-        valores = (nome, email, contato, senha, foto)
-        cursor.execute(sql, valores)
+@medido
+def salvar_miniaturas(foto_hash, miniaturas):
+    # miniaturas: {lado_em_px: bytes}
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return False
+
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        sql = f"{SQL_INSERIR_IGNORANDO[backend.nome]} INTO fotos_miniaturas (hash, lado, dados) VALUES (%s, %s, %s)"
+        cursor.executemany(sql, [(foto_hash, lado, dados) for lado, dados in miniaturas.items()])
         conexao.commit()
-        print(f"Usuário {nome} salvo com sucesso.")
+        for lado, dados in miniaturas.items():
+            cache.guardar_imagem(foto_hash, lado, dados)
         return True
-    except mysql.connector.Error as e:
-        print(f"Erro ao salvar usuario: {e}")
-        return False
-    except Exception as e:
-        print(f"Erro inesperado ao salvar usuario: {e}")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao salvar miniaturas: %s", e)
         return False
     finally:
         if cursor:
@@ -109,61 +277,85 @@ def salvar_usuario(nome, email, contato, senha, foto=None):
         if conexao:
             conexao.close()
 
-def autenticar_usuario(email, senha):
+@medido
+def obter_miniatura(foto_hash, lado):
+    dados = cache.imagem(foto_hash, lado)
+    if dados is not None:
+        return dados
+
     conexao = conectar()
     if conexao is None:
-        return False, None, None, None
+        registrar_erro()
+        return None
 
     cursor = None
     try:
-        cursor = conexao.cursor()
-        sql = "SELECT id, nome, foto FROM usuarios WHERE email = %s AND senha_hash = SHA2(%s, 256)"
-        cursor.execute(sql, (email, senha))
-        usuario = cursor.fetchone()
-        if usuario:
-            return True, usuario[0], usuario[1], usuario[2]
-        return False, None, None, None
-    except mysql.connector.Error as e:
-        print(f"Erro ao autenticar usuario: {e}")
-        return False, None, None, None
+        cursor = conexao.cursor(prepared=True)
+        cursor.execute("SELECT dados FROM fotos_miniaturas WHERE hash = %s AND lado = %s", (foto_hash, lado))
+        resultado = cursor.fetchone()
+        if resultado is None:
+            return None
+        dados = bytes(resultado[0])
+        cache.guardar_imagem(foto_hash, lado, dados)
+        return dados
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter miniatura: %s", e)
+        return None
     finally:
         if cursor:
             cursor.close()
         if conexao:
             conexao.close()
 
-def obter_foto_usuario(usuario_id):
+@medido
+def remover_fotos_orfas():
+    # Apaga imagens que nenhum usuário referencia mais; retorna quantas foram removidas
     conexao = conectar()
     if conexao is None:
-        return None
+        registrar_erro()
+        return 0
 
     cursor = None
     try:
         cursor = conexao.cursor()
-        cursor.execute("SELECT foto FROM usuarios WHERE id = %s", (usuario_id,))
-        resultado = cursor.fetchone()
-        return resultado[0] if resultado else None
-    except mysql.connector.Error as e:
-        print(f"Erro ao obter foto: {e}")
-        return None
+        sql = """
+            DELETE FROM fotos
+            WHERE NOT EXISTS (SELECT 1 FROM usuarios u WHERE u.foto_hash = fotos.hash)
+        """
+        cursor.execute(sql)
+        removidas = cursor.rowcount
+        cursor.execute("""
+            DELETE FROM fotos_miniaturas
+            WHERE NOT EXISTS (SELECT 1 FROM fotos f WHERE f.hash = fotos_miniaturas.hash)
+        """)
+        conexao.commit()
+        return removidas
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao remover fotos órfãs: %s", e)
+        return 0
     finally:
         if cursor:
             cursor.close()
         if conexao:
             conexao.close()
 
+@medido
 def usuario_existe(usuario_id):
     conexao = conectar()
     if conexao is None:
+        registrar_erro()
         return False
 
     cursor = None
     try:
-        cursor = conexao.cursor()
+        cursor = conexao.cursor(prepared=True)
         cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
         return cursor.fetchone() is not None
-    except mysql.connector.Error as e:
-        print(f"Erro ao verificar usuario: {e}")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao verificar usuario: %s", e)
         return False
     finally:
         if cursor:
@@ -179,39 +371,52 @@ def validar_data_nascimento(data_nascimento):
             return datetime.strptime(data_nascimento, "%Y-%m-%d").date()
         return data_nascimento
     except ValueError as e:
-        print(f"Erro ao validar data de nascimento: {e}")
+        log.warning("Data de nascimento inválida: %s", e)
         return None
 
+@medido
 def salvar_contato(nome, email, telefone, data_nascimento, perfil_rede_social, notas, usuario_id, foto=None):
     conexao = conectar()
     if conexao is None:
-        print("Erro: Não foi possível conectar ao banco de dados.")
+        registrar_erro()
+        log.error("Não foi possível conectar ao banco de dados")
         return False
 
     cursor = None
     try:
-        if not usuario_existe(usuario_id):
-            print(f"Erro: Usuário com ID {usuario_id} não existe.")
+        # Verifica o usuário na mesma conexão, sem emprestar uma segunda do pool
+        cursor = conexao.cursor(prepared=True)
+        cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
+        if cursor.fetchone() is None:
+            log.warning("Usuário não existe", extra={"usuario_id": usuario_id})
             return False
 
         data_nascimento = validar_data_nascimento(data_nascimento)
-        print(f"Tentando salvar contato com: nome={nome}, email={email}, telefone={telefone}, data_nascimento={data_nascimento}, usuario_id={usuario_id}")
 
-        cursor = conexao.cursor()
-        sql = """
-            INSERT INTO contatos (nome, email, telefone, data_nascimento, perfil_rede_social, notas, usuario_id)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        sql = f"""
+            INSERT INTO contatos (nome, nome_ordenacao, email, telefone, telefone_normalizado, data_nascimento,
+                                  perfil_rede_social, notas, usuario_id, atualizado_em)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, {SQL_AGORA[backend.nome]})
         """
-        valores = (nome, email, telefone, data_nascimento, perfil_rede_social, notas, usuario_id)
+        valores = (nome, chave_nome(nome), email, telefone, normalizar_telefone(telefone), data_nascimento,
+                   perfil_rede_social, notas, usuario_id)
         cursor.execute(sql, valores)
         conexao.commit()
-        print(f"Contato {nome} salvo com sucesso.")
-        return True
-    except mysql.connector.Error as e:
-        print(f"Erro MySQL ao salvar contato: {e} (Erro código: {e.errno})")
+        cache.inserir_contato(usuario_id, {
+            "id": cursor.lastrowid, "nome": nome, "telefone": telefone if telefone is not None else "",
+            "email": email, "perfil_rede_social": perfil_rede_social, "notas": notas,
+            "data_nascimento": data_nascimento,
+        })
+        log.debug("Contato salvo", extra={"usuario_id": usuario_id, "contato_id": cursor.lastrowid})
+        # O id do contato criado (sempre verdadeiro): a tela o insere na lista sem recarregá-la
+        return cursor.lastrowid
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao salvar contato: %s", e, extra={"errno": getattr(e, "errno", None)})
         return False
     except Exception as e:
-        print(f"Erro inesperado ao salvar contato: {type(e).__name__} - {e}")
+        registrar_erro()
+        log.exception("Erro inesperado ao salvar contato")
         return False
     finally:
         if cursor:
@@ -219,14 +424,51 @@ def salvar_contato(nome, email, telefone, data_nascimento, perfil_rede_social, n
         if conexao:
             conexao.close()
 
-def obter_contatos(usuario_id):
+@medido
+def salvar_contatos_lote(usuario_id, contatos):
+    # contatos: lista de tuplas (nome, email, telefone, data_nascimento, perfil_rede_social, notas).
+    # Grava tudo com um único executemany e um único commit; retorna quantos foram inseridos.
+    if not contatos:
+        return 0
+
     conexao = conectar()
     if conexao is None:
-        return []
+        registrar_erro()
+        return 0
 
     cursor = None
     try:
-        cursor = conexao.cursor(dictionary=True)
+        cursor = conexao.cursor()
+        sql = f"""
+            INSERT INTO contatos (nome, email, telefone, data_nascimento, perfil_rede_social, notas, usuario_id,
+                                  telefone_normalizado, nome_ordenacao, atualizado_em)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, {SQL_AGORA[backend.nome]})
+        """
+        cursor.executemany(sql, [tuple(contato) + (usuario_id, normalizar_telefone(contato[2]), chave_nome(contato[0]))
+                                 for contato in contatos])
+        conexao.commit()
+        # Os ids do lote não voltam do executemany: a lista é recarregada na próxima leitura
+        cache.invalidar(usuario_id)
+        return len(contatos)
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao salvar lote de contatos: %s", e)
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+def _carregar_contatos(usuario_id, limite=None):
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True, dictionary=True)
         sql = """
             SELECT 
                 id,
@@ -235,15 +477,471 @@ def obter_contatos(usuario_id):
                 email, 
                 perfil_rede_social, 
                 notas,
-                data_nascimento
+                data_nascimento,
+                atualizado_em
             FROM contatos 
-            WHERE usuario_id = %s
+            WHERE usuario_id = %s AND excluido = 0
         """
-        cursor.execute(sql, (usuario_id,))
+        if limite is None:
+            cursor.execute(sql, (usuario_id,))
+        else:
+            cursor.execute(sql + " LIMIT %s", (usuario_id, limite))
         contatos = cursor.fetchall()
+        # A maior atualizado_em da leitura é a marca de sincronização da lista
+        marca = max((contato.pop("atualizado_em") for contato in contatos), default=None)
+        cache.guardar_contatos(usuario_id, contatos, marca)
         return contatos
-    except mysql.connector.Error as e:
-        print(f"Erro ao obter contatos: {e}")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter contatos: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_contatos(usuario_id):
+    contatos = cache.contatos(usuario_id)
+    if contatos is None:
+        contatos = _carregar_contatos(usuario_id) or []
+    return contatos
+
+# Colunas que podem ser pedidas em obter_contatos_pagina; telefone nulo vira ''
+COLUNAS_CONTATO = {
+    "id": "id",
+    "nome": "nome",
+    "telefone": "IFNULL(telefone, '') AS telefone",
+    "email": "email",
+    "perfil_rede_social": "perfil_rede_social",
+    "notas": "notas",
+    "data_nascimento": "data_nascimento",
+}
+
+def _projetar(contato, colunas):
+    if colunas is None:
+        return contato
+    return {coluna: contato[coluna] for coluna in ("id", "nome") + tuple(colunas)}
+
+def _projecao(colunas):
+    colunas = list(colunas or COLUNAS_CONTATO)
+    desconhecidas = [coluna for coluna in colunas if coluna not in COLUNAS_CONTATO]
+    if desconhecidas:
+        raise ValueError(f"Colunas inválidas: {', '.join(desconhecidas)}")
+    # id e nome formam o cursor da paginação e sempre são retornados
+    for obrigatoria in ("nome", "id"):
+        if obrigatoria not in colunas:
+            colunas.insert(0, obrigatoria)
+    return ", ".join(COLUNAS_CONTATO[coluna] for coluna in colunas)
+
+@medido
+def obter_contatos_pagina(usuario_id, limite=50, apos=None, colunas=None):
+    # Paginação por chave (keyset) em (nome_ordenacao, id): cada página custa um range
+    # scan no índice (usuario_id, nome_ordenacao), sem OFFSET. A ordem é a mesma de
+    # cache_contatos.chave_ordenacao, então um cursor vale nos dois caminhos. apos é o cursor devolvido pela página
+    # anterior. Retorna (contatos, proximo_cursor); proximo_cursor é None na última página.
+    projecao = _projecao(colunas)
+
+    pagina = cache.pagina(usuario_id, limite, apos)
+    if pagina is None and cache.ativo and not cache.muito_grande(usuario_id):
+        # Lê a lista do usuário inteira de uma vez (se couber no cache); as próximas
+        # páginas, a contagem e as reaberturas da tela saem da memória
+        _carregar_contatos(usuario_id, cache.max_contatos + 1)
+        pagina = cache.pagina(usuario_id, limite, apos)
+    if pagina is not None:
+        contatos, proximo = pagina
+        return [_projetar(contato, colunas) for contato in contatos], proximo
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return [], None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True, dictionary=True)
+        if apos is None:
+            filtro, parametros = "", ()
+        else:
+            chave = chave_nome(apos[0])
+            filtro, parametros = "AND (nome_ordenacao > %s OR (nome_ordenacao = %s AND id > %s))", (chave, chave, apos[1])
+        sql = f"""
+            SELECT {projecao}
+            FROM contatos
+            WHERE usuario_id = %s AND excluido = 0 {filtro}
+            ORDER BY nome_ordenacao, id
+            LIMIT %s
+        """
+        cursor.execute(sql, (usuario_id,) + parametros + (limite + 1,))
+        contatos = cursor.fetchall()
+        proximo = None
+        if len(contatos) > limite:
+            contatos = contatos[:limite]
+            proximo = (contatos[-1]["nome"], contatos[-1]["id"])
+        return contatos, proximo
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter página de contatos: %s", e)
+        return [], None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+def percorrer_contatos(usuario_id, tamanho_lote=None, colunas=None):
+    # Gera os contatos do usuário em ordem de nome, lendo tamanho_lote linhas por vez com
+    # fetchmany: a memória usada não depende do tamanho da agenda. colunas limita as
+    # colunas lidas, como em obter_contatos_pagina (id e nome sempre vêm). No MySQL o cursor
+    # padrão não é bufferizado, então as linhas vêm do servidor conforme são lidas.
+    # A conexão fica emprestada até o gerador terminar ou ser fechado. Ao contrário
+    # das outras leituras, um erro é repassado: uma exportação pela metade não pode
+    # parecer completa.
+    tamanho_lote = tamanho_lote or config.EXPORTACAO_LOTE
+    conexao = conectar()
+    if conexao is None:
+        raise ErroPool("Não foi possível conectar ao banco de dados.")
+
+    cursor = None
+    terminou = False
+    try:
+        cursor = conexao.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT {_projecao(colunas)}
+            FROM contatos
+            WHERE usuario_id = %s AND excluido = 0
+            ORDER BY nome_ordenacao, id
+        """, (usuario_id,))
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield from linhas
+        terminou = True
+    except ErroBanco as e:
+        log.error("Erro ao percorrer contatos: %s", e)
+        raise
+    finally:
+        if cursor:
+            try:
+                # Interrompido no meio: descarta o resto do resultado, sem acumular,
+                # para a conexão voltar limpa ao pool
+                while not terminou and cursor.fetchmany(tamanho_lote):
+                    pass
+                cursor.close()
+            except ErroBanco:
+                pass
+        if conexao:
+            conexao.close()
+
+def _escapar_like(termo):
+    # "!" como caractere de escape funciona igual no MySQL e no SQLite
+    return termo.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+@medido
+def buscar_contatos(usuario_id, termo, limite=50, colunas=("id", "nome", "telefone", "email")):
+    # Primeiro os contatos cujo nome, telefone ou email começam com o termo (range scan
+    # nos índices por usuário); se não completar o limite, completa com correspondências
+    # em qualquer posição desses campos, do perfil ou das notas.
+    # A tela de contatos busca no índice em memória (indice_busca.py); esta consulta
+    # atende quem não tem o índice montado, sem ler a agenda inteira.
+    termo = (termo or "").strip()
+    if not termo:
+        return []
+
+    projecao = _projecao(colunas)
+    prefixo = _escapar_like(termo) + "%"
+    trecho = "%" + _escapar_like(termo) + "%"
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return []
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(dictionary=True)
+        encontrados = {}
+
+        for coluna in ("nome", "telefone", "email"):
+            if len(encontrados) >= limite:
+                break
+            sql = f"""
+                SELECT {projecao} FROM contatos
+                WHERE usuario_id = %s AND excluido = 0 AND {coluna} LIKE %s ESCAPE '!'
+                LIMIT %s
+            """
+            cursor.execute(sql, (usuario_id, prefixo, limite))
+            for contato in cursor.fetchall():
+                encontrados.setdefault(contato["id"], contato)
+
+        resultado = sorted(encontrados.values(), key=lambda c: chave_ordenacao(c["nome"], c["id"]))[:limite]
+
+        if len(resultado) < limite:
+            sql = f"""
+                SELECT {projecao} FROM contatos
+                WHERE usuario_id = %s AND excluido = 0
+                  AND (nome LIKE %s ESCAPE '!' OR telefone LIKE %s ESCAPE '!' OR email LIKE %s ESCAPE '!'
+                       OR perfil_rede_social LIKE %s ESCAPE '!' OR notas LIKE %s ESCAPE '!')
+                ORDER BY nome_ordenacao, id
+                LIMIT %s
+            """
+            cursor.execute(sql, (usuario_id, trecho, trecho, trecho, trecho, trecho, limite + len(resultado)))
+            for contato in cursor.fetchall():
+                if contato["id"] not in encontrados and len(resultado) < limite:
+                    encontrados[contato["id"]] = contato
+                    resultado.append(contato)
+
+        return resultado
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao buscar contatos: %s", e)
+        return []
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_marca_sincronizacao(usuario_id):
+    # Marca a partir da qual obter_contatos_desde deve buscar alterações da lista já lida
+    marca = cache.marca(usuario_id)
+    if marca is not None:
+        return marca
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True)
+        # ORDER BY ... LIMIT 1 em vez de MAX(): no SQLite o agregado perde o tipo DATETIME
+        # e voltaria texto; nos dois backends é a última entrada do índice do usuário
+        cursor.execute("SELECT atualizado_em FROM contatos WHERE usuario_id = %s ORDER BY atualizado_em DESC LIMIT 1",
+                       (usuario_id,))
+        resultado = cursor.fetchone()
+        return resultado[0] if resultado else None
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter marca de sincronização: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_contatos_desde(usuario_id, marca=None):
+    # Contatos gravados ou excluídos depois de marca, em range scan no índice
+    # (usuario_id, atualizado_em). Retorna (alterados, ids_excluidos, nova_marca);
+    # nova_marca vai na próxima chamada. Com marca=None devolve tudo, inclusive lápides.
+    # A margem cobre transações que gravaram antes da marca mas confirmaram depois;
+    # reaplicar uma linha já recebida não tem efeito.
+    projecao = _projecao(None)
+    desde = marca - timedelta(seconds=config.SINCRONIZACAO_MARGEM) if marca is not None else datetime(1970, 1, 1)
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return [], [], marca
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True, dictionary=True)
+        sql = f"""
+            SELECT {projecao}, atualizado_em, excluido
+            FROM contatos
+            WHERE usuario_id = %s AND atualizado_em > %s
+            ORDER BY atualizado_em
+        """
+        cursor.execute(sql, (usuario_id, desde))
+        alterados, excluidos = [], []
+        nova_marca = marca
+        for contato in cursor.fetchall():
+            atualizado_em = contato.pop("atualizado_em")
+            if nova_marca is None or atualizado_em > nova_marca:
+                nova_marca = atualizado_em
+            if contato.pop("excluido"):
+                excluidos.append(contato["id"])
+            else:
+                alterados.append(contato)
+        cache.aplicar_alteracoes(usuario_id, alterados, excluidos, marca, nova_marca)
+        return alterados, excluidos, nova_marca
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter alterações de contatos: %s", e)
+        return [], [], marca
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def contar_contatos(usuario_id):
+    total = cache.total(usuario_id)
+    if total is not None:
+        return total
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return 0
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True)
+        cursor.execute("SELECT COUNT(*) FROM contatos WHERE usuario_id = %s AND excluido = 0", (usuario_id,))
+        return cursor.fetchone()[0]
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao contar contatos: %s", e)
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_contato(contato_id):
+    contato = cache.contato(contato_id)
+    if contato is not None:
+        return contato
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True, dictionary=True)
+        sql = f"SELECT {_projecao(None)} FROM contatos WHERE id = %s AND excluido = 0"
+        cursor.execute(sql, (contato_id,))
+        return cursor.fetchone()
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter contato: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def obter_contato_por_telefone(usuario_id, numero):
+    # Busca pelo índice (usuario_id, telefone_normalizado): "(11) 99999-9999",
+    # "11999999999" e "+55 11 99999-9999" acham o mesmo contato
+    telefone_normalizado = normalizar_telefone(numero)
+    if telefone_normalizado is None:
+        return None
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return None
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(prepared=True, dictionary=True)
+        sql = f"""
+            SELECT {_projecao(None)} FROM contatos
+            WHERE usuario_id = %s AND telefone_normalizado = %s AND excluido = 0
+            ORDER BY id LIMIT 1
+        """
+        cursor.execute(sql, (usuario_id, telefone_normalizado))
+        return cursor.fetchone()
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao buscar contato por telefone: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+def _faixas_aniversario(data, dias):
+    # Converte a janela [data, data + dias] em faixas (mes, dia_inicial, dia_final),
+    # no máximo uma por mês, para consultar o índice (mes_nascimento, dia_nascimento)
+    faixas = []
+    for deslocamento in range(min(dias, 365) + 1):
+        dia = data + timedelta(days=deslocamento)
+        if faixas and faixas[-1][0] == dia.month:
+            faixas[-1][2] = dia.day
+        else:
+            faixas.append([dia.month, dia.day, dia.day])
+        # Em anos não bissextos, quem nasceu em 29/02 comemora em 28/02
+        if dia.month == 2 and dia.day == 28 and (dia + timedelta(days=1)).month == 3:
+            faixas[-1][2] = 29
+    return faixas
+
+def _ordenar_por_janela(contatos, data):
+    def aniversario_em(ano, mes, dia):
+        try:
+            return date(ano, mes, dia)
+        except ValueError:
+            return date(ano, 2, 28)  # 29/02 em ano não bissexto
+
+    def dias_ate(contato):
+        mes, dia = contato["mes_nascimento"], contato["dia_nascimento"]
+        aniversario = aniversario_em(data.year, mes, dia)
+        if aniversario < data:
+            aniversario = aniversario_em(data.year + 1, mes, dia)
+        return (aniversario - data).days
+    return sorted(contatos, key=lambda contato: (dias_ate(contato), contato["nome"] or ""))
+
+@medido
+def obter_aniversariantes(usuario_id=None, data=None, dias=0):
+    # Contatos que fazem aniversário entre data (padrão: hoje) e data + dias.
+    # Com usuario_id=None busca de todos os usuários em uma única consulta (rotina diária).
+    data = data or date.today()
+    faixas = _faixas_aniversario(data, dias)
+    condicoes = " OR ".join("(mes_nascimento = %s AND dia_nascimento BETWEEN %s AND %s)" for _ in faixas)
+    parametros = tuple(valor for faixa in faixas for valor in faixa)
+
+    contatos = cache.contatos(usuario_id) if usuario_id is not None else None
+    if contatos is not None:
+        aniversariantes = []
+        for contato in contatos:
+            nascimento = contato["data_nascimento"]
+            if nascimento and any(nascimento.month == mes and inicio <= nascimento.day <= fim
+                                  for mes, inicio, fim in faixas):
+                aniversariantes.append({
+                    "id": contato["id"], "usuario_id": usuario_id, "nome": contato["nome"],
+                    "data_nascimento": nascimento,
+                    "mes_nascimento": nascimento.month, "dia_nascimento": nascimento.day,
+                })
+        return _ordenar_por_janela(aniversariantes, data)
+
+    filtro_usuario = ""
+    if usuario_id is not None:
+        filtro_usuario = "usuario_id = %s AND "
+        parametros = (usuario_id,) + parametros
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return []
+
+    cursor = None
+    try:
+        cursor = conexao.cursor(dictionary=True)
+        sql = f"""
+            SELECT id, usuario_id, nome, data_nascimento, mes_nascimento, dia_nascimento
+            FROM contatos
+            WHERE {filtro_usuario}excluido = 0 AND ({condicoes})
+        """
+        cursor.execute(sql, parametros)
+        return _ordenar_por_janela(cursor.fetchall(), data)
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao obter aniversariantes: %s", e)
         return []
     finally:
         if cursor:
@@ -251,32 +949,41 @@ def obter_contatos(usuario_id):
         if conexao:
             conexao.close()
 
+@medido
 def atualizar_contato(contato_id, nome, email, telefone, data_nascimento, perfil_rede_social, notas, foto=None):
     conexao = conectar()
     if conexao is None:
+        registrar_erro()
         return False
 
     cursor = None
     try:
         data_nascimento = validar_data_nascimento(data_nascimento)
-        print(f"Tentando atualizar contato ID {contato_id} com: nome={nome}, email={email}, telefone={telefone}, data_nascimento={data_nascimento}")
 
-        cursor = conexao.cursor()
-        sql = """
+        cursor = conexao.cursor(prepared=True)
+        sql = f"""
             UPDATE contatos 
-            SET nome=%s, email=%s, telefone=%s, data_nascimento=%s, perfil_rede_social=%s, notas=%s
+            SET nome=%s, nome_ordenacao=%s, email=%s, telefone=%s, telefone_normalizado=%s, data_nascimento=%s,
+                perfil_rede_social=%s, notas=%s, atualizado_em={SQL_AGORA[backend.nome]}
             WHERE id=%s
         """
-        valores = (nome, email, telefone, data_nascimento, perfil_rede_social, notas, contato_id)
+        valores = (nome, chave_nome(nome), email, telefone, normalizar_telefone(telefone), data_nascimento,
+                   perfil_rede_social, notas, contato_id)
         cursor.execute(sql, valores)
         conexao.commit()
-        print(f"Contato ID {contato_id} atualizado com sucesso.")
+        cache.atualizar_contato(contato_id, {
+            "nome": nome, "telefone": telefone if telefone is not None else "", "email": email,
+            "perfil_rede_social": perfil_rede_social, "notas": notas, "data_nascimento": data_nascimento,
+        })
+        log.debug("Contato atualizado", extra={"contato_id": contato_id})
         return True
-    except mysql.connector.Error as e:
-        print(f"Erro MySQL ao atualizar contato: {e} (Erro código: {e.errno})")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao atualizar contato: %s", e, extra={"contato_id": contato_id, "errno": getattr(e, "errno", None)})
         return False
     except Exception as e:
-        print(f"Erro inesperado ao atualizar contato: {type(e).__name__} - {e}")
+        registrar_erro()
+        log.exception("Erro inesperado ao atualizar contato")
         return False
     finally:
         if cursor:
@@ -284,21 +991,191 @@ def atualizar_contato(contato_id, nome, email, telefone, data_nascimento, perfil
         if conexao:
             conexao.close()
 
+@medido
 def deletar_contato(contato_id):
     conexao = conectar()
     if conexao is None:
+        registrar_erro()
         return False
 
     cursor = None
     try:
-        cursor = conexao.cursor()
-        sql = "DELETE FROM contatos WHERE id = %s"
+        cursor = conexao.cursor(prepared=True)
+        # Exclusão lógica: a lápide avisa os outros clientes em obter_contatos_desde
+        sql = f"UPDATE contatos SET excluido = 1, atualizado_em = {SQL_AGORA[backend.nome]} WHERE id = %s"
         cursor.execute(sql, (contato_id,))
         conexao.commit()
-        print(f"Contato ID {contato_id} deletado com sucesso.")
+        cache.remover_contato(contato_id)
+        log.debug("Contato deletado", extra={"contato_id": contato_id})
+        return True
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao deletar contato: %s", e)
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+# Campos que atualizar_contatos aceita alterar em lote
+CAMPOS_EDITAVEIS = ("nome", "email", "telefone", "data_nascimento", "perfil_rede_social", "notas")
+
+def _colunas_gravadas(campos):
+    # Colunas do UPDATE para campos editáveis: telefone e nome levam junto as formas
+    # normalizada e de ordenação
+    colunas = dict(campos)
+    if "telefone" in colunas:
+        colunas["telefone_normalizado"] = normalizar_telefone(colunas["telefone"])
+    if "nome" in colunas:
+        colunas["nome_ordenacao"] = chave_nome(colunas["nome"])
+    return colunas
+
+def _blocos(ids, tamanho=500):
+    # Divide listas longas de ids para não estourar o limite de parâmetros por instrução
+    ids = list(dict.fromkeys(ids))
+    for inicio in range(0, len(ids), tamanho):
+        yield ids[inicio:inicio + tamanho]
+
+@medido
+def deletar_contatos(ids):
+    # Exclui vários contatos em uma única transação (UPDATE ... WHERE id IN, em blocos).
+    # Retorna quantos foram excluídos; em caso de erro nada é excluído.
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return 0
+
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        excluidos = 0
+        for bloco in _blocos(ids):
+            marcadores = ", ".join(["%s"] * len(bloco))
+            sql = f"""
+                UPDATE contatos SET excluido = 1, atualizado_em = {SQL_AGORA[backend.nome]}
+                WHERE excluido = 0 AND id IN ({marcadores})
+            """
+            cursor.execute(sql, tuple(bloco))
+            excluidos += cursor.rowcount
+        conexao.commit()
+        for contato_id in ids:
+            cache.remover_contato(contato_id)
+        log.debug("%d contatos deletados", excluidos)
+        return excluidos
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao deletar contatos: %s", e)
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def atualizar_contatos(ids, campos):
+    # Aplica os mesmos valores (campos: {coluna: valor}) a vários contatos em uma única
+    # transação. Retorna quantos foram atualizados; em caso de erro nada é alterado.
+    ids = list(ids)
+    invalidos = [campo for campo in campos if campo not in CAMPOS_EDITAVEIS]
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+    if not ids or not campos:
+        return 0
+
+    campos = dict(campos)
+    if "data_nascimento" in campos:
+        campos["data_nascimento"] = validar_data_nascimento(campos["data_nascimento"])
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return 0
+
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        colunas = _colunas_gravadas(campos)
+        atribuicoes = ", ".join(f"{coluna} = %s" for coluna in colunas)
+        atualizados = 0
+        for bloco in _blocos(ids):
+            marcadores = ", ".join(["%s"] * len(bloco))
+            sql = f"""
+                UPDATE contatos SET {atribuicoes}, atualizado_em = {SQL_AGORA[backend.nome]}
+                WHERE excluido = 0 AND id IN ({marcadores})
+            """
+            cursor.execute(sql, tuple(colunas.values()) + tuple(bloco))
+            atualizados += cursor.rowcount
+        conexao.commit()
+        if "telefone" in campos and campos["telefone"] is None:
+            campos["telefone"] = ""  # mesma forma das leituras (IFNULL)
+        for contato_id in ids:
+            cache.atualizar_contato(contato_id, campos)
+        log.debug("%d contatos atualizados", atualizados)
+        return atualizados
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao atualizar contatos: %s", e)
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+@medido
+def mesclar_contatos(usuario_id, manter_id, remover_ids, campos):
+    # Numa única transação grava campos ({coluna: valor}) no contato manter_id e exclui
+    # os contatos remover_ids, todos do mesmo usuário. Em caso de erro nada muda.
+    invalidos = [campo for campo in campos if campo not in CAMPOS_EDITAVEIS]
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+    remover_ids = [contato_id for contato_id in remover_ids if contato_id != manter_id]
+    campos = dict(campos)
+    if "data_nascimento" in campos:
+        campos["data_nascimento"] = validar_data_nascimento(campos["data_nascimento"])
+
+    conexao = conectar()
+    if conexao is None:
+        registrar_erro()
+        return False
+
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        agora = SQL_AGORA[backend.nome]
+        colunas = _colunas_gravadas(campos)
+        atribuicoes = "".join(f"{coluna} = %s, " for coluna in colunas)
+        cursor.execute(f"""
+            UPDATE contatos SET {atribuicoes}atualizado_em = {agora}
+            WHERE id = %s AND usuario_id = %s AND excluido = 0
+        """, tuple(colunas.values()) + (manter_id, usuario_id))
+        if cursor.rowcount != 1:
+            # Contato já excluído (ou de outro usuário): não apaga os outros. A transação
+            # pendente é descartada quando a conexão volta ao pool
+            return False
+        for bloco in _blocos(remover_ids):
+            marcadores = ", ".join(["%s"] * len(bloco))
+            cursor.execute(f"""
+                UPDATE contatos SET excluido = 1, atualizado_em = {agora}
+                WHERE usuario_id = %s AND excluido = 0 AND id IN ({marcadores})
+            """, (usuario_id,) + tuple(bloco))
+        conexao.commit()
+        if "telefone" in campos and campos["telefone"] is None:
+            campos["telefone"] = ""
+        cache.atualizar_contato(manter_id, campos)
+        for contato_id in remover_ids:
+            cache.remover_contato(contato_id)
+        log.debug("Contatos mesclados", extra={"contato_id": manter_id, "removidos": len(remover_ids)})
         return True
-    except mysql.connector.Error as e:
-        print(f"Erro ao deletar contato: {e}")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao mesclar contatos: %s", e)
         return False
     finally:
         if cursor:
@@ -306,24 +1183,32 @@ def deletar_contato(contato_id):
         if conexao:
             conexao.close()
 
+@medido
 def atualizar_foto_usuario(usuario_id, foto_data):
     conexao = conectar()
     if conexao is None:
+        registrar_erro()
         return False
 
     cursor = None
     try:
         cursor = conexao.cursor()
-        sql = "UPDATE usuarios SET foto = %s WHERE id = %s"
-        cursor.execute(sql, (foto_data, usuario_id))
-        if cursor.rowcount == 0:
-            print(f"Usuário com ID {usuario_id} não encontrado.")
+        # rowcount do UPDATE não serve para isso: no MySQL é 0 quando a foto enviada é a mesma
+        cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
+        if cursor.fetchone() is None:
+            log.warning("Usuário não encontrado", extra={"usuario_id": usuario_id})
             return False
+        foto_hash = _gravar_foto(cursor, foto_data)
+        sql = "UPDATE usuarios SET foto_hash = %s WHERE id = %s"
+        cursor.execute(sql, (foto_hash, usuario_id))
         conexao.commit()
-        print(f"Foto do usuário ID {usuario_id} atualizada com sucesso.")
+        cache.guardar_foto_hash(usuario_id, foto_hash)
+        cache.guardar_imagem(foto_hash, None, foto_data)
+        log.debug("Foto do usuário atualizada", extra={"usuario_id": usuario_id})
         return True
-    except mysql.connector.Error as e:
-        print(f"Erro ao atualizar foto: {e}")
+    except ErroBanco as e:
+        registrar_erro()
+        log.error("Erro ao atualizar foto: %s", e)
         return False
     finally:
         if cursor:
@@ -332,7 +1217,8 @@ def atualizar_foto_usuario(usuario_id, foto_data):
             conexao.close()
 
 if __name__ == "__main__":
-    criar_tabela_usuarios()
-    criar_tabela_contatos()
+    # Cria ou atualiza o esquema sem apagar dados (veja migracoes.py)
+    from migracoes import aplicar_migracoes
+    aplicar_migracoes()
 
     
\ No newline at end of file
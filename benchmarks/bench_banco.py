@@ -0,0 +1,244 @@
+# Vazão e latência (p50/p99) de cada operação de bancodedados com a tabela de
+# contatos em 1 mil, 100 mil e 1 milhão de linhas.
+#
+# O banco é populado pelo gerador_dados.py em degraus: usuários com
+# --contatos-por-usuario contatos cada, até chegar a cada tamanho; em cada degrau
+# todas as operações são medidas contra usuários e contatos sorteados.
+#
+# Uso, a partir da raiz do projeto:
+#     python -m benchmarks.bench_banco
+#     python -m benchmarks.bench_banco --tamanhos 1000,100000 --execucoes 500
+# No SQLite, sem AGENDA_SQLITE_CAMINHO, usa um arquivo temporário recriado a cada
+# execução. No MySQL aponte AGENDA_MYSQL_BANCO para um banco vazio só do benchmark.
+#
+# Os resultados vão para benchmarks/resultados/ (um JSON por execução) e são
+# comparados com a execução anterior do mesmo backend; com --base escolhe-se outra.
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+
+_DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RESULTADOS = os.path.join(_DIRETORIO, "resultados")
+
+# Descartadas antes de medir cada operação (conexões do pool, caches do banco)
+AQUECIMENTO = 5
+
+
+def _percentil(ordenadas, p):
+    # Nearest-rank sobre as amostras já ordenadas
+    return ordenadas[max(0, math.ceil(p / 100.0 * len(ordenadas)) - 1)]
+
+
+def medir(funcao, execucoes):
+    for _ in range(AQUECIMENTO):
+        funcao()
+    amostras = []
+    inicio = time.perf_counter()
+    for _ in range(execucoes):
+        antes = time.perf_counter()
+        funcao()
+        amostras.append((time.perf_counter() - antes) * 1000.0)
+    duracao = time.perf_counter() - inicio
+    amostras.sort()
+    return {
+        "execucoes": execucoes,
+        "ops_s": round(execucoes / duracao, 1),
+        "media_ms": round(sum(amostras) / len(amostras), 3),
+        "p50_ms": round(_percentil(amostras, 50), 3),
+        "p99_ms": round(_percentil(amostras, 99), 3),
+        "max_ms": round(amostras[-1], 3),
+    }
+
+
+def operacoes(bancodedados, gerador_dados, estado):
+    # (nome, função sem argumentos); cada chamada sorteia usuário/contato a partir de estado
+    aleatorio = random.Random(1)
+
+    def usuario():
+        return aleatorio.choice(estado["usuarios"])
+
+    def contato_id():
+        return aleatorio.randint(1, estado["max_contato_id"])
+
+    def campos_contato():
+        return gerador_dados.gerar_contato(aleatorio)
+
+    def novo_usuario():
+        estado["novos_usuarios"] += 1
+        nome, email, contato, senha = next(gerador_dados.gerar_usuarios(1, semente=1, inicio=estado["novos_usuarios"]))
+        return bancodedados.salvar_usuario(nome, f"bench.{time.time_ns()}.{email}", contato, senha)
+
+    return (
+        ("salvar_usuario", novo_usuario),
+        ("autenticar_usuario", lambda: bancodedados.autenticar_usuario(usuario()[1], gerador_dados.SENHA_PADRAO)),
+        ("usuario_existe", lambda: bancodedados.usuario_existe(usuario()[0])),
+        ("obter_foto_usuario", lambda: bancodedados.obter_foto_usuario(usuario()[0])),
+        ("atualizar_foto_usuario", lambda: bancodedados.atualizar_foto_usuario(usuario()[0], os.urandom(2048))),
+        ("obter_contatos", lambda: bancodedados.obter_contatos(usuario()[0])),
+        ("obter_contatos_pagina", lambda: bancodedados.obter_contatos_pagina(usuario()[0], 50, colunas=("id", "nome", "telefone"))),
+        ("buscar_contatos", lambda: bancodedados.buscar_contatos(usuario()[0], aleatorio.choice(gerador_dados.NOMES))),
+        ("contar_contatos", lambda: bancodedados.contar_contatos(usuario()[0])),
+        ("obter_contato", lambda: bancodedados.obter_contato(contato_id())),
+        ("obter_marca_sincronizacao", lambda: bancodedados.obter_marca_sincronizacao(usuario()[0])),
+        ("obter_contatos_desde", lambda: bancodedados.obter_contatos_desde(usuario()[0], estado["marca"])),
+        ("obter_aniversariantes", lambda: bancodedados.obter_aniversariantes(usuario()[0], dias=7)),
+        ("salvar_contato", lambda: bancodedados.salvar_contato(*campos_contato(), usuario()[0])),
+        ("salvar_contatos_lote", lambda: bancodedados.salvar_contatos_lote(
+            usuario()[0], [campos_contato() for _ in range(100)])),
+        ("atualizar_contato", lambda: bancodedados.atualizar_contato(contato_id(), *campos_contato())),
+        ("atualizar_contatos", lambda: bancodedados.atualizar_contatos(
+            [contato_id() for _ in range(50)], {"notas": aleatorio.choice(gerador_dados.NOTAS) or None})),
+        # Exclusões por último: são lógicas, a tabela não encolhe
+        ("deletar_contato", lambda: bancodedados.deletar_contato(contato_id())),
+        ("deletar_contatos", lambda: bancodedados.deletar_contatos([contato_id() for _ in range(50)])),
+    )
+
+
+def _contar_linhas(bancodedados):
+    conexao = bancodedados.conectar()
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*), MAX(id) FROM contatos")
+        total, maximo = cursor.fetchone()
+        return total, maximo or 0
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_DIRETORIO, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def salvar_resultados(execucao):
+    os.makedirs(RESULTADOS, exist_ok=True)
+    nome = time.strftime("%Y%m%d-%H%M%S") + f"-{execucao['backend']}.json"
+    caminho = os.path.join(RESULTADOS, nome)
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(execucao, arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def execucao_anterior(backend, atual):
+    arquivos = sorted(glob.glob(os.path.join(RESULTADOS, f"*-{backend}.json")))
+    anteriores = [caminho for caminho in arquivos if os.path.abspath(caminho) != os.path.abspath(atual)]
+    return anteriores[-1] if anteriores else None
+
+
+def comparar(base, atual, limiar):
+    # Linhas (tamanho, operação) cujo p50 ou p99 piorou mais que limiar (fração)
+    referencia = {(item["tamanho"], item["operacao"]): item for item in base["resultados"]}
+    regressoes = []
+    for item in atual["resultados"]:
+        anterior = referencia.get((item["tamanho"], item["operacao"]))
+        if anterior is None:
+            continue
+        for chave in ("p50_ms", "p99_ms"):
+            if anterior[chave] > 0 and item[chave] > anterior[chave] * (1 + limiar):
+                regressoes.append((item["tamanho"], item["operacao"], chave, anterior[chave], item[chave]))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das operações de bancodedados.")
+    parser.add_argument("--tamanhos", default="1000,100000,1000000", help="linhas na tabela de contatos")
+    parser.add_argument("--contatos-por-usuario", type=int, default=1000)
+    parser.add_argument("--execucoes", type=int, default=200, help="chamadas medidas por operação")
+    parser.add_argument("--operacoes", default="", help="só estas operações (separadas por vírgula)")
+    parser.add_argument("--com-cache", action="store_true", help="mede com o cache de contatos ligado")
+    parser.add_argument("--base", help="JSON de resultados para comparar (padrão: execução anterior)")
+    parser.add_argument("--limiar", type=float, default=0.2, help="piora relativa tratada como regressão")
+    args = parser.parse_args(argv)
+
+    # Precisa vir antes de importar bancodedados, que lê o config na importação
+    if not args.com_cache:
+        os.environ["AGENDA_CACHE_TTL"] = "0"
+    banco_temporario = None
+    if os.environ.get("AGENDA_DB_BACKEND") == "sqlite" and not os.environ.get("AGENDA_SQLITE_CAMINHO"):
+        banco_temporario = os.path.join(tempfile.gettempdir(), "agenda_benchmark.db")
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(banco_temporario + sufixo):
+                os.remove(banco_temporario + sufixo)
+        os.environ["AGENDA_SQLITE_CAMINHO"] = banco_temporario
+
+    import bancodedados
+    import gerador_dados
+    from migracoes import aplicar_migracoes
+
+    conexao = bancodedados.conectar()
+    if conexao is None:
+        return 1
+    conexao.close()
+    aplicar_migracoes()
+    if _contar_linhas(bancodedados)[0]:
+        print("O banco já tem contatos: use um banco vazio, só para o benchmark.")
+        return 1
+
+    tamanhos = sorted(int(tamanho) for tamanho in args.tamanhos.split(","))
+    filtro = {nome.strip() for nome in args.operacoes.split(",") if nome.strip()}
+    execucao = {
+        "momento": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _commit_atual(),
+        "backend": bancodedados.backend.nome,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "execucoes": args.execucoes,
+        "contatos_por_usuario": args.contatos_por_usuario,
+        "cache": args.com_cache,
+        "resultados": [],
+    }
+    estado = {"usuarios": [], "novos_usuarios": 0}
+    for tamanho in tamanhos:
+        faltam = max(0, tamanho - _contar_linhas(bancodedados)[0])
+        usuarios = -(-faltam // args.contatos_por_usuario)
+        if usuarios:
+            print(f"Populando até {tamanho} contatos ({usuarios} usuários)...", flush=True)
+            inicio = len(estado["usuarios"])
+            ids = gerador_dados.popular(usuarios, args.contatos_por_usuario, inicio=inicio)
+            emails = [email for _, email, _, _ in gerador_dados.gerar_usuarios(usuarios, 0, inicio)]
+            estado["usuarios"].extend(zip(ids, emails))
+        linhas, estado["max_contato_id"] = _contar_linhas(bancodedados)
+        estado["marca"] = bancodedados.obter_marca_sincronizacao(estado["usuarios"][0][0])
+
+        print(f"\n{linhas} contatos")
+        print(f"  {'operação':<28} {'ops/s':>10} {'média':>9} {'p50':>9} {'p99':>9} {'máx':>9}  (ms)")
+        for nome, funcao in operacoes(bancodedados, gerador_dados, estado):
+            if filtro and nome not in filtro:
+                continue
+            resultado = medir(funcao, args.execucoes)
+            execucao["resultados"].append(dict(resultado, tamanho=tamanho, linhas=linhas, operacao=nome))
+            print(f"  {nome:<28} {resultado['ops_s']:>10.1f} {resultado['media_ms']:>9.3f} "
+                  f"{resultado['p50_ms']:>9.3f} {resultado['p99_ms']:>9.3f} {resultado['max_ms']:>9.3f}", flush=True)
+
+    caminho = salvar_resultados(execucao)
+    print(f"\nResultados gravados em {caminho}")
+
+    base = args.base or execucao_anterior(execucao["backend"], caminho)
+    if base:
+        with open(base, encoding="utf-8") as arquivo:
+            regressoes = comparar(json.load(arquivo), execucao, args.limiar)
+        print(f"Comparado com {base}: {len(regressoes)} regressões acima de {args.limiar:.0%}")
+        for tamanho, nome, chave, antes, depois in regressoes:
+            print(f"  {tamanho:>9} {nome:<28} {chave} {antes:.3f} -> {depois:.3f} ms")
+
+    if banco_temporario:
+        bancodedados.obter_pool().fechar_todas()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(banco_temporario + sufixo):
+                os.remove(banco_temporario + sufixo)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+# Compara conexões por segundo abrindo uma sessão nova a cada operação
+# (comportamento antigo de conectar()) contra o pool de conexões.
+#
+# Uso, a partir da raiz do projeto, com um MySQL local configurado em config.py:
+#     python -m benchmarks.bench_conexoes --iteracoes 2000 --threads 4
+import argparse
+import threading
+import time
+
+import bancodedados
+from pool import PoolConexoes
+
+
+def _consulta(conexao):
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def sem_pool(iteracoes):
+    for _ in range(iteracoes):
+        conexao = bancodedados.abrir_conexao()
+        try:
+            _consulta(conexao)
+        finally:
+            conexao.close()
+
+
+def com_pool(pool, iteracoes):
+    for _ in range(iteracoes):
+        conexao = pool.obter()
+        try:
+            _consulta(conexao)
+        finally:
+            conexao.close()
+
+
+def medir(nome, alvo, iteracoes, threads):
+    por_thread = max(1, iteracoes // threads)
+    workers = [threading.Thread(target=alvo, args=(por_thread,)) for _ in range(threads)]
+    inicio = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duracao = time.perf_counter() - inicio
+    total = por_thread * threads
+    print(f"{nome:<10} {total:>8} operações em {duracao:8.3f}s  ->  {total / duracao:10.1f} conexões/s")
+    return total / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conexões com e sem pool.")
+    parser.add_argument("--iteracoes", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    pool = PoolConexoes(bancodedados.abrir_conexao, tamanho=args.threads)
+    try:
+        direto = medir("sem pool", sem_pool, args.iteracoes, args.threads)
+        pool_ = medir("com pool", lambda n: com_pool(pool, n), args.iteracoes, args.threads)
+    finally:
+        pool.fechar_todas()
+    print(f"Ganho: {pool_ / direto:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
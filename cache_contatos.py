@@ -0,0 +1,272 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+
+from normalizacao import chave_nome
+
+_AUSENTE = object()
+
+
+def chave_ordenacao(nome, contato_id):
+    # Mesma ordem do ORDER BY nome_ordenacao, id do banco: sem diferenciar maiúsculas e
+    # acentos, nomes nulos (chave "") primeiro
+    return (chave_nome(nome), contato_id)
+
+
+class _EntradaUsuario(object):
+    def __init__(self):
+        self.contatos = None  # id -> contato; None enquanto a lista não estiver em cache
+        self.contatos_em = 0.0
+        self.marca = None  # maior atualizado_em já refletido na lista (veja obter_contatos_desde)
+        self.grande = False  # mais contatos do que o cache guarda por usuário
+        self.ordenados = None  # lista ordenada e suas chaves, refeitas só depois de alterações
+        self.chaves = None
+        self.foto_hash = _AUSENTE
+        self.foto_em = 0.0
+
+
+class CacheUsuarios(object):
+    # Contatos e referência da foto de cada usuário, na memória do processo.
+    # As gravações feitas por este processo atualizam as entradas no lugar; o TTL
+    # cobre alterações feitas por outros clientes. Descarte LRU por usuário.
+    def __init__(self, capacidade=32, ttl=300.0, max_contatos=5000, bytes_imagens=8 * 1024 * 1024):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.max_contatos = max_contatos
+        self.bytes_imagens = bytes_imagens
+        self._lock = threading.RLock()
+        self._usuarios = OrderedDict()
+        self._dono = {}  # contato_id -> usuario_id, para alterações que só conhecem o contato
+        # Imagens são endereçadas pelo conteúdo (hash): nunca ficam velhas, só saem por espaço
+        self._imagens = OrderedDict()
+        self._bytes_em_uso = 0
+        self._contadores = {"acertos": 0, "falhas": 0, "descartes": 0}
+
+    @property
+    def ativo(self):
+        return self.capacidade > 0 and self.ttl > 0
+
+    def _contar(self, nome):
+        self._contadores[nome] += 1
+
+    def _valido(self, momento):
+        return time.monotonic() - momento < self.ttl
+
+    def _entrada(self, usuario_id, criar=False):
+        entrada = self._usuarios.get(usuario_id)
+        if entrada is not None:
+            self._usuarios.move_to_end(usuario_id)
+        elif criar and self.ativo:
+            entrada = self._usuarios[usuario_id] = _EntradaUsuario()
+            while len(self._usuarios) > self.capacidade:
+                _, antiga = self._usuarios.popitem(last=False)
+                self._esquecer_contatos(antiga)
+                self._contar("descartes")
+        return entrada
+
+    def _esquecer_contatos(self, entrada):
+        for contato_id in entrada.contatos or ():
+            self._dono.pop(contato_id, None)
+        entrada.contatos = None
+        entrada.ordenados = entrada.chaves = None
+
+    def _contatos_validos(self, usuario_id):
+        entrada = self._entrada(usuario_id)
+        if entrada is None or entrada.contatos is None:
+            return None
+        if not self._valido(entrada.contatos_em):
+            self._esquecer_contatos(entrada)
+            entrada.grande = False
+            return None
+        return entrada
+
+    def _ordenar(self, entrada):
+        if entrada.ordenados is None:
+            entrada.ordenados = sorted(entrada.contatos.values(),
+                                       key=lambda contato: chave_ordenacao(contato["nome"], contato["id"]))
+            entrada.chaves = [chave_ordenacao(contato["nome"], contato["id"]) for contato in entrada.ordenados]
+        return entrada.ordenados
+
+    # Lista de contatos
+
+    def contatos(self, usuario_id):
+        # Cópias dos contatos em ordem de nome, ou None se não estiverem em cache
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            if entrada is None:
+                self._contar("falhas")
+                return None
+            self._contar("acertos")
+            return [dict(contato) for contato in self._ordenar(entrada)]
+
+    def pagina(self, usuario_id, limite, apos=None):
+        # Mesmo contrato de obter_contatos_pagina, ou None se a lista não estiver em cache
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            if entrada is None:
+                self._contar("falhas")
+                return None
+            self._contar("acertos")
+            ordenados = self._ordenar(entrada)
+            inicio = 0 if apos is None else bisect_right(entrada.chaves, chave_ordenacao(*apos))
+            contatos = [dict(contato) for contato in ordenados[inicio:inicio + limite]]
+            proximo = None
+            if inicio + limite < len(ordenados):
+                proximo = (contatos[-1]["nome"], contatos[-1]["id"])
+            return contatos, proximo
+
+    def total(self, usuario_id):
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            if entrada is None:
+                return None
+            return len(entrada.contatos)
+
+    def contato(self, contato_id):
+        with self._lock:
+            usuario_id = self._dono.get(contato_id)
+            entrada = self._contatos_validos(usuario_id) if usuario_id is not None else None
+            if entrada is None or contato_id not in entrada.contatos:
+                self._contar("falhas")
+                return None
+            self._contar("acertos")
+            return dict(entrada.contatos[contato_id])
+
+    def muito_grande(self, usuario_id):
+        # True se a última carga mostrou que a lista não cabe no cache (vale pelo TTL)
+        with self._lock:
+            entrada = self._entrada(usuario_id)
+            return entrada is not None and entrada.grande and self._valido(entrada.contatos_em)
+
+    def marca(self, usuario_id):
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            return entrada.marca if entrada is not None else None
+
+    def guardar_contatos(self, usuario_id, contatos, marca=None):
+        with self._lock:
+            entrada = self._entrada(usuario_id, criar=True)
+            if entrada is None:
+                return
+            self._esquecer_contatos(entrada)
+            entrada.contatos_em = time.monotonic()
+            entrada.marca = marca
+            entrada.grande = len(contatos) > self.max_contatos
+            if entrada.grande:
+                return
+            entrada.contatos = {}
+            for contato in contatos:
+                entrada.contatos[contato["id"]] = dict(contato)
+                self._dono[contato["id"]] = usuario_id
+
+    def inserir_contato(self, usuario_id, contato):
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            if entrada is None:
+                return
+            if len(entrada.contatos) >= self.max_contatos:
+                self._esquecer_contatos(entrada)
+                return
+            entrada.contatos[contato["id"]] = dict(contato)
+            entrada.ordenados = entrada.chaves = None
+            self._dono[contato["id"]] = usuario_id
+
+    def atualizar_contato(self, contato_id, campos):
+        with self._lock:
+            usuario_id = self._dono.get(contato_id)
+            entrada = self._contatos_validos(usuario_id) if usuario_id is not None else None
+            if entrada is None or contato_id not in entrada.contatos:
+                return
+            entrada.contatos[contato_id].update(campos)
+            entrada.ordenados = entrada.chaves = None
+
+    def aplicar_alteracoes(self, usuario_id, alterados, excluidos, desde, marca):
+        # Delta vindo de obter_contatos_desde. Linhas completas podem ser reaplicadas
+        # sem risco; a marca só avança se o delta começou antes da marca da lista.
+        with self._lock:
+            entrada = self._contatos_validos(usuario_id)
+            if entrada is None:
+                return
+            for contato_id in excluidos:
+                self.remover_contato(contato_id)
+            for contato in alterados:
+                self.inserir_contato(usuario_id, contato)
+            if entrada.contatos is not None and (desde is None or (entrada.marca is not None and desde <= entrada.marca)):
+                entrada.marca = marca
+
+    def remover_contato(self, contato_id):
+        with self._lock:
+            usuario_id = self._dono.pop(contato_id, None)
+            entrada = self._usuarios.get(usuario_id) if usuario_id is not None else None
+            if entrada is not None and entrada.contatos is not None:
+                entrada.contatos.pop(contato_id, None)
+                entrada.ordenados = entrada.chaves = None
+
+    # Foto
+
+    def foto_hash(self, usuario_id):
+        # (True, hash) se a referência estiver em cache; (False, None) caso contrário
+        with self._lock:
+            entrada = self._entrada(usuario_id)
+            if entrada is None or entrada.foto_hash is _AUSENTE or not self._valido(entrada.foto_em):
+                self._contar("falhas")
+                return False, None
+            self._contar("acertos")
+            return True, entrada.foto_hash
+
+    def guardar_foto_hash(self, usuario_id, foto_hash):
+        with self._lock:
+            entrada = self._entrada(usuario_id, criar=True)
+            if entrada is not None:
+                entrada.foto_hash = foto_hash
+                entrada.foto_em = time.monotonic()
+
+    def imagem(self, foto_hash, lado=None):
+        # lado=None é a foto original; senão a miniatura com esse lado
+        with self._lock:
+            dados = self._imagens.get((foto_hash, lado))
+            if dados is None:
+                self._contar("falhas")
+                return None
+            self._imagens.move_to_end((foto_hash, lado))
+            self._contar("acertos")
+            return dados
+
+    def guardar_imagem(self, foto_hash, lado, dados):
+        if not self.ativo or dados is None or len(dados) > self.bytes_imagens:
+            return
+        with self._lock:
+            anterior = self._imagens.pop((foto_hash, lado), None)
+            if anterior is not None:
+                self._bytes_em_uso -= len(anterior)
+            self._imagens[(foto_hash, lado)] = dados
+            self._bytes_em_uso += len(dados)
+            while self._bytes_em_uso > self.bytes_imagens:
+                _, antiga = self._imagens.popitem(last=False)
+                self._bytes_em_uso -= len(antiga)
+                self._contar("descartes")
+
+    # Manutenção
+
+    def invalidar(self, usuario_id=None):
+        with self._lock:
+            if usuario_id is None:
+                self._usuarios.clear()
+                self._dono.clear()
+                self._imagens.clear()
+                self._bytes_em_uso = 0
+                return
+            entrada = self._usuarios.pop(usuario_id, None)
+            if entrada is not None:
+                self._esquecer_contatos(entrada)
+
+    def estatisticas(self):
+        with self._lock:
+            dados = dict(self._contadores)
+            dados["usuarios"] = len(self._usuarios)
+            dados["imagens"] = len(self._imagens)
+            dados["bytes_imagens"] = self._bytes_em_uso
+        total = dados["acertos"] + dados["falhas"]
+        dados["taxa_acerto"] = dados["acertos"] / total if total else 0.0
+        return dados
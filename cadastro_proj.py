@@ -1,9 +1,12 @@
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QPixmap, QIcon
+from PySide6.QtGui import QFont, QPixmap
 from PySide6.QtWidgets import (QApplication, QFrame, QLabel, QLineEdit, QMainWindow, 
                                QPushButton, QWidget, QMessageBox, QFileDialog, QScrollArea, 
                                QVBoxLayout, QHBoxLayout)
-from bancodedados import salvar_usuario
+from bancodedados import salvar_usuario, hash_foto
+from miniaturas import agendar_miniaturas, carregar_previa
+from executor_banco import executar
+import recursos
 
 class Ui_Tela_Cadastro(object):
     def setupUi(self, Tela_Cadastro):
@@ -13,7 +16,7 @@ class Ui_Tela_Cadastro(object):
             Tela_Cadastro.setObjectName("Tela_Cadastro")
         Tela_Cadastro.resize(800, 600)
         Tela_Cadastro.setWindowTitle("Agenda de Contatos")
-        Tela_Cadastro.setWindowIcon(QIcon("agenda.png"))
+        Tela_Cadastro.setWindowIcon(recursos.icone("agenda.png"))
 
         # Widget central com gradiente escuro
         self.centralwidget = QWidget(Tela_Cadastro)
@@ -384,7 +387,7 @@ class Ui_Tela_Cadastro(object):
     def selecionar_foto(self):
         arquivo, _ = QFileDialog.getOpenFileName(self.frame, "Selecionar Foto", "", "Imagens (*.png *.jpg *.jpeg)")
         if arquivo:
-            pixmap = QPixmap(arquivo)
+            pixmap = QPixmap.fromImage(carregar_previa(arquivo, self.label_foto.width() * 2))
             self.label_foto.setPixmap(pixmap)
             with open(arquivo, "rb") as f:
                 self.foto_data = f.read()
@@ -413,11 +416,31 @@ class Ui_Tela_Cadastro(object):
             QMessageBox.warning(None, "Erro", "Preencha todos os campos obrigatórios.")
             self.validar_campos_vazios(nome, email, contato, senha, confirmar_senha)
         else:
-            if salvar_usuario(nome, email, contato, senha, self.foto_data):
-                QMessageBox.information(None, "Sucesso", "Cadastro realizado com sucesso!")
-                self.voltar_para_login(Tela_Cadastro)
-            else:
-                QMessageBox.warning(None, "Erro", "Erro ao cadastrar! Verifique os dados.")
+            foto_data = self.foto_data
+            self.definir_ocupado(Tela_Cadastro, True)
+            executar(salvar_usuario, nome, email, contato, senha, foto_data,
+                     ao_concluir=lambda salvo: self.cadastro_concluido(Tela_Cadastro, salvo, foto_data),
+                     ao_falhar=lambda erro: self.cadastro_concluido(Tela_Cadastro, False, foto_data),
+                     dono=Tela_Cadastro)
+
+    def definir_ocupado(self, Tela_Cadastro, ocupado):
+        self.pushButton_Cadastrar.setEnabled(not ocupado)
+        self.pushButton_Voltar.setEnabled(not ocupado)
+        self.pushButton_Cadastrar.setText("Salvando..." if ocupado else "Cadastrar")
+        if ocupado:
+            Tela_Cadastro.setCursor(Qt.BusyCursor)
+        else:
+            Tela_Cadastro.unsetCursor()
+
+    def cadastro_concluido(self, Tela_Cadastro, salvo, foto_data):
+        self.definir_ocupado(Tela_Cadastro, False)
+        if salvo:
+            if foto_data:
+                agendar_miniaturas(hash_foto(foto_data), foto_data)
+            QMessageBox.information(None, "Sucesso", "Cadastro realizado com sucesso!")
+            self.voltar_para_login(Tela_Cadastro)
+        else:
+            QMessageBox.warning(None, "Erro", "Erro ao cadastrar! Verifique os dados.")
 
     def limpar_bordas(self):
         self.line_nome.setStyleSheet("""
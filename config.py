@@ -0,0 +1,111 @@
+import os
+
+
+def _texto(nome, padrao):
+    return os.environ.get(nome, padrao)
+
+
+def _inteiro(nome, padrao):
+    try:
+        return int(os.environ.get(nome, padrao))
+    except ValueError:
+        return padrao
+
+
+def _decimal(nome, padrao):
+    try:
+        return float(os.environ.get(nome, padrao))
+    except ValueError:
+        return padrao
+
+
+_DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Backend de armazenamento: "mysql" ou "sqlite"
+DB_BACKEND = _texto("AGENDA_DB_BACKEND", "mysql")
+
+# Conexão com o MySQL
+MYSQL_HOST = _texto("AGENDA_MYSQL_HOST", "localhost")
+MYSQL_PORTA = _inteiro("AGENDA_MYSQL_PORTA", 3306)
+MYSQL_USUARIO = _texto("AGENDA_MYSQL_USUARIO", "root")
+MYSQL_SENHA = _texto("AGENDA_MYSQL_SENHA", "")
+MYSQL_BANCO = _texto("AGENDA_MYSQL_BANCO", "agenda")
+
+# Instruções preparadas mantidas em cache por conexão (0 desliga o cache)
+DECLARACOES_POR_CONEXAO = _inteiro("AGENDA_DECLARACOES_POR_CONEXAO", 64)
+
+# Arquivo SQLite (instalações de um único usuário, sem servidor)
+SQLITE_CAMINHO = _texto("AGENDA_SQLITE_CAMINHO", os.path.join(_DIRETORIO, "agenda.db"))
+SQLITE_BUSY_TIMEOUT = _decimal("AGENDA_SQLITE_BUSY_TIMEOUT", 5.0)
+SQLITE_CACHE_KB = _inteiro("AGENDA_SQLITE_CACHE_KB", 20000)
+SQLITE_MMAP_BYTES = _inteiro("AGENDA_SQLITE_MMAP_BYTES", 256 * 1024 * 1024)
+
+# Pool de conexões
+POOL_TAMANHO = _inteiro("AGENDA_POOL_TAMANHO", 5)
+# Segundos aguardando uma conexão livre antes de desistir
+POOL_TIMEOUT = _decimal("AGENDA_POOL_TIMEOUT", 10.0)
+# Conexões ociosas há mais tempo que isso são fechadas
+POOL_OCIOSIDADE_MAXIMA = _decimal("AGENDA_POOL_OCIOSIDADE_MAXIMA", 300.0)
+# Conexões ociosas há mais tempo que isso são verificadas (ping) antes do empréstimo
+POOL_VERIFICAR_APOS = _decimal("AGENDA_POOL_VERIFICAR_APOS", 5.0)
+
+# Threads que executam as operações de banco fora da thread da interface
+EXECUTOR_THREADS = _inteiro("AGENDA_EXECUTOR_THREADS", POOL_TAMANHO)
+
+# Cache de contatos e fotos por usuário (0 em qualquer um dos dois primeiros desliga o cache)
+CACHE_USUARIOS = _inteiro("AGENDA_CACHE_USUARIOS", 32)
+# Segundos até recarregar do banco, para enxergar alterações feitas por outros clientes
+CACHE_TTL = _decimal("AGENDA_CACHE_TTL", 300.0)
+# Usuários com mais contatos que isso são sempre paginados direto no banco
+CACHE_CONTATOS_POR_USUARIO = _inteiro("AGENDA_CACHE_CONTATOS_POR_USUARIO", 5000)
+CACHE_IMAGENS_BYTES = _inteiro("AGENDA_CACHE_IMAGENS_BYTES", 8 * 1024 * 1024)
+
+# Tela de contatos: segundos entre as buscas de alterações feitas por outros clientes (0 desliga)
+SINCRONIZACAO_INTERVALO = _decimal("AGENDA_SINCRONIZACAO_INTERVALO", 15.0)
+# Segundos que cada busca volta antes da última marca, para não perder transações lentas
+SINCRONIZACAO_MARGEM = _decimal("AGENDA_SINCRONIZACAO_MARGEM", 2.0)
+
+# Métricas de latência do acesso ao banco (veja metricas.py); 0 desliga
+METRICAS = _inteiro("AGENDA_METRICAS", 1) != 0
+# Instruções que levam mais que isso (ms) vão para o log de consultas lentas; -1 desliga o log
+METRICAS_CONSULTA_LENTA_MS = _decimal("AGENDA_METRICAS_CONSULTA_LENTA_MS", 200.0)
+METRICAS_LENTAS_GUARDADAS = _inteiro("AGENDA_METRICAS_LENTAS_GUARDADAS", 100)
+# Se definido, as métricas são gravadas neste JSON quando o processo termina
+METRICAS_ARQUIVO = _texto("AGENDA_METRICAS_ARQUIVO", "")
+
+# Log (veja registro.py): nível padrão, níveis por módulo ("bancodedados=DEBUG,contatos=WARNING"),
+# uma linha JSON por registro em vez de texto e arquivo de saída (vazio = stderr)
+LOG_NIVEL = _texto("AGENDA_LOG_NIVEL", "INFO")
+LOG_NIVEIS = _texto("AGENDA_LOG_NIVEIS", "")
+LOG_JSON = _inteiro("AGENDA_LOG_JSON", 0) != 0
+LOG_ARQUIVO = _texto("AGENDA_LOG_ARQUIVO", "")
+
+# Normalização de telefones (veja normalizacao.py): código do país assumido quando o
+# número não traz um, e DDD assumido para números locais (vazio = não normaliza locais)
+TELEFONE_DDI = _texto("AGENDA_TELEFONE_DDI", "55")
+TELEFONE_DDD = _texto("AGENDA_TELEFONE_DDD", "")
+
+# Importação em massa: contatos gravados por transação
+IMPORTACAO_LOTE = _inteiro("AGENDA_IMPORTACAO_LOTE", 1000)
+
+# Exportação: linhas lidas do banco por vez (fetchmany)
+EXPORTACAO_LOTE = _inteiro("AGENDA_EXPORTACAO_LOTE", 1000)
+
+# Tela de contatos: quantos contatos buscar por vez ao rolar a lista
+CONTATOS_POR_PAGINA = _inteiro("AGENDA_CONTATOS_POR_PAGINA", 50)
+# Máximo de resultados da busca (os mais relevantes) e a ordem em que são exibidos:
+# "relevancia" ou "nome"
+LIMITE_BUSCA = _inteiro("AGENDA_LIMITE_BUSCA", 200)
+BUSCA_ORDEM = _texto("AGENDA_BUSCA_ORDEM", "relevancia")
+# Pausa na digitação (ms) antes de a busca da tela de contatos rodar
+BUSCA_ATRASO_MS = _inteiro("AGENDA_BUSCA_ATRASO_MS", 150)
+# Busca tolerante a erros de digitação: similaridade (trigramas em comum, de 0 a 1) mínima
+# entre uma palavra do termo e uma do contato
+BUSCA_SIMILARIDADE_MINIMA = _decimal("AGENDA_BUSCA_SIMILARIDADE_MINIMA", 0.5)
+
+# Miniaturas das fotos de usuário (lado em px; 200 atende o label de 100px em telas 2x)
+MINIATURA_TAMANHOS = tuple(int(lado) for lado in _texto("AGENDA_MINIATURA_TAMANHOS", "100,200").split(","))
+MINIATURA_QUALIDADE = _inteiro("AGENDA_MINIATURA_QUALIDADE", 85)
+
+# Imagens e ícones da interface (veja recursos.py): bytes decodificados mantidos em memória
+RECURSOS_CACHE_BYTES = _inteiro("AGENDA_RECURSOS_CACHE_BYTES", 4 * 1024 * 1024)
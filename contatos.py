@@ -1,24 +1,72 @@
+import os
 import sys
-from PySide6.QtCore import QMetaObject, Qt
-from PySide6.QtGui import QPixmap, QFont, QIcon
-from PySide6.QtWidgets import (QFrame, QLabel, QLineEdit, QMainWindow, QVBoxLayout, 
-                               QHBoxLayout, QWidget, QScrollArea, QMessageBox, QPushButton, 
-                               QFileDialog, QApplication)
+from PySide6.QtCore import QMetaObject, Qt, QTimer
+from PySide6.QtGui import QPixmap, QFont
+from PySide6.QtWidgets import (QLabel, QLineEdit, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
+                               QListView, QMessageBox, QPushButton, QFileDialog, QApplication, QInputDialog)
 from add_cntt import Ui_tela_add_contato
 from editarcntt import Ui_Form as Ui_EditarContato
-from bancodedados import obter_contatos, obter_foto_usuario, atualizar_foto_usuario
-from datetime import datetime
+import config
+from bancodedados import (obter_contatos_pagina, contar_contatos, obter_contato,
+                          obter_aniversariantes, obter_ref_foto_usuario, obter_foto, obter_miniatura,
+                          atualizar_foto_usuario, hash_foto, obter_marca_sincronizacao, obter_contatos_desde,
+                          deletar_contatos, atualizar_contatos)
+from miniaturas import agendar_miniaturas, carregar_previa, tamanho_para_exibir
+from importador import importar_contatos
+from exportador import exportar_contatos
+from duplicados import MOTIVOS, encontrar_duplicados, mesclar_grupos
+from executor_banco import executar
+from indice_busca import carregar_indice
+from lista_contatos import DelegadoContato, FiltroContatos, ModeloContatos
+from registro import obter_logger
+import recursos
+
+log = obter_logger("contatos")
+
+# A lista exibe nome e telefone; os demais campos entram no índice da busca (contato_gravado
+# e a sincronização atualizam o índice com eles)
+COLUNAS_LISTA = ("id", "nome", "telefone", "email", "perfil_rede_social", "notas")
+
+# Filtros do diálogo de exportação: (formato, versão do vCard, extensão padrão)
+FORMATOS_EXPORTACAO = {
+    "CSV (*.csv)": ("csv", "3.0", ".csv"),
+    "vCard 3.0 (*.vcf)": ("vcard", "3.0", ".vcf"),
+    "vCard 4.0 (*.vcf)": ("vcard", "4.0", ".vcf"),
+    "JSON Lines (*.jsonl)": ("jsonl", "3.0", ".jsonl"),
+}
+
+# Campos oferecidos na edição em lote: (rótulo, coluna)
+CAMPOS_EDICAO_LOTE = (
+    ("Email", "email"),
+    ("Telefone", "telefone"),
+    ("Data de nascimento (AAAA-MM-DD)", "data_nascimento"),
+    ("Rede social", "perfil_rede_social"),
+    ("Notas", "notas"),
+)
 
 class Ui_Form(object):
     def __init__(self, usuario_id):
         self.usuario_id = usuario_id
         self.mensagem_aniversario_exibida = False  # Variável para controlar se a mensagem já foi exibida no dia
+        self.foto_hash = None  # Hash da foto exibida; a imagem só é baixada de novo se mudar
+        self.geracao_lista = 0  # Descarta resultados de carregamentos/buscas já substituídos
+        self.operacoes_pendentes = 0
+        self.carregando_pagina = False
+        self.verificando_aniversarios = False
+        self.marca_sincronizacao = None  # atualizado_em mais recente já refletido na lista e no índice
+        self.marca_lida = False
+        self.sincronizavel = False
+        self.sincronizando = False
+        self.sincronizar_de_novo = False
+        self.total_contatos = 0
+        self.indice_busca = None  # IndiceBusca com todos os contatos do usuário, quando pronto
+        self.carregando_indice = False
 
     def setupUi(self, Form):
         Form.setObjectName("Form")
         Form.resize(988, 579)
         Form.setWindowTitle("Agenda de Contatos")
-        Form.setWindowIcon(QIcon("agenda.png"))
+        Form.setWindowIcon(recursos.icone("agenda.png"))
         self.centralwidget = QWidget(Form)
         self.centralwidget.setStyleSheet("""
             background: qlineargradient(
@@ -45,14 +93,7 @@ class Ui_Form(object):
         """)
         self.label_foto.setAlignment(Qt.AlignCenter)
         self.label_foto.setScaledContents(True)
-
-        foto_data = obter_foto_usuario(self.usuario_id)
-        if foto_data:
-            pixmap = QPixmap()
-            pixmap.loadFromData(foto_data)
-            self.label_foto.setPixmap(pixmap)
-        else:
-            self.label_foto.setText("Sem Foto")
+        self.label_foto.setText("Sem Foto")
 
         self.foto_layout.addWidget(self.label_foto)
 
@@ -85,22 +126,42 @@ class Ui_Form(object):
         self.btn_trocar_foto.clicked.connect(self.trocar_foto)
         self.foto_layout.addWidget(self.btn_trocar_foto)
 
+        self.btn_importar = QPushButton("Importar")
+        self.btn_importar.setFixedSize(100, 30)
+        self.btn_importar.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        self.btn_importar.setStyleSheet(self.btn_trocar_foto.styleSheet())
+        self.btn_importar.setCursor(Qt.PointingHandCursor)
+        self.btn_importar.clicked.connect(self.importar_contatos)
+        self.foto_layout.addWidget(self.btn_importar)
+
+        self.btn_exportar = QPushButton("Exportar")
+        self.btn_exportar.setFixedSize(100, 30)
+        self.btn_exportar.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        self.btn_exportar.setStyleSheet(self.btn_trocar_foto.styleSheet())
+        self.btn_exportar.setCursor(Qt.PointingHandCursor)
+        self.btn_exportar.clicked.connect(self.exportar_contatos)
+        self.foto_layout.addWidget(self.btn_exportar)
+
+        self.btn_duplicados = QPushButton("Duplicados")
+        self.btn_duplicados.setFixedSize(100, 30)
+        self.btn_duplicados.setFont(QFont("Segoe UI", 10, QFont.Bold))
+        self.btn_duplicados.setStyleSheet(self.btn_trocar_foto.styleSheet())
+        self.btn_duplicados.setCursor(Qt.PointingHandCursor)
+        self.btn_duplicados.clicked.connect(self.procurar_duplicados)
+        self.foto_layout.addWidget(self.btn_duplicados)
+
         self.main_layout.addLayout(self.foto_layout)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("""
-            QScrollArea {
+        self.painel_lista = QWidget()
+        self.painel_lista.setObjectName("painel_lista")
+        self.painel_lista.setStyleSheet("""
+            QWidget#painel_lista {
                 background-color: rgb(40, 40, 50);
                 border: 1px solid rgb(80, 80, 100);
                 border-radius: 5px;
             }
         """)
-
-        self.scroll_widget = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_widget)
-        self.scroll_layout.setAlignment(Qt.AlignTop)
-        self.scroll_area.setWidget(self.scroll_widget)
+        self.lista_layout = QVBoxLayout(self.painel_lista)
 
         self.label_Cntt = QLabel("Contatos")
         font_title = QFont("Segoe UI", 14, QFont.Bold)
@@ -110,7 +171,7 @@ class Ui_Form(object):
             background-color: transparent;
             padding: 5px;
         """)
-        self.scroll_layout.addWidget(self.label_Cntt)
+        self.lista_layout.addWidget(self.label_Cntt)
 
         self.line_buscar_cntt = QLineEdit()
         self.line_buscar_cntt.setPlaceholderText("Buscar Contatos...")
@@ -128,42 +189,221 @@ class Ui_Form(object):
                 border: 1px solid rgb(100, 150, 255);
             }
         """)
-        self.scroll_layout.addWidget(self.line_buscar_cntt)
+        self.lista_layout.addWidget(self.line_buscar_cntt)
 
         self.label_add = QLabel()
-        self.label_add.setPixmap(QPixmap("xx.png"))
+        self.label_add.setPixmap(recursos.pixmap("xx.png", 32))
         self.label_add.setScaledContents(True)
         self.label_add.setFixedSize(32, 32)
         self.label_add.setStyleSheet("""
             background-color: transparent;
         """)
         self.label_add.mousePressEvent = self.adicionar_contato
-        self.scroll_layout.addWidget(self.label_add)
+        self.lista_layout.addWidget(self.label_add)
+
+        # Ações sobre os contatos marcados na lista
+        self.selecao_layout = QHBoxLayout()
+        self.selecao_layout.setAlignment(Qt.AlignLeft)
+        self.btn_excluir_selecionados = QPushButton("Deletar (0)")
+        self.btn_editar_selecionados = QPushButton("Editar (0)")
+        for botao in (self.btn_excluir_selecionados, self.btn_editar_selecionados):
+            botao.setFixedSize(120, 30)
+            botao.setFont(QFont("Segoe UI", 10, QFont.Bold))
+            botao.setStyleSheet(self.btn_trocar_foto.styleSheet())
+            botao.setCursor(Qt.PointingHandCursor)
+            botao.setEnabled(False)
+            self.selecao_layout.addWidget(botao)
+        self.btn_excluir_selecionados.clicked.connect(self.deletar_selecionados)
+        self.btn_editar_selecionados.clicked.connect(self.editar_selecionados)
+        self.lista_layout.addLayout(self.selecao_layout)
+
+        # Só as linhas visíveis são desenhadas, pelo delegado; o modelo guarda os contatos
+        self.modelo_contatos = ModeloContatos(self.painel_lista)
+        self.modelo_contatos.marcacao_alterada.connect(self.atualizar_botoes_selecao)
+        self.delegado_contatos = DelegadoContato(self.painel_lista)
+        self.delegado_contatos.editar_clicado.connect(self.editar_contato)
+        self.lista_contatos = QListView()
+        self.filtro_contatos = FiltroContatos(self.painel_lista)
+        self.filtro_contatos.definir_modelo(self.modelo_contatos)
+        self.lista_contatos.setModel(self.filtro_contatos)
+        self.lista_contatos.setItemDelegate(self.delegado_contatos)
+        self.lista_contatos.setUniformItemSizes(True)
+        self.lista_contatos.setSelectionMode(QListView.NoSelection)
+        self.lista_contatos.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.lista_contatos.setMouseTracking(True)
+        self.lista_contatos.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.lista_contatos.setFont(QFont("Segoe UI", 12))
+        self.lista_contatos.setStyleSheet("""
+            QListView {
+                background-color: transparent;
+                border: none;
+            }
+        """)
+        self.lista_contatos.verticalScrollBar().valueChanged.connect(self.verificar_fim_da_lista)
+        self.lista_layout.addWidget(self.lista_contatos)
+
+        self.main_layout.addWidget(self.painel_lista)
 
-        self.main_layout.addWidget(self.scroll_area)
+        self.proxima_pagina = None
+        self.lista_completa = False
+        self.selecionados = self.modelo_contatos.marcados  # ids marcados; sobrevive às trocas da lista
 
-        self.contatos = []
-        self.labels_contatos = []
-        self.labels_editar = []
-        self.lines = []
+        # A busca roda quando a digitação pausa, não a cada tecla
+        self.timer_busca = QTimer(self.centralwidget)
+        self.timer_busca.setSingleShot(True)
+        self.timer_busca.setInterval(config.BUSCA_ATRASO_MS)
+        self.timer_busca.timeout.connect(self.filtrar_contatos)
+        self.line_buscar_cntt.textChanged.connect(self.timer_busca.start)
+
+        # Busca periodicamente só o que outros clientes alteraram desde a última leitura
+        self.timer_sincronizacao = QTimer(self.centralwidget)
+        self.timer_sincronizacao.timeout.connect(self.sincronizar)
+        if config.SINCRONIZACAO_INTERVALO > 0:
+            self.timer_sincronizacao.start(int(config.SINCRONIZACAO_INTERVALO * 1000))
 
-        self.line_buscar_cntt.textChanged.connect(self.filtrar_contatos)
         self.carregar_contatos()
         QMetaObject.connectSlotsByName(Form)
 
     def trocar_foto(self):
         arquivo, _ = QFileDialog.getOpenFileName(self.centralwidget, "Selecionar Foto", "", "Imagens (*.png *.jpg *.jpeg)")
         if arquivo:
-            pixmap = QPixmap(arquivo)
-            self.label_foto.setPixmap(pixmap)
+            self.label_foto.setPixmap(QPixmap.fromImage(carregar_previa(arquivo, self.label_foto.width() * 2)))
 
             with open(arquivo, "rb") as f:
                 foto_data = f.read()
 
-            if atualizar_foto_usuario(self.usuario_id, foto_data):
-                QMessageBox.information(None, "Sucesso", "Foto atualizada com sucesso!")
-            else:
-                QMessageBox.warning(None, "Erro", "Erro ao atualizar a foto. Tente novamente.")
+            self.btn_trocar_foto.setEnabled(False)
+            self.executar_no_banco(atualizar_foto_usuario, self.usuario_id, foto_data,
+                                   ao_concluir=lambda atualizada: self.foto_trocada(atualizada, foto_data),
+                                   ao_falhar=lambda erro: self.foto_trocada(False, foto_data))
+
+    def foto_trocada(self, atualizada, foto_data):
+        self.btn_trocar_foto.setEnabled(True)
+        if atualizada:
+            self.foto_hash = hash_foto(foto_data)
+            agendar_miniaturas(self.foto_hash, foto_data, self.miniatura_pronta)
+            QMessageBox.information(None, "Sucesso", "Foto atualizada com sucesso!")
+        else:
+            QMessageBox.warning(None, "Erro", "Erro ao atualizar a foto. Tente novamente.")
+
+    def importar_contatos(self):
+        arquivo, _ = QFileDialog.getOpenFileName(self.centralwidget, "Importar Contatos", "", "Contatos (*.csv *.vcf *.vcard)")
+        if not arquivo:
+            return
+
+        self.btn_importar.setEnabled(False)
+        self.btn_importar.setText("Importando...")
+        self.executar_no_banco(importar_contatos, arquivo, self.usuario_id,
+                               ao_concluir=self.importacao_concluida, ao_falhar=self.importacao_falhou)
+
+    def importacao_concluida(self, resultado):
+        self.btn_importar.setEnabled(True)
+        self.btn_importar.setText("Importar")
+        QMessageBox.information(None, "Importação concluída", str(resultado))
+        self.carregar_contatos()
+
+    def importacao_falhou(self, erro):
+        self.btn_importar.setEnabled(True)
+        self.btn_importar.setText("Importar")
+        QMessageBox.warning(None, "Erro", f"Erro ao importar contatos: {erro}")
+
+    def exportar_contatos(self):
+        arquivo, filtro = QFileDialog.getSaveFileName(self.centralwidget, "Exportar Contatos", "contatos.csv",
+                                                      ";;".join(FORMATOS_EXPORTACAO))
+        if not arquivo:
+            return
+
+        formato, versao, extensao = FORMATOS_EXPORTACAO.get(filtro, ("csv", "3.0", ".csv"))
+        if not os.path.splitext(arquivo)[1]:
+            arquivo += extensao
+        self.btn_exportar.setEnabled(False)
+        self.btn_exportar.setText("Exportando...")
+        # Os contatos são lidos e gravados em lotes numa thread do executor: a janela
+        # continua respondendo e a memória não cresce com o tamanho da agenda
+        self.executar_no_banco(exportar_contatos, arquivo, self.usuario_id, formato, versao,
+                               ao_concluir=self.exportacao_concluida, ao_falhar=self.exportacao_falhou)
+
+    def exportacao_concluida(self, resultado):
+        self.btn_exportar.setEnabled(True)
+        self.btn_exportar.setText("Exportar")
+        QMessageBox.information(None, "Exportação concluída", str(resultado))
+
+    def exportacao_falhou(self, erro):
+        self.btn_exportar.setEnabled(True)
+        self.btn_exportar.setText("Exportar")
+        log.error("Erro ao exportar contatos: %s", erro)
+        QMessageBox.warning(None, "Erro", f"Erro ao exportar contatos: {erro}")
+
+    def procurar_duplicados(self):
+        self.btn_duplicados.setEnabled(False)
+        self.btn_duplicados.setText("Procurando...")
+        self.executar_no_banco(encontrar_duplicados, self.usuario_id,
+                               ao_concluir=self.duplicados_encontrados, ao_falhar=self.duplicados_falhou)
+
+    def duplicados_encontrados(self, grupos):
+        self.btn_duplicados.setEnabled(True)
+        self.btn_duplicados.setText("Duplicados")
+        if not grupos:
+            QMessageBox.information(None, "Duplicados", "Nenhum contato duplicado encontrado.")
+            return
+
+        # Uma sugestão por vez; os grupos aceitos são mesclados juntos no fim
+        aceitos = []
+        for indice, grupo in enumerate(grupos, 1):
+            caixa = QMessageBox(self.centralwidget)
+            caixa.setWindowTitle(f"Duplicados ({indice} de {len(grupos)})")
+            motivos = ", ".join(MOTIVOS[motivo] for motivo in grupo.motivos)
+            caixa.setText(f"Estes contatos parecem ser a mesma pessoa ({motivos}):\n\n{grupo.descricao()}\n\n"
+                          "Mesclar mantém o contato marcado, completa os campos vazios com os dos outros "
+                          "e exclui os demais.")
+            botao_mesclar = caixa.addButton("Mesclar", QMessageBox.AcceptRole)
+            caixa.addButton("Pular", QMessageBox.RejectRole)
+            botao_parar = caixa.addButton("Parar", QMessageBox.DestructiveRole)
+            caixa.exec()
+            if caixa.clickedButton() is botao_parar:
+                break
+            if caixa.clickedButton() is botao_mesclar:
+                aceitos.append(grupo)
+
+        if aceitos:
+            self.btn_duplicados.setEnabled(False)
+            self.btn_duplicados.setText("Mesclando...")
+            self.executar_no_banco(mesclar_grupos, self.usuario_id, aceitos,
+                                   ao_concluir=self.duplicados_mesclados, ao_falhar=self.duplicados_falhou)
+
+    def duplicados_mesclados(self, mesclados):
+        self.btn_duplicados.setEnabled(True)
+        self.btn_duplicados.setText("Duplicados")
+        QMessageBox.information(None, "Duplicados", f"{mesclados} grupo(s) de contatos mesclados.")
+        self.contato_gravado()
+
+    def duplicados_falhou(self, erro):
+        self.btn_duplicados.setEnabled(True)
+        self.btn_duplicados.setText("Duplicados")
+        log.error("Erro ao procurar ou mesclar duplicados: %s", erro)
+        QMessageBox.warning(None, "Erro", f"Erro ao procurar contatos duplicados: {erro}")
+
+    def executar_no_banco(self, funcao, *args, ao_concluir=None, ao_falhar=None):
+        # Roda a operação fora da thread da interface e mostra o cursor de ocupado
+        # enquanto houver alguma pendente
+        self.operacoes_pendentes += 1
+        self.centralwidget.setCursor(Qt.BusyCursor)
+
+        def finalizar(callback, valor):
+            self.operacoes_pendentes -= 1
+            if not self.operacoes_pendentes:
+                self.centralwidget.unsetCursor()
+            if callback:
+                callback(valor)
+
+        return executar(funcao, *args,
+                        ao_concluir=lambda resultado: finalizar(ao_concluir, resultado),
+                        ao_falhar=lambda erro: finalizar(ao_falhar or self.falha_no_banco, erro),
+                        dono=self.centralwidget)
+
+    def falha_no_banco(self, erro):
+        log.error("Erro ao acessar o banco: %s", erro)
+        self.label_Cntt.setText("Contatos (erro ao carregar)")
 
     def exibir_mensagem_aniversario(self, aniversariantes):
         if not aniversariantes or self.mensagem_aniversario_exibida:
@@ -207,43 +447,65 @@ class Ui_Form(object):
         self.mensagem_aniversario_exibida = True  # Marca que a mensagem foi exibida
 
     def verificar_aniversarios(self):
-        hoje = datetime.now()
-        dia_atual = hoje.day
-        mes_atual = hoje.month
+        if self.mensagem_aniversario_exibida or self.verificando_aniversarios:
+            return
 
-        aniversariantes = []
-        for contato in self.contatos:
-            data_nascimento = contato.get("data_nascimento")
-            if data_nascimento:
-                if data_nascimento.day == dia_atual and data_nascimento.month == mes_atual:
-                    aniversariantes.append(contato["nome"])
+        # Consulta indexada por (mes, dia): não depende de quantos contatos estão carregados
+        self.verificando_aniversarios = True
+        self.executar_no_banco(obter_aniversariantes, self.usuario_id,
+                               ao_concluir=self.aniversariantes_carregados,
+                               ao_falhar=self.aniversariantes_carregados)
 
+    def aniversariantes_carregados(self, resultado):
+        self.verificando_aniversarios = False
+        if isinstance(resultado, Exception):
+            log.error("Erro ao verificar aniversários: %s", resultado)
+            return
+        aniversariantes = [contato["nome"] for contato in resultado]
         if aniversariantes:
             self.exibir_mensagem_aniversario(aniversariantes)
 
     def filtrar_contatos(self):
-        texto_busca = self.line_buscar_cntt.text().lower()
-        for i, label in enumerate(self.labels_contatos):
-            visivel = texto_busca in label.text().lower()
-            label.setVisible(visivel)
-            if i < len(self.labels_editar):
-                self.labels_editar[i].setVisible(visivel)
-            if i < len(self.lines):
-                self.lines[i].setVisible(visivel)
-        self.scroll_widget.adjustSize()
-        self.scroll_area.update()
+        # Sempre pelo índice em memória, que tem todos os contatos mesmo com a lista
+        # carregada só em parte; nenhuma consulta ao banco por busca
+        self.timer_busca.stop()
+        self.filtro_contatos.filtrar(self.line_buscar_cntt.text())
 
     def adicionar_contato(self, event):
         self.tela_add_contato = QMainWindow()
         self.ui_add_contato = Ui_tela_add_contato()
         self.ui_add_contato.usuario_id = self.usuario_id
         self.ui_add_contato.setupUi(self.tela_add_contato, self)
-        self.tela_add_contato.destroyed.connect(self.carregar_contatos)
         self.tela_add_contato.show()
         event.accept()
 
-    def carregar_contatos(self):
-        foto_data_usuario = obter_foto_usuario(self.usuario_id)
+    def atualizar_foto_exibida(self):
+        lado = tamanho_para_exibir(self.label_foto.width(), self.label_foto.devicePixelRatioF())
+        self.executar_no_banco(self.ler_foto, self.foto_hash, lado, ao_concluir=self.foto_carregada)
+
+    def ler_foto(self, foto_hash_exibida, lado):
+        # Roda no executor: não toca em widgets, só devolve (alterada, hash, dados, original)
+        foto_hash = obter_ref_foto_usuario(self.usuario_id)
+        if foto_hash == foto_hash_exibida:
+            return False, foto_hash, None, False
+        if not foto_hash:
+            return True, None, None, False
+
+        foto_data_usuario = obter_miniatura(foto_hash, lado)
+        if foto_data_usuario is not None:
+            return True, foto_hash, foto_data_usuario, False
+        # Foto enviada antes das miniaturas: devolve a original
+        return True, foto_hash, obter_foto(foto_hash), True
+
+    def foto_carregada(self, resultado):
+        alterada, foto_hash, foto_data_usuario, original = resultado
+        if not alterada:
+            return
+        self.foto_hash = foto_hash
+        if original and foto_data_usuario:
+            # Mostra a original e gera as miniaturas em segundo plano
+            agendar_miniaturas(foto_hash, foto_data_usuario, self.miniatura_pronta)
+
         if foto_data_usuario:
             pixmap = QPixmap()
             pixmap.loadFromData(foto_data_usuario)
@@ -251,67 +513,249 @@ class Ui_Form(object):
         else:
             self.label_foto.setText("Sem Foto")
 
-        self.contatos = obter_contatos(self.usuario_id)
-
-        print("Contatos carregados do banco:", [(c["id"], c["nome"]) for c in self.contatos])
-
-        for label in self.labels_contatos:
-            label.deleteLater()
-        for line in self.lines:
-            line.deleteLater()
-        for label_editar in self.labels_editar:
-            label_editar.deleteLater()
-
-        self.labels_contatos.clear()
-        self.lines.clear()
-        self.labels_editar.clear()
-
-        for i, contato in enumerate(self.contatos):
-            nome = contato.get("nome", "Sem Nome")
-            telefone = str(contato.get("telefone", "Sem Telefone"))
-
-            contato_layout = QHBoxLayout()
-            contato_layout.setAlignment(Qt.AlignLeft)
-            contato_layout.setSpacing(10)
+    def miniatura_pronta(self, foto_hash):
+        if foto_hash != self.foto_hash:
+            return
+        try:
+            self.foto_hash = None
+            self.atualizar_foto_exibida()
+        except RuntimeError:
+            pass  # a janela foi fechada antes de a miniatura ficar pronta
 
-            label = QLabel()
-            label.setObjectName(f"label_{nome}_{i}")
-            label.setText(f"{nome} - {telefone}")
-            label.setStyleSheet("""
-                color: rgb(255, 255, 255);
-                background-color: transparent;
-                font-family: Segoe UI;
-                font-size: 12pt;
-                padding: 5px;
-            """)
-            contato_layout.addWidget(label)
-            self.labels_contatos.append(label)
-
-            label_editar = QLabel()
-            label_editar.setObjectName(f"label_editar_{i}")
-            label_editar.setPixmap(QPixmap("yy.png"))
-            label_editar.setScaledContents(True)
-            label_editar.setFixedSize(24, 24)
-            label_editar.setStyleSheet("""
-                background-color: transparent;
-            """)
-            label_editar.mousePressEvent = lambda event, idx=i: self.editar_contato(idx)
-            contato_layout.addWidget(label_editar)
-            self.labels_editar.append(label_editar)
+    def carregar_contatos(self):
+        self.atualizar_foto_exibida()
+
+        self.geracao_lista += 1
+        geracao = self.geracao_lista
+        self.carregando_pagina = False
+        self.sincronizavel = False
+        self.label_Cntt.setText("Contatos (carregando...)")
+        self.executar_no_banco(self.ler_primeira_pagina,
+                               ao_concluir=lambda resultado: self.contatos_carregados(geracao, resultado))
+        if self.indice_busca is None and not self.carregando_indice:
+            self.carregar_indice_busca()
+
+    def carregar_indice_busca(self):
+        # Uma vez por sessão: todos os contatos do usuário, só com as colunas da busca, num
+        # índice montado no executor e sem cursor de ocupado (a lista já responde enquanto
+        # isso). Depois ele só recebe as alterações: gravações, exclusões e os deltas da
+        # sincronização, inclusive os que seguem uma recarga da lista
+        self.carregando_indice = True
+        executar(self.ler_indice_busca, ao_concluir=self.indice_carregado, ao_falhar=self.indice_falhou,
+                 dono=self.centralwidget)
+
+    def ler_indice_busca(self):
+        # A marca é lida antes dos contatos: o que mudar durante a leitura volta no próximo delta
+        marca = obter_marca_sincronizacao(self.usuario_id)
+        return carregar_indice(self.usuario_id), marca
+
+    def indice_carregado(self, resultado):
+        self.carregando_indice = False
+        self.indice_busca, marca = resultado
+        self.filtro_contatos.definir_indice(self.indice_busca)
+        # A sincronização volta até a marca do índice para entregar a ele o que mudou
+        # enquanto era montado; na lista, reaplicar essas linhas não tem efeito
+        self.recuar_marca(marca)
+        self.sincronizar()
+
+    def indice_falhou(self, erro):
+        # Sem índice a lista continua sem filtro; a próxima recarga tenta de novo
+        self.carregando_indice = False
+        log.error("Erro ao montar o índice da busca: %s", erro)
+
+    def recuar_marca(self, marca):
+        # Fica a mais antiga das duas marcas (None é "desde o início"): um delta maior só
+        # reaplica linhas, e um menor perderia alterações para a lista ou o índice
+        if self.marca_lida and (self.marca_sincronizacao is None or marca is None):
+            self.marca_sincronizacao = None
+        elif self.marca_lida:
+            self.marca_sincronizacao = min(self.marca_sincronizacao, marca)
+        else:
+            self.marca_sincronizacao = marca
+        self.marca_lida = True
+
+    def atualizar_indice(self, alterados=(), excluidos=()):
+        if self.indice_busca is not None:
+            self.indice_busca.aplicar_alteracoes(alterados, excluidos)
+            self.filtro_contatos.reaplicar()
+
+    def ler_primeira_pagina(self):
+        contatos, proxima_pagina = obter_contatos_pagina(
+            self.usuario_id, config.CONTATOS_POR_PAGINA, colunas=COLUNAS_LISTA)
+        # A marca é lida depois da página: o que mudar entre as duas leituras volta no próximo delta
+        return contatos, proxima_pagina, contar_contatos(self.usuario_id), obter_marca_sincronizacao(self.usuario_id)
+
+    def contatos_carregados(self, geracao, resultado):
+        if geracao != self.geracao_lista:
+            return
+        contatos, self.proxima_pagina, self.total_contatos, marca = resultado
+        # Numa recarga (importação, mesclagem) a marca anterior fica: o delta seguinte leva
+        # ao índice da busca o que mudou, sem montá-lo de novo
+        self.recuar_marca(marca)
+        self.label_Cntt.setText(f"Contatos ({self.total_contatos})")
+
+        # Só a contagem: listar os contatos aqui custava uma linha enorme a cada recarga
+        log.debug("Contatos carregados", extra={"usuario_id": self.usuario_id, "contatos": len(contatos),
+                                                "total": self.total_contatos})
+
+        self.sincronizavel = True
+        self.selecionados &= {contato["id"] for contato in contatos}
+        self.atualizar_botoes_selecao()
+        self.lista_completa = self.proxima_pagina is None
+        self.redesenhar_lista(contatos)
+        if self.marca_sincronizacao != marca:
+            self.sincronizar()
 
-            self.scroll_layout.addLayout(contato_layout)
+        self.verificar_aniversarios()  # Verifica aniversários ao carregar os contatos
 
-            line = QFrame()
-            line.setObjectName(f"line_{nome}_{i}")
-            line.setFrameShape(QFrame.HLine)
-            line.setStyleSheet("background-color: rgb(80, 80, 100);")
-            self.scroll_layout.addWidget(line)
-            self.lines.append(line)
+    def redesenhar_lista(self, contatos):
+        self.modelo_contatos.definir_contatos(contatos)
+
+    def contato_gravado(self, contato=None):
+        # Chamado pelos formulários de inclusão e edição depois de gravar. Com o registro
+        # em mãos (as COLUNAS_LISTA) só aquela linha muda; a sincronização em seguida
+        # atualiza a contagem e traz o que outros clientes tenham alterado
+        if contato is not None:
+            contato = {coluna: contato.get(coluna) for coluna in COLUNAS_LISTA}
+            self.modelo_contatos.gravar_contato(contato, self.lista_completa)
+            self.atualizar_indice([contato])
+        self.sincronizar()
+
+    def contato_excluido(self, contato_id):
+        self.selecionados.discard(contato_id)
+        self.atualizar_botoes_selecao()
+        self.modelo_contatos.remover_contatos([contato_id])
+        self.atualizar_indice(excluidos=[contato_id])
+        self.sincronizar()
+
+    def sincronizar(self):
+        # Aplica na lista exibida só as alterações desde a última marca, em vez de recarregá-la
+        if self.sincronizando:
+            self.sincronizar_de_novo = True  # uma gravação aconteceu durante a busca em andamento
+            return
+        if not self.sincronizavel:
+            return
+        self.sincronizando = True
+        self.sincronizar_de_novo = False
+        geracao = self.geracao_lista
+        marca = self.marca_sincronizacao
+        self.executar_no_banco(self.ler_alteracoes, marca,
+                               ao_concluir=lambda resultado: self.alteracoes_recebidas(geracao, marca, resultado),
+                               ao_falhar=lambda erro: self.alteracoes_recebidas(geracao, marca, None))
+
+    def ler_alteracoes(self, marca):
+        alterados, excluidos, marca = obter_contatos_desde(self.usuario_id, marca)
+        # A contagem só é refeita quando algo mudou (e sai do cache, já atualizado pelo delta)
+        total = contar_contatos(self.usuario_id) if alterados or excluidos else None
+        return alterados, excluidos, marca, total
+
+    def alteracoes_recebidas(self, geracao, marca, resultado):
+        self.sincronizando = False
+        if marca != self.marca_sincronizacao:
+            # A marca recuou (índice novo) durante a busca: o delta não cobre o que falta
+            self.sincronizar_de_novo = True
+        elif resultado is not None and geracao == self.geracao_lista:
+            self.aplicar_alteracoes(*resultado)
+        if self.sincronizar_de_novo:
+            self.sincronizar()
+
+    def aplicar_alteracoes(self, alterados, excluidos, marca, total):
+        self.marca_sincronizacao = marca
+        if not alterados and not excluidos:
+            return
 
-        self.verificar_aniversarios()  # Verifica aniversários ao carregar os contatos
+        self.selecionados.difference_update(excluidos)
+        self.atualizar_botoes_selecao()
+        # Só as linhas alteradas mudam; contatos novos além da última página carregada
+        # chegam com as próximas páginas
+        alterados = [{coluna: contato[coluna] for coluna in COLUNAS_LISTA} for contato in alterados]
+        self.modelo_contatos.aplicar_alteracoes(alterados, excluidos, self.lista_completa)
+        self.atualizar_indice(alterados, excluidos)
+
+        self.total_contatos = total
+        self.label_Cntt.setText(f"Contatos ({self.total_contatos})")
+
+    def atualizar_botoes_selecao(self):
+        quantidade = len(self.selecionados)
+        self.modelo_contatos.marcacoes_alteradas()
+        self.btn_excluir_selecionados.setText(f"Deletar ({quantidade})")
+        self.btn_editar_selecionados.setText(f"Editar ({quantidade})")
+        self.btn_excluir_selecionados.setEnabled(quantidade > 0)
+        self.btn_editar_selecionados.setEnabled(quantidade > 0)
+
+    def deletar_selecionados(self):
+        ids = sorted(self.selecionados)
+        resposta = QMessageBox.question(None, "Confirmação", f"Tem certeza que deseja deletar {len(ids)} contatos?",
+                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if resposta != QMessageBox.Yes:
+            return
+        self.executar_lote(deletar_contatos, ids, "deletados")
 
-    def editar_contato(self, i):
-        contato = self.contatos[i]
+    def editar_selecionados(self):
+        rotulos = [rotulo for rotulo, _ in CAMPOS_EDICAO_LOTE]
+        rotulo, ok = QInputDialog.getItem(self.centralwidget, "Editar selecionados", "Campo:", rotulos, 0, False)
+        if not ok:
+            return
+        campo = dict(CAMPOS_EDICAO_LOTE)[rotulo]
+        valor, ok = QInputDialog.getText(self.centralwidget, "Editar selecionados",
+                                         f"Novo valor para {len(self.selecionados)} contatos:")
+        if not ok:
+            return
+        self.executar_lote(atualizar_contatos, sorted(self.selecionados), "atualizados", {campo: valor or None})
+
+    def executar_lote(self, funcao, ids, verbo, *args):
+        # Uma transação para todos os contatos marcados; a lista é atualizada uma vez no fim
+        self.btn_excluir_selecionados.setEnabled(False)
+        self.btn_editar_selecionados.setEnabled(False)
+        self.executar_no_banco(funcao, ids, *args,
+                               ao_concluir=lambda quantidade: self.lote_concluido(quantidade, verbo),
+                               ao_falhar=lambda erro: self.lote_concluido(0, verbo))
+
+    def lote_concluido(self, quantidade, verbo):
+        if quantidade:
+            self.selecionados.clear()
+            QMessageBox.information(None, "Sucesso", f"{quantidade} contatos {verbo} com sucesso!")
+            self.contato_gravado()
+        else:
+            QMessageBox.warning(None, "Erro", "Nenhum contato foi alterado. Tente novamente.")
+        self.atualizar_botoes_selecao()
+
+    def verificar_fim_da_lista(self, valor):
+        barra = self.lista_contatos.verticalScrollBar()
+        if self.proxima_pagina is not None and valor >= barra.maximum() - 100:
+            self.carregar_mais_contatos()
+
+    def carregar_mais_contatos(self):
+        # Busca só a próxima página quando a rolagem chega perto do fim da lista
+        if self.carregando_pagina or self.proxima_pagina is None:
+            return  # a página seguinte já está a caminho
+        self.carregando_pagina = True
+        geracao = self.geracao_lista
+        self.executar_no_banco(obter_contatos_pagina, self.usuario_id, config.CONTATOS_POR_PAGINA,
+                               self.proxima_pagina, COLUNAS_LISTA,
+                               ao_concluir=lambda resultado: self.pagina_carregada(geracao, resultado),
+                               ao_falhar=lambda erro: self.pagina_carregada(geracao, None))
+
+    def pagina_carregada(self, geracao, resultado):
+        if geracao != self.geracao_lista:
+            return  # a lista foi recarregada ou substituída por uma busca nesse meio tempo
+        self.carregando_pagina = False
+        if resultado is None:
+            return
+        pagina, self.proxima_pagina = resultado
+        self.lista_completa = self.proxima_pagina is None
+        self.modelo_contatos.acrescentar(pagina)
+        if self.line_buscar_cntt.text():
+            self.filtrar_contatos()
+
+    def editar_contato(self, contato_id):
+        # A lista guarda só as colunas exibidas; o formulário precisa do registro completo.
+        # Um resultado da busca pode não estar nas páginas carregadas, só no índice
+        resumo = self.modelo_contatos.por_id.get(contato_id) or self.indice_busca.contatos[contato_id]
+        self.executar_no_banco(obter_contato, resumo["id"],
+                               ao_concluir=lambda contato: self.abrir_edicao(contato or resumo))
+
+    def abrir_edicao(self, contato):
         data_nascimento = contato.get("data_nascimento")
         data_nascimento_str = data_nascimento.strftime("%Y-%m-%d") if data_nascimento else ""
         
@@ -328,7 +772,6 @@ class Ui_Form(object):
         self.tela_editar_contato = QMainWindow()
         self.ui_editar_contato = Ui_EditarContato()
         self.ui_editar_contato.setupUi(self.tela_editar_contato, contato_info, self)
-        self.tela_editar_contato.destroyed.connect(self.carregar_contatos)
         self.tela_editar_contato.show()
 
 if __name__ == "__main__":
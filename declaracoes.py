@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+_lock = threading.Lock()
+_contadores = {"acertos": 0, "falhas": 0, "descartes": 0}
+
+
+def _contar(nome):
+    with _lock:
+        _contadores[nome] += 1
+
+
+def estatisticas():
+    with _lock:
+        dados = dict(_contadores)
+    total = dados["acertos"] + dados["falhas"]
+    dados["taxa_acerto"] = dados["acertos"] / total if total else 0.0
+    return dados
+
+
+def zerar_estatisticas():
+    with _lock:
+        for nome in _contadores:
+            _contadores[nome] = 0
+
+
+def _descartar_resultado(cursor):
+    # Um cursor reaproveitado não pode ficar com linhas pendentes (o MySQL recusaria a próxima execução)
+    try:
+        if getattr(cursor, "with_rows", True):
+            cursor.fetchall()
+    except Exception:
+        pass
+
+
+class CacheDeclaracoes(object):
+    # Cursores preparados de uma conexão, um por texto SQL, com descarte LRU.
+    # No MySQL cada cursor guarda um prepared statement no servidor.
+    def __init__(self, conexao, criar_cursor, capacidade=64):
+        self._conexao = conexao
+        self._criar_cursor = criar_cursor
+        self.capacidade = capacidade
+        self._cursores = OrderedDict()
+
+    def obter(self, sql, dictionary=False):
+        chave = (sql, dictionary)
+        entrada = self._cursores.get(chave)
+        if entrada is not None:
+            self._cursores.move_to_end(chave)
+            _contar("acertos")
+            return entrada
+
+        _contar("falhas")
+        # O texto guardado na chave é o mesmo objeto passado ao execute(): o cursor
+        # preparado do mysql.connector só reaproveita a instrução quando é o mesmo objeto
+        entrada = (self._criar_cursor(self._conexao, dictionary), sql)
+        self._cursores[chave] = entrada
+        if len(self._cursores) > self.capacidade:
+            _, (antigo, _sql) = self._cursores.popitem(last=False)
+            _contar("descartes")
+            try:
+                antigo.close()
+            except Exception:
+                pass
+        return entrada
+
+
+class CursorPreparado(object):
+    # Mesma interface de um cursor comum; cada execute() usa o cursor preparado em cache
+    # para aquele SQL. close() só descarta linhas pendentes: o cursor continua no cache.
+    def __init__(self, cache, dictionary=False):
+        self._cache = cache
+        self._dictionary = dictionary
+        self._cursor = None
+
+    def execute(self, sql, parametros=()):
+        if self._cursor is not None:
+            _descartar_resultado(self._cursor)
+        self._cursor, sql_cache = self._cache.obter(sql, self._dictionary)
+        self._cursor.execute(sql_cache, parametros)
+
+    def __getattr__(self, nome):
+        if self._cursor is None:
+            raise AttributeError(nome)
+        return getattr(self._cursor, nome)
+
+    def close(self):
+        if self._cursor is not None:
+            _descartar_resultado(self._cursor)
+            self._cursor = None
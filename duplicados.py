@@ -0,0 +1,146 @@
+# Detecção e mesclagem de contatos duplicados.
+#
+# Comparar todos os pares é quadrático. Em vez disso cada contato gera chaves de
+# bloqueio (telefone em E.164, email e nome sem acentos) e uma única passada num
+# dicionário chave -> primeiro contato com essa chave junta os candidatos com
+# union-find: O(n) para qualquer tamanho de agenda.
+from collections import defaultdict
+
+from bancodedados import mesclar_contatos, percorrer_contatos
+from normalizacao import chave_telefone, dobrar_texto, normalizar_email
+
+CAMPOS_MESCLAGEM = ("nome", "email", "telefone", "data_nascimento", "perfil_rede_social", "notas")
+
+# Telefones e emails só são diferentes se diferirem depois de normalizados
+_COMPARAR = {"telefone": chave_telefone, "email": normalizar_email}
+
+MOTIVOS = {"telefone": "mesmo telefone", "email": "mesmo email", "nome": "mesmo nome"}
+
+
+def _normalizados(contato):
+    # (telefone, email, nome, nascimento) na forma de comparação; calculado uma vez por contato
+    return (chave_telefone(contato.get("telefone")), normalizar_email(contato.get("email")),
+            dobrar_texto(contato.get("nome")), contato.get("data_nascimento"))
+
+
+def chaves_bloqueio(normalizados):
+    telefone, email, nome, _ = normalizados
+    chaves = []
+    if telefone:
+        chaves.append(("telefone", telefone))
+    if email:
+        chaves.append(("email", email))
+    # Só nome e sobrenome: um primeiro nome sozinho junta pessoas diferentes
+    if " " in nome:
+        chaves.append(("nome", nome))
+    return chaves
+
+
+def _conflitam(a, b):
+    # Mesmo nome mas telefone, email ou nascimento diferentes: provavelmente outra pessoa
+    for indice in (0, 1, 3):
+        if a[indice] and b[indice] and a[indice] != b[indice]:
+            return True
+    return False
+
+
+def _preenchidos(contato):
+    return sum(1 for campo in CAMPOS_MESCLAGEM if contato.get(campo))
+
+
+class GrupoDuplicados(object):
+    def __init__(self, contatos, motivos):
+        self.contatos = sorted(contatos, key=lambda contato: contato["id"])
+        self.motivos = motivos
+        # Fica o contato mais completo; no empate, o mais antigo
+        self.manter = max(self.contatos, key=lambda contato: (_preenchidos(contato), -contato["id"]))
+
+    @property
+    def remover(self):
+        return [contato for contato in self.contatos if contato is not self.manter]
+
+    def campos_mesclados(self):
+        # Campos vazios do contato mantido vêm dos outros; telefones e emails diferentes
+        # e notas de todos vão para as notas, para que a mesclagem não perca nada
+        campos = {campo: self.manter.get(campo) for campo in CAMPOS_MESCLAGEM}
+        extras = []
+        for contato in self.remover:
+            for campo in CAMPOS_MESCLAGEM:
+                valor = contato.get(campo)
+                if not valor or campo == "notas":
+                    continue
+                if not campos[campo]:
+                    campos[campo] = valor
+                elif campo in _COMPARAR and _COMPARAR[campo](valor) != _COMPARAR[campo](campos[campo]):
+                    extras.append(f"{campo.capitalize()}: {valor}")
+        notas = [campos["notas"]] if campos["notas"] else []
+        for nota in [contato.get("notas") for contato in self.remover] + extras:
+            if nota and nota not in notas:
+                notas.append(nota)
+        campos["notas"] = "\n".join(notas) or None
+        return campos
+
+    def descricao(self):
+        linhas = []
+        for contato in self.contatos:
+            detalhes = ", ".join(str(contato[campo]) for campo in ("telefone", "email") if contato.get(campo))
+            marca = " (mantido)" if contato is self.manter else ""
+            linhas.append(f"{contato.get('nome') or '(sem nome)'}{marca}" + (f" - {detalhes}" if detalhes else ""))
+        return "\n".join(linhas)
+
+
+def agrupar_duplicados(contatos):
+    # Recebe um iterável de contatos (dicionários com id e os campos) e devolve os
+    # grupos com dois ou mais contatos, maiores primeiro
+    pais = {}
+    por_id = {}
+    normalizados = {}
+    primeiro_por_chave = {}
+    motivos = defaultdict(set)
+
+    def raiz(contato_id):
+        while pais[contato_id] != contato_id:
+            pais[contato_id] = pais[pais[contato_id]]
+            contato_id = pais[contato_id]
+        return contato_id
+
+    for contato in contatos:
+        contato_id = contato["id"]
+        por_id[contato_id] = contato
+        pais[contato_id] = contato_id
+        normalizados[contato_id] = atual = _normalizados(contato)
+        for chave in chaves_bloqueio(atual):
+            outro = primeiro_por_chave.setdefault(chave, contato_id)
+            if outro == contato_id:
+                continue
+            if chave[0] == "nome" and _conflitam(normalizados[outro], atual):
+                continue
+            raiz_outro, raiz_atual = raiz(outro), raiz(contato_id)
+            if raiz_outro != raiz_atual:
+                pais[raiz_atual] = raiz_outro
+            motivos[contato_id].add(chave[0])
+            motivos[outro].add(chave[0])
+
+    membros = defaultdict(list)
+    for contato_id in motivos:
+        membros[raiz(contato_id)].append(por_id[contato_id])
+    grupos = []
+    for contatos_grupo in membros.values():
+        motivos_grupo = set().union(*(motivos[contato["id"]] for contato in contatos_grupo))
+        grupos.append(GrupoDuplicados(contatos_grupo, sorted(motivos_grupo)))
+    grupos.sort(key=lambda grupo: (-len(grupo.contatos), dobrar_texto(grupo.manter.get("nome"))))
+    return grupos
+
+
+def encontrar_duplicados(usuario_id):
+    return agrupar_duplicados(percorrer_contatos(usuario_id))
+
+
+def mesclar_grupo(usuario_id, grupo):
+    return mesclar_contatos(usuario_id, grupo.manter["id"], [contato["id"] for contato in grupo.remover],
+                            grupo.campos_mesclados())
+
+
+def mesclar_grupos(usuario_id, grupos):
+    # Cada grupo em sua própria transação; retorna quantos grupos foram mesclados
+    return sum(1 for grupo in grupos if mesclar_grupo(usuario_id, grupo))
@@ -1,8 +1,13 @@
 from PySide6.QtCore import QRect, Qt, QDate
-from PySide6.QtGui import QFont, QIcon
+from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (QMainWindow, QWidget, QFrame, QLabel, QLineEdit, QPushButton, 
                                QDateEdit, QTextEdit, QMessageBox, QScrollArea, QVBoxLayout, QHBoxLayout)
 from bancodedados import atualizar_contato, deletar_contato
+from executor_banco import executar
+from registro import obter_logger
+import recursos
+
+log = obter_logger("editarcntt")
 
 class Ui_Form(object):
     def setupUi(self, tela_editar_contato, contato_info, tela_contatos):
@@ -13,7 +18,7 @@ class Ui_Form(object):
         tela_editar_contato.setObjectName("tela_editar_contato")
         tela_editar_contato.resize(800, 600)
         tela_editar_contato.setWindowTitle("Agenda de Contatos")
-        tela_editar_contato.setWindowIcon(QIcon("agenda.png"))
+        tela_editar_contato.setWindowIcon(recursos.icone("agenda.png"))
         self.centralwidget = QWidget(tela_editar_contato)
         self.centralwidget.setStyleSheet("""
             background: qlineargradient(
@@ -250,9 +255,37 @@ class Ui_Form(object):
             self.line_nome.setStyleSheet(self.line_nome.styleSheet().replace("rgb(80, 80, 100)", "rgb(255, 100, 100)"))
             return
 
-        if atualizar_contato(self.contato_info["id"], nome, email, telefone, data_nascimento_str, perfil_rede_social, notas, None):
+        # Grava em segundo plano; a janela fica ocupada até o resultado chegar
+        self.definir_ocupado(True, self.pushButton_salvar, "Salvando...")
+        # O que a lista de contatos guarda (exibição e índice da busca)
+        contato = {"id": self.contato_info["id"], "nome": nome, "telefone": telefone, "email": email,
+                   "perfil_rede_social": perfil_rede_social, "notas": notas}
+        executar(atualizar_contato, self.contato_info["id"], nome, email, telefone, data_nascimento_str, perfil_rede_social, notas, None,
+                 ao_concluir=lambda atualizado: self.contato_atualizado(atualizado, contato),
+                 ao_falhar=self.falha_ao_atualizar,
+                 dono=self.tela_editar_contato)
+
+    def definir_ocupado(self, ocupado, botao=None, texto=None):
+        self.pushButton_salvar.setEnabled(not ocupado)
+        self.pushButton_deletar.setEnabled(not ocupado)
+        if ocupado:
+            botao.setText(texto)
+            self.tela_editar_contato.setCursor(Qt.BusyCursor)
+        else:
+            self.pushButton_salvar.setText("Salvar")
+            self.pushButton_deletar.setText("Deletar")
+            self.tela_editar_contato.unsetCursor()
+
+    def falha_ao_atualizar(self, erro):
+        log.error("Erro ao atualizar contato: %s", erro, extra={"contato_id": self.contato_info["id"]})
+        self.contato_atualizado(False)
+
+    def contato_atualizado(self, atualizado, contato=None):
+        self.definir_ocupado(False)
+        if atualizado:
             QMessageBox.information(None, "Sucesso", "Contato atualizado com sucesso!")
-            self.tela_contatos.carregar_contatos()
+            # Só a linha deste contato muda na lista
+            self.tela_contatos.contato_gravado(contato)
             self.tela_editar_contato.close()
         else:
             QMessageBox.warning(None, "Erro", "Erro ao atualizar contato. Tente novamente.")
@@ -261,9 +294,20 @@ class Ui_Form(object):
         resposta = QMessageBox.question(None, "Confirmação", "Tem certeza que deseja deletar este contato?",
                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if resposta == QMessageBox.Yes:
-            if deletar_contato(self.contato_info["id"]):
-                QMessageBox.information(None, "Sucesso", "Contato deletado com sucesso!")
-                self.tela_contatos.carregar_contatos()
-                self.tela_editar_contato.close()
-            else:
-                QMessageBox.warning(None, "Erro", "Erro ao deletar contato. Tente novamente.")
+            self.definir_ocupado(True, self.pushButton_deletar, "Deletando...")
+            executar(deletar_contato, self.contato_info["id"],
+                     ao_concluir=self.contato_deletado, ao_falhar=self.falha_ao_deletar,
+                     dono=self.tela_editar_contato)
+
+    def falha_ao_deletar(self, erro):
+        log.error("Erro ao deletar contato: %s", erro, extra={"contato_id": self.contato_info["id"]})
+        self.contato_deletado(False)
+
+    def contato_deletado(self, deletado):
+        self.definir_ocupado(False)
+        if deletado:
+            QMessageBox.information(None, "Sucesso", "Contato deletado com sucesso!")
+            self.tela_contatos.contato_excluido(self.contato_info["id"])
+            self.tela_editar_contato.close()
+        else:
+            QMessageBox.warning(None, "Erro", "Erro ao deletar contato. Tente novamente.")
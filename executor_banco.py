@@ -0,0 +1,90 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from shiboken6 import isValid
+
+import config
+from registro import obter_logger
+
+log = obter_logger("executor_banco")
+
+
+class SinaisTarefa(QObject):
+    concluida = Signal(object)
+    falhou = Signal(object)
+    finalizada = Signal()
+
+
+class TarefaBanco(QRunnable):
+    def __init__(self, funcao, args, kwargs):
+        super().__init__()
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.sinais = SinaisTarefa()
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            resultado = self.funcao(*self.args, **self.kwargs)
+        except Exception as e:
+            self.sinais.falhou.emit(e)
+        else:
+            self.sinais.concluida.emit(resultado)
+        finally:
+            self.sinais.finalizada.emit()
+
+
+class ExecutorBanco(object):
+    def __init__(self, max_threads=None):
+        self.pool = QThreadPool()
+        # Mais threads que conexões no pool só deixaria tarefas esperando por uma conexão
+        self.pool.setMaxThreadCount(max_threads or config.EXECUTOR_THREADS)
+        # Mantém vivas as tarefas em andamento: sem essa referência o objeto de sinais
+        # seria coletado antes de a thread emitir o resultado
+        self._tarefas_ativas = set()
+
+    def executar(self, funcao, *args, ao_concluir=None, ao_falhar=None, dono=None, **kwargs):
+        # Roda funcao(*args, **kwargs) numa thread do pool; os callbacks chegam na
+        # thread da interface pelos sinais. Se o widget "dono" já tiver sido
+        # destruído quando o resultado chegar, os callbacks são ignorados.
+        tarefa = TarefaBanco(funcao, args, kwargs)
+        self._tarefas_ativas.add(tarefa)
+        tarefa.sinais.finalizada.connect(lambda: self._tarefas_ativas.discard(tarefa))
+        if ao_concluir:
+            tarefa.sinais.concluida.connect(_somente_se_valido(dono, ao_concluir))
+        tarefa.sinais.falhou.connect(_somente_se_valido(dono, ao_falhar or _registrar_falha))
+        self.pool.start(tarefa)
+        return tarefa
+
+    def pendentes(self):
+        return len(self._tarefas_ativas)
+
+    def aguardar(self, timeout_ms=-1):
+        return self.pool.waitForDone(timeout_ms)
+
+
+def _somente_se_valido(dono, callback):
+    if dono is None:
+        return callback
+
+    def entregar(valor):
+        if isValid(dono):
+            callback(valor)
+    return entregar
+
+
+def _registrar_falha(erro):
+    log.error("Erro em operação de banco em segundo plano: %s", erro)
+
+
+_executor = None
+
+
+def obter_executor():
+    global _executor
+    if _executor is None:
+        _executor = ExecutorBanco()
+    return _executor
+
+
+def executar(funcao, *args, **kwargs):
+    return obter_executor().executar(funcao, *args, **kwargs)
@@ -0,0 +1,165 @@
+# Exportação de contatos para CSV, vCard (3.0 ou 4.0) ou JSON Lines.
+#
+# Os contatos vêm do banco em lotes (bancodedados.percorrer_contatos) e cada um é
+# escrito assim que chega: a memória usada é a mesma para 100 ou 1 milhão de contatos.
+#
+# Uso sem interface gráfica:
+#     python exportador.py contatos.csv --usuario 1
+#     python exportador.py contatos.vcf --usuario 1 --versao-vcard 4.0
+#     python exportador.py - --usuario 1 --formato jsonl > contatos.jsonl
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from bancodedados import ErroBanco, percorrer_contatos, usuario_existe
+from pool import ErroPool
+from vcard import VERSOES, escrever_vcard
+
+FORMATOS = ("csv", "vcard", "jsonl")
+
+# Mesmos nomes que o importador reconhece, para que o arquivo volte sem perdas
+COLUNAS_CSV = ("nome", "email", "telefone", "data_nascimento", "perfil_rede_social", "notas")
+
+# Progresso é informado a cada tantos contatos
+INTERVALO_PROGRESSO = 1000
+
+
+class ResultadoExportacao(object):
+    def __init__(self):
+        self.exportados = 0
+        self.duracao = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.exportados / self.duracao if self.duracao > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.exportados} contatos exportados em {self.duracao:.2f}s ({self.linhas_por_segundo:.0f} linhas/s)"
+
+
+class ExportacaoCancelada(Exception):
+    pass
+
+
+def detectar_formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in (".vcf", ".vcard"):
+        return "vcard"
+    if extensao in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _escritor_csv(arquivo):
+    escritor = csv.writer(arquivo)
+    escritor.writerow(COLUNAS_CSV)
+    return lambda contato: escritor.writerow([_texto(contato.get(coluna)) for coluna in COLUNAS_CSV])
+
+
+def _escritor_vcard(arquivo, versao):
+    return lambda contato: arquivo.write(escrever_vcard(contato, versao))
+
+
+def _escritor_jsonl(arquivo):
+    def escrever(contato):
+        arquivo.write(json.dumps(contato, ensure_ascii=False, default=_texto))
+        arquivo.write("\n")
+    return escrever
+
+
+def escrever_contatos(arquivo, contatos, formato, versao_vcard="3.0", progresso=None, cancelado=None):
+    # Escreve os contatos de um iterável num arquivo de texto já aberto (newline="")
+    if formato == "csv":
+        escrever = _escritor_csv(arquivo)
+    elif formato == "vcard":
+        escrever = _escritor_vcard(arquivo, versao_vcard)
+    elif formato == "jsonl":
+        escrever = _escritor_jsonl(arquivo)
+    else:
+        raise ValueError(f"Formato desconhecido: {formato}")
+
+    resultado = ResultadoExportacao()
+    inicio = time.perf_counter()
+    for contato in contatos:
+        escrever(contato)
+        resultado.exportados += 1
+        if resultado.exportados % INTERVALO_PROGRESSO == 0:
+            resultado.duracao = time.perf_counter() - inicio
+            if cancelado and cancelado():
+                raise ExportacaoCancelada(f"Exportação cancelada após {resultado.exportados} contatos.")
+            if progresso:
+                progresso(resultado)
+    resultado.duracao = time.perf_counter() - inicio
+    return resultado
+
+
+def exportar_contatos(caminho, usuario_id, formato=None, versao_vcard="3.0", progresso=None, cancelado=None):
+    # Grava num arquivo temporário ao lado do destino e só o renomeia no fim: uma
+    # exportação que falha ou é cancelada não deixa um arquivo pela metade.
+    # progresso(resultado) é chamado a cada INTERVALO_PROGRESSO contatos; se
+    # cancelado() retornar True a exportação para com ExportacaoCancelada.
+    formato = formato or detectar_formato(caminho)
+    if versao_vcard not in VERSOES:
+        raise ValueError(f"Versão de vCard não suportada: {versao_vcard}")
+    if not usuario_existe(usuario_id):
+        raise ValueError(f"Usuário com ID {usuario_id} não existe.")
+
+    temporario = f"{caminho}.parcial"
+    try:
+        with open(temporario, "w", encoding="utf-8", newline="") as arquivo:
+            contatos = percorrer_contatos(usuario_id)
+            try:
+                resultado = escrever_contatos(arquivo, contatos, formato, versao_vcard, progresso, cancelado)
+            finally:
+                contatos.close()
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os contatos de um usuário para CSV, vCard ou JSON Lines.")
+    parser.add_argument("arquivo", help='arquivo de saída ("-" para a saída padrão)')
+    parser.add_argument("--usuario", type=int, required=True, help="ID do usuário dono dos contatos")
+    parser.add_argument("--formato", choices=FORMATOS, help="padrão: detectado pela extensão")
+    parser.add_argument("--versao-vcard", choices=VERSOES, default="3.0")
+    args = parser.parse_args()
+
+    def mostrar_progresso(resultado):
+        print(f"\r{resultado}", end="", flush=True, file=sys.stderr)
+
+    try:
+        if args.arquivo == "-":
+            if not usuario_existe(args.usuario):
+                raise ValueError(f"Usuário com ID {args.usuario} não existe.")
+            sys.stdout.reconfigure(newline="")
+            contatos = percorrer_contatos(args.usuario)
+            try:
+                resultado = escrever_contatos(sys.stdout, contatos, args.formato or "csv", args.versao_vcard)
+            finally:
+                contatos.close()
+        else:
+            resultado = exportar_contatos(args.arquivo, args.usuario, args.formato, args.versao_vcard, mostrar_progresso)
+    except (OSError, ValueError, ErroBanco, ErroPool) as e:
+        print(f"Erro na exportação: {e}", file=sys.stderr)
+        return 1
+    print(f"\r{resultado}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# Gera usuários e contatos fictícios (nomes, telefones e datas brasileiros) para
+# testes de carga e para os benchmarks. A mesma semente gera sempre os mesmos dados.
+#
+# Uso:
+#     python gerador_dados.py --usuarios 10 --contatos 1000
+#     python gerador_dados.py --usuarios 100 --contatos 1000 --semente 7 --lote 5000
+import argparse
+import random
+import sys
+import time
+import unicodedata
+from datetime import date, timedelta
+
+import config
+from bancodedados import autenticar_usuario, salvar_contatos_lote, salvar_usuario
+
+NOMES = (
+    "Ana", "Maria", "Francisca", "Antônia", "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline",
+    "Sandra", "Camila", "Amanda", "Bruna", "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana",
+    "Gabriela", "Beatriz", "Larissa", "Débora", "Cláudia", "Raquel", "Tatiane", "Simone", "Helena", "Lívia",
+    "José", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas", "Luiz", "Marcos",
+    "Luís", "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe", "Raimundo", "Rodrigo",
+    "Manoel", "Mateus", "André", "Fernando", "Fábio", "Leonardo", "Gustavo", "Guilherme", "Thiago", "Vinícius",
+)
+
+SOBRENOMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Monteiro", "Moura", "Correia", "Conceição",
+)
+
+# DDDs das capitais e de algumas cidades grandes
+DDDS = (11, 12, 13, 19, 21, 24, 27, 31, 34, 41, 43, 47, 48, 51, 54, 61, 62, 65, 67, 71,
+        79, 81, 82, 83, 84, 85, 86, 91, 92, 95, 96, 98)
+
+DOMINIOS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com.br", "uol.com.br", "bol.com.br", "terra.com.br")
+
+NOTAS = ("", "", "", "Trabalho", "Família", "Faculdade", "Vizinho", "Academia", "Cliente", "Fornecedor")
+
+SENHA_PADRAO = "senha123"
+
+_NASCIMENTO_INICIO = date(1940, 1, 1)
+_NASCIMENTO_DIAS = (date(2010, 12, 31) - _NASCIMENTO_INICIO).days
+
+
+def _sem_acentos(texto):
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def gerar_nome(aleatorio):
+    nome = aleatorio.choice(NOMES)
+    if aleatorio.random() < 0.4:
+        return f"{nome} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+    return f"{nome} {aleatorio.choice(SOBRENOMES)}"
+
+
+def gerar_email(aleatorio, nome, sufixo=""):
+    partes = _sem_acentos(nome).lower().split()
+    return f"{partes[0]}.{partes[-1]}{sufixo}@{aleatorio.choice(DOMINIOS)}"
+
+
+def gerar_telefone(aleatorio):
+    ddd = aleatorio.choice(DDDS)
+    if aleatorio.random() < 0.85:
+        return f"({ddd}) 9{aleatorio.randint(6000, 9999)}-{aleatorio.randint(0, 9999):04d}"
+    # Fixo
+    return f"({ddd}) {aleatorio.randint(2000, 5999)}-{aleatorio.randint(0, 9999):04d}"
+
+
+def gerar_contato(aleatorio):
+    # Mesma tupla de salvar_contatos_lote: (nome, email, telefone, data_nascimento, perfil_rede_social, notas)
+    nome = gerar_nome(aleatorio)
+    email = gerar_email(aleatorio, nome, aleatorio.randint(1, 999)) if aleatorio.random() < 0.8 else None
+    telefone = gerar_telefone(aleatorio) if aleatorio.random() < 0.95 else None
+    nascimento = None
+    if aleatorio.random() < 0.7:
+        nascimento = _NASCIMENTO_INICIO + timedelta(days=aleatorio.randrange(_NASCIMENTO_DIAS))
+    perfil = None
+    if aleatorio.random() < 0.3:
+        perfil = "https://instagram.com/" + _sem_acentos(nome).lower().replace(" ", ".")
+    return (nome, email, telefone, nascimento, perfil, aleatorio.choice(NOTAS) or None)
+
+
+def gerar_contatos(quantidade, semente=0):
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        yield gerar_contato(aleatorio)
+
+
+def gerar_usuarios(quantidade, semente=0, inicio=0):
+    # (nome, email, contato, senha); o índice no email garante que não se repitam
+    aleatorio = random.Random(f"usuarios-{semente}-{inicio}")
+    for indice in range(inicio, inicio + quantidade):
+        nome = gerar_nome(aleatorio)
+        yield nome, gerar_email(aleatorio, nome, f".u{indice}"), gerar_telefone(aleatorio), SENHA_PADRAO
+
+
+def popular(usuarios, contatos_por_usuario, semente=0, lote=None, inicio=0, progresso=None):
+    # Cria os usuários e os contatos de cada um; retorna a lista de ids dos usuários criados.
+    # inicio permite crescer um banco já populado sem repetir emails.
+    lote = lote or config.IMPORTACAO_LOTE
+    ids = []
+    for indice, (nome, email, contato, senha) in enumerate(gerar_usuarios(usuarios, semente, inicio), inicio):
+        if not salvar_usuario(nome, email, contato, senha):
+            raise RuntimeError(f"Não foi possível criar o usuário {email} (já existe? use outro --inicio)")
+        usuario_id = autenticar_usuario(email, senha)[1]
+        ids.append(usuario_id)
+        # Cada usuário tem a própria semente: a agenda dele não depende de quantos vieram antes
+        contatos = gerar_contatos(contatos_por_usuario, f"contatos-{semente}-{indice}")
+        while True:
+            bloco = [contato for _, contato in zip(range(lote), contatos)]
+            if not bloco:
+                break
+            if salvar_contatos_lote(usuario_id, bloco) != len(bloco):
+                raise RuntimeError(f"Falha ao gravar contatos do usuário {usuario_id}")
+        if progresso:
+            progresso(len(ids), usuarios)
+    return ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Popula o banco com usuários e contatos fictícios.")
+    parser.add_argument("--usuarios", type=int, default=1)
+    parser.add_argument("--contatos", type=int, default=1000, help="contatos por usuário")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--inicio", type=int, default=0, help="índice do primeiro usuário (para crescer um banco já populado)")
+    parser.add_argument("--lote", type=int, default=config.IMPORTACAO_LOTE, help="contatos por transação")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        ids = popular(args.usuarios, args.contatos, args.semente, args.lote, args.inicio,
+                      progresso=lambda feitos, total: print(f"\r{feitos}/{total} usuários", end="", flush=True))
+    except RuntimeError as e:
+        print(f"\nErro: {e}")
+        return 1
+    duracao = time.perf_counter() - inicio
+    total = len(ids) * args.contatos
+    print(f"\r{len(ids)} usuários e {total} contatos em {duracao:.2f}s ({total / duracao if duracao else 0:.0f} contatos/s)")
+    print(f"Senha de todos os usuários: {SENHA_PADRAO}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# Importação em massa de contatos a partir de arquivos CSV ou vCard.
+#
+# Uso sem interface gráfica:
+#     python importador.py contatos.csv --usuario 1
+#     python importador.py contatos.vcf --usuario 1 --lote 5000
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+import config
+from bancodedados import salvar_contatos_lote, usuario_existe, validar_data_nascimento
+from vcard import ler_vcards
+
+# Nomes de colunas aceitos no cabeçalho do CSV para cada campo
+ALIASES_CSV = {
+    "nome": ("nome", "name", "full name", "nome completo", "first name"),
+    "email": ("email", "e-mail", "e-mail 1 - value", "email address"),
+    "telefone": ("telefone", "phone", "celular", "phone 1 - value", "mobile phone"),
+    "data_nascimento": ("data_nascimento", "data de nascimento", "nascimento", "birthday", "aniversario", "aniversário"),
+    "perfil_rede_social": ("perfil_rede_social", "rede social", "rede_social", "website", "website 1 - value"),
+    "notas": ("notas", "notes", "observacoes", "observações"),
+}
+
+# Tamanho máximo das colunas VARCHAR, para que um valor longo não derrube o lote inteiro
+LIMITES_CAMPOS = {
+    "nome": 255,
+    "email": 255,
+    "telefone": 20,
+    "perfil_rede_social": 255,
+}
+
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%Y%m%d", "%d-%m-%Y", "%Y/%m/%d")
+
+
+class ResultadoImportacao(object):
+    def __init__(self):
+        self.importados = 0
+        self.rejeitados = 0
+        self.duracao = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        total = self.importados + self.rejeitados
+        return total / self.duracao if self.duracao > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.importados} contatos importados, {self.rejeitados} rejeitados "
+                f"em {self.duracao:.2f}s ({self.linhas_por_segundo:.0f} linhas/s)")
+
+
+def detectar_formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in (".vcf", ".vcard"):
+        return "vcard"
+    return "csv"
+
+
+def ler_csv(arquivo):
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+        # Sem aspas na amostra o Sniffer desliga doublequote, e um "" mais adiante quebraria a linha
+        dialeto.doublequote = True
+    except csv.Error:
+        dialeto = csv.excel
+
+    leitor = csv.reader(arquivo, dialeto)
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        return
+
+    indices = {}
+    normalizado = [coluna.strip().lower() for coluna in cabecalho]
+    for campo, aliases in ALIASES_CSV.items():
+        for alias in aliases:
+            if alias in normalizado:
+                indices[campo] = normalizado.index(alias)
+                break
+
+    for linha in leitor:
+        yield {campo: linha[indice] for campo, indice in indices.items() if indice < len(linha)}
+
+
+def normalizar_data(valor):
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.startswith("--"):
+        # vCard sem ano (--MMDD); o ano 1 é o mesmo usado como "vazio" pelos formulários
+        valor = "0001" + valor[2:].replace("-", "")
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(valor[:10], formato).date().isoformat()
+        except ValueError:
+            continue
+    return valor
+
+
+def preparar_contato(registro):
+    nome = (registro.get("nome") or "").strip()
+    if not nome:
+        return None
+
+    valores = {}
+    for campo in ("nome", "email", "telefone", "perfil_rede_social"):
+        valor = (registro.get(campo) or "").strip()
+        valores[campo] = valor[:LIMITES_CAMPOS[campo]]
+
+    data_nascimento = validar_data_nascimento(normalizar_data(registro.get("data_nascimento")))
+    if isinstance(data_nascimento, str):
+        data_nascimento = None
+
+    return (valores["nome"], valores["email"], valores["telefone"], data_nascimento,
+            valores["perfil_rede_social"], registro.get("notas") or "")
+
+
+def ler_registros(caminho, formato):
+    with open(caminho, "r", encoding="utf-8-sig", errors="replace", newline="") as arquivo:
+        if formato == "vcard":
+            yield from ler_vcards(arquivo)
+        else:
+            yield from ler_csv(arquivo)
+
+
+def importar_contatos(caminho, usuario_id, formato=None, tamanho_lote=None, progresso=None):
+    # Lê o arquivo de forma incremental e grava em transações de tamanho_lote contatos.
+    # progresso(resultado) é chamado após cada lote gravado.
+    formato = formato or detectar_formato(caminho)
+    tamanho_lote = tamanho_lote or config.IMPORTACAO_LOTE
+    resultado = ResultadoImportacao()
+
+    if not usuario_existe(usuario_id):
+        raise ValueError(f"Usuário com ID {usuario_id} não existe.")
+
+    inicio = time.perf_counter()
+    lote = []
+
+    def gravar_lote():
+        gravados = salvar_contatos_lote(usuario_id, lote)
+        resultado.importados += gravados
+        resultado.rejeitados += len(lote) - gravados
+        lote.clear()
+        resultado.duracao = time.perf_counter() - inicio
+        if progresso:
+            progresso(resultado)
+
+    for registro in ler_registros(caminho, formato):
+        contato = preparar_contato(registro)
+        if contato is None:
+            resultado.rejeitados += 1
+            continue
+        lote.append(contato)
+        if len(lote) >= tamanho_lote:
+            gravar_lote()
+
+    if lote:
+        gravar_lote()
+
+    resultado.duracao = time.perf_counter() - inicio
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa contatos de um arquivo CSV ou vCard.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--usuario", type=int, required=True, help="ID do usuário dono dos contatos")
+    parser.add_argument("--formato", choices=("csv", "vcard"), help="padrão: detectado pela extensão")
+    parser.add_argument("--lote", type=int, default=config.IMPORTACAO_LOTE, help="contatos por transação")
+    args = parser.parse_args()
+
+    def mostrar_progresso(resultado):
+        print(f"\r{resultado}", end="", flush=True)
+
+    try:
+        resultado = importar_contatos(args.arquivo, args.usuario, args.formato, args.lote, mostrar_progresso)
+    except (OSError, ValueError) as e:
+        print(f"Erro na importação: {e}")
+        return 1
+    print(f"\r{resultado}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# Índice em memória da busca da tela de contatos, com todos os contatos do usuário
+# (carregar_indice lê só as colunas da busca, em lotes, fora da thread da interface).
+# Cada contato vira um texto já normalizado (sem acentos, minúsculo; telefone também
+# só com dígitos), montado uma vez; cada busca só compara o termo com esses textos.
+#
+# Para tolerar erros de digitação ("silvs" acha "Silva") o índice também guarda, para
+# cada palavra (nome, email, perfil, notas), os contatos que a têm e, para cada
+# trigrama (três letras seguidas de uma palavra), as palavras que o têm. Nomes e
+# sobrenomes se repetem muito, então o vocabulário é bem menor que a agenda: a busca
+# acha as palavras parecidas com as do termo pelos trigramas em comum e só então chega
+# aos contatos. Os resultados mais relevantes saem de um heap limitado, sem ordenar todos
+# os candidatos.
+import heapq
+import re
+from collections import Counter, OrderedDict
+
+import config
+from bancodedados import percorrer_contatos
+from normalizacao import dobrar_texto, normalizar_email
+
+# Colunas lidas do banco para o índice, além de id e nome
+COLUNAS_BUSCA = ("telefone", "email", "perfil_rede_social", "notas")
+
+# Com menos letras que isso uma palavra do termo não entra na busca aproximada
+TAMANHO_MINIMO_APROXIMADO = 3
+
+# Buscas recentes (termos e palavras da busca aproximada) cujos resultados ficam
+# guardados para as seguintes; qualquer alteração no índice os descarta
+BUSCAS_RECENTES = 8
+
+_NAO_DIGITOS = re.compile(r"\D")
+_PALAVRAS = re.compile(r"\w+")
+
+
+def texto_busca(contato):
+    telefone = contato.get("telefone") or ""
+    # Um campo por linha: o termo (sem quebras de linha) não casa juntando dois campos
+    return "\n".join((dobrar_texto(contato.get("nome")), " ".join(telefone.lower().split()), _NAO_DIGITOS.sub("", telefone),
+                      normalizar_email(contato.get("email")), dobrar_texto(contato.get("perfil_rede_social")),
+                      dobrar_texto(contato.get("notas"))))
+
+
+def normalizar_termo(termo):
+    return dobrar_texto(termo)
+
+
+def palavras(texto):
+    # Palavras que entram na busca aproximada. Números (telefone, número da casa) ficam só
+    # na busca exata: todo telefone divide trigramas com milhares de outros (DDD, prefixo)
+    return {palavra for palavra in _PALAVRAS.findall(texto) if not palavra.isdigit()}
+
+
+def trigramas(palavra):
+    # Com um espaço de cada lado: "ana" -> " an", "ana", "na "
+    palavra = f" {palavra} "
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+def _guardar(recentes, chave, valor):
+    recentes[chave] = valor
+    recentes.move_to_end(chave)
+    if len(recentes) > BUSCAS_RECENTES:
+        recentes.popitem(last=False)
+
+
+class IndiceBusca(object):
+    def __init__(self, similaridade_minima=None):
+        self.similaridade_minima = config.BUSCA_SIMILARIDADE_MINIMA if similaridade_minima is None else similaridade_minima
+        self.textos = {}  # id -> texto normalizado
+        self.contatos = {}  # id -> id, nome e telefone: o que a lista exibe de cada resultado
+        self.ids_por_palavra = {}  # palavra -> ids dos contatos que a têm
+        self.palavras_por_trigrama = {}  # trigrama -> palavras do vocabulário que o têm
+        self.buscas_recentes = OrderedDict()  # termo -> (id, texto) de quem o contém
+        self.parecidas_recentes = OrderedDict()  # palavra -> {id: similaridade} dos parecidos
+
+    def __len__(self):
+        return len(self.textos)
+
+    def limpar(self):
+        self.textos.clear()
+        self.contatos.clear()
+        self.ids_por_palavra.clear()
+        self.palavras_por_trigrama.clear()
+        self._esquecer_buscas()
+
+    def adicionar(self, contato):
+        # Também serve para atualizar: as palavras do texto antigo saem antes
+        contato_id = contato["id"]
+        self.remover(contato_id)
+        self._esquecer_buscas()
+        texto = self.textos[contato_id] = texto_busca(contato)
+        self.contatos[contato_id] = {"id": contato_id, "nome": contato.get("nome"), "telefone": contato.get("telefone")}
+        for palavra in palavras(texto):
+            ids = self.ids_por_palavra.get(palavra)
+            if ids is not None:
+                ids.add(contato_id)
+                continue
+            # Palavra nova no vocabulário
+            self.ids_por_palavra[palavra] = {contato_id}
+            for trigrama in trigramas(palavra):
+                self.palavras_por_trigrama.setdefault(trigrama, set()).add(palavra)
+
+    def remover(self, contato_id):
+        texto = self.textos.pop(contato_id, None)
+        if texto is None:
+            return
+        del self.contatos[contato_id]
+        self._esquecer_buscas()
+        for palavra in palavras(texto):
+            ids = self.ids_por_palavra[palavra]
+            ids.discard(contato_id)
+            if ids:
+                continue
+            # Nenhum contato usa mais a palavra: sai do vocabulário
+            del self.ids_por_palavra[palavra]
+            for trigrama in trigramas(palavra):
+                vocabulario = self.palavras_por_trigrama[trigrama]
+                vocabulario.discard(palavra)
+                if not vocabulario:
+                    del self.palavras_por_trigrama[trigrama]
+
+    def _esquecer_buscas(self):
+        self.buscas_recentes.clear()
+        self.parecidas_recentes.clear()
+
+    def aplicar_alteracoes(self, alterados, excluidos):
+        # Delta da sincronização: contatos novos ou alterados e ids excluídos
+        for contato_id in excluidos:
+            self.remover(contato_id)
+        for contato in alterados:
+            self.adicionar(contato)
+
+    def _palavras_termo(self, termo):
+        return [palavra for palavra in palavras(termo) if len(palavra) >= TAMANHO_MINIMO_APROXIMADO]
+
+    def _parecidas(self, palavra):
+        # (palavra do vocabulário, similaridade) das que passam da similaridade mínima.
+        # Similaridade é o coeficiente de Dice dos trigramas (uma palavra de n letras tem n
+        # trigramas): 1.0 para palavras iguais sem trigramas repetidos, 0.6 para "silvs" e "silva"
+        procurados = trigramas(palavra)
+        comuns = Counter()
+        for trigrama in procurados:
+            vocabulario = self.palavras_por_trigrama.get(trigrama)
+            if vocabulario:
+                comuns.update(vocabulario)
+        for outra, quantidade in comuns.items():
+            similaridade = 2 * quantidade / (len(palavra) + len(outra))
+            if similaridade >= self.similaridade_minima:
+                yield outra, similaridade
+
+    def _contem(self, termo):
+        # (id, texto) de quem contém o termo (já normalizado). A digitação quase sempre só
+        # acrescenta letras: se um termo buscado há pouco está dentro deste, só quem continha
+        # aquele é percorrido, e não a agenda inteira
+        base = None
+        for anterior, encontrados in self.buscas_recentes.items():
+            if anterior in termo and (base is None or len(encontrados) < len(base)):
+                base = encontrados
+        candidatos = self.textos.items() if base is None else base
+        encontrados = [(contato_id, texto) for contato_id, texto in candidatos if termo in texto]
+        _guardar(self.buscas_recentes, termo, encontrados)
+        return encontrados
+
+    def _melhores(self, procurada):
+        # id -> similaridade da palavra do contato mais parecida com procurada
+        melhores = self.parecidas_recentes.get(procurada)
+        if melhores is None:
+            melhores = {}
+            for palavra, similaridade in self._parecidas(procurada):
+                for contato_id in self.ids_por_palavra[palavra]:
+                    if melhores.get(contato_id, 0.0) < similaridade:
+                        melhores[contato_id] = similaridade
+        _guardar(self.parecidas_recentes, procurada, melhores)
+        return melhores
+
+    def _aproximados(self, termo):
+        # id -> média das similaridades, entre os contatos que têm uma palavra parecida
+        # com cada palavra do termo (já normalizado)
+        procuradas = self._palavras_termo(termo)
+        if not procuradas:
+            return {}
+        pontos = None  # id -> soma das melhores similaridades das palavras já vistas
+        for procurada in procuradas:
+            melhores = self._melhores(procurada)
+            # Só continua quem tem uma palavra parecida com todas as do termo
+            if pontos is None:
+                pontos = melhores
+            else:
+                pontos = {contato_id: soma + melhores[contato_id] for contato_id, soma in pontos.items()
+                          if contato_id in melhores}
+            if not pontos:
+                return {}
+        return {contato_id: soma / len(procuradas) for contato_id, soma in pontos.items()}
+
+    def buscar(self, termo, limite=None):
+        # Os limite (padrão: AGENDA_LIMITE_BUSCA) contatos mais relevantes para o termo, do
+        # mais para o menos relevante. Quem contém o termo vem antes de quem só se parece
+        # com ele: primeiro quem tem o nome começando pelo termo, depois quem tem alguma
+        # palavra começando por ele e então quem o contém em qualquer ponto; os parecidos
+        # seguem pela similaridade (de 0 a 1). Empates ficam em ordem de nome (o texto
+        # começa pelo nome dobrado, a mesma chave da lista) e de id.
+        termo = normalizar_termo(termo)
+        limite = config.LIMITE_BUSCA if limite is None else limite
+        if limite <= 0:
+            return []
+        # (texto, id) de quem contém o termo, por nível; tuplas comparadas sem função de chave
+        no_nome, na_palavra, no_meio = [], [], []
+        inicio_palavra, inicio_campo = " " + termo, "\n" + termo
+        for contato_id, texto in self._contem(termo):
+            if texto.startswith(termo):
+                no_nome.append((texto, contato_id))
+            elif inicio_palavra in texto or inicio_campo in texto:
+                na_palavra.append((texto, contato_id))
+            else:
+                no_meio.append((texto, contato_id))
+
+        # Cada nível só é ordenado (por um heap limitado) enquanto faltam resultados, e
+        # os parecidos só são calculados se os que contêm o termo não bastarem
+        resultado = []
+        for nivel in (no_nome, na_palavra, no_meio):
+            resultado += [contato_id for _, contato_id in heapq.nsmallest(limite - len(resultado), nivel)]
+            if len(resultado) == limite:
+                return resultado
+        exatos = set(resultado)
+        parecidos = ((-similaridade, self.textos[contato_id], contato_id)
+                     for contato_id, similaridade in self._aproximados(termo).items() if contato_id not in exatos)
+        return resultado + [contato_id for _, _, contato_id in heapq.nsmallest(limite - len(resultado), parecidos)]
+
+
+def carregar_indice(usuario_id):
+    # Roda no executor: lê todos os contatos do usuário, só com as colunas da busca, e
+    # devolve o índice pronto para a thread da interface
+    indice = IndiceBusca()
+    for contato in percorrer_contatos(usuario_id, colunas=COLUNAS_BUSCA):
+        indice.adicionar(contato)
+    return indice
@@ -0,0 +1,437 @@
+# Lista de contatos em modelo/visão: o modelo guarda só os dicionários dos contatos
+# e o delegado desenha cada linha na hora de pintar. A QListView cria e pinta
+# apenas as linhas visíveis, então 100 contatos ou 100 mil custam o mesmo na tela.
+#
+# Alterações chegam por id (gravar_contato, remover_contatos): só as linhas afetadas
+# são inseridas, movidas ou removidas, e a posição vem de uma busca binária na ordem
+# da lista: chave_ordenacao (nome sem acentos nem maiúsculas, id), a mesma do banco.
+#
+# A lista pode ter só as primeiras páginas; a busca não depende delas. FiltroContatos
+# exibe o modelo ou, com um termo, os contatos encontrados no índice da busca
+# (indice_busca.py), que tem todos os contatos do usuário.
+from bisect import bisect_left
+
+from PySide6.QtCore import QAbstractListModel, QEvent, QModelIndex, QRect, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QPen
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+from cache_contatos import chave_ordenacao
+import config
+from indice_busca import normalizar_termo
+import recursos
+
+ALTURA_LINHA = 40
+LADO_MARCA = 16
+LADO_EDITAR = 24
+ESPACAMENTO = 10
+
+COR_TEXTO = QColor(255, 255, 255)
+COR_SEPARADOR = QColor(80, 80, 100)
+COR_DESTAQUE = QColor(60, 70, 95)
+
+# Papel com o id do contato da linha
+IdRole = Qt.UserRole + 1
+
+# Acima de tantas alterações de uma vez, recriar a lista sai mais barato que uma linha por vez
+LIMITE_ALTERACOES_INCREMENTAIS = 500
+
+
+def texto_contato(contato):
+    return f"{contato.get('nome', 'Sem Nome')} - {contato.get('telefone', 'Sem Telefone')}"
+
+
+def _chave(contato):
+    return chave_ordenacao(contato["nome"], contato["id"])
+
+
+def _mantidos(ids, posicao_nova):
+    # ids (na ordem atual) da maior sequência que já está na ordem nova: a subsequência
+    # crescente mais longa das posições novas, pelo método da paciência (n log n)
+    topos = []  # posição nova no topo de cada pilha
+    ids_topos = []
+    anterior = {}  # id -> id que vem antes dele na sequência que termina nele
+    for contato_id in ids:
+        posicao = posicao_nova.get(contato_id)
+        if posicao is None:
+            continue
+        pilha = bisect_left(topos, posicao)
+        anterior[contato_id] = ids_topos[pilha - 1] if pilha else None
+        if pilha == len(topos):
+            topos.append(posicao)
+            ids_topos.append(contato_id)
+        else:
+            topos[pilha] = posicao
+            ids_topos[pilha] = contato_id
+    mantidos = set()
+    contato_id = ids_topos[-1] if ids_topos else None
+    while contato_id is not None:
+        mantidos.add(contato_id)
+        contato_id = anterior[contato_id]
+    return mantidos
+
+
+def dado_contato(contato, marcados, role):
+    if role == Qt.DisplayRole:
+        return texto_contato(contato)
+    if role == Qt.CheckStateRole:
+        return Qt.Checked if contato["id"] in marcados else Qt.Unchecked
+    if role == IdRole:
+        return contato["id"]
+    return None
+
+
+class ModeloContatos(QAbstractListModel):
+    marcacao_alterada = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.contatos = []
+        self.por_id = {}  # id -> contato exibido; a linha sai da busca binária pela chave
+        self.marcados = set()  # ids marcados; sobrevive às trocas da lista
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.contatos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.dado(index.row(), role)
+
+    def dado(self, linha, role):
+        return dado_contato(self.contatos[linha], self.marcados, role)
+
+    def setData(self, index, valor, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        self.marcar(self.contatos[index.row()]["id"], Qt.CheckState(valor) == Qt.Checked)
+        return True
+
+    def marcar(self, contato_id, marcado):
+        # O contato pode não estar nas páginas carregadas (marcado num resultado da busca)
+        if marcado:
+            self.marcados.add(contato_id)
+        else:
+            self.marcados.discard(contato_id)
+        linha = self.linha_do_contato(contato_id)
+        if linha is not None:
+            self.dataChanged.emit(self.index(linha), self.index(linha), [Qt.CheckStateRole])
+        self.marcacao_alterada.emit()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def definir_contatos(self, contatos):
+        self.beginResetModel()
+        self.contatos = list(contatos)
+        self.por_id = {contato["id"]: contato for contato in self.contatos}
+        self.endResetModel()
+
+    def acrescentar(self, contatos):
+        if not contatos:
+            return
+        inicio = len(self.contatos)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(contatos) - 1)
+        self.contatos.extend(contatos)
+        self.por_id.update((contato["id"], contato) for contato in contatos)
+        self.endInsertRows()
+
+    def linha_do_contato(self, contato_id):
+        contato = self.por_id.get(contato_id)
+        if contato is None:
+            return None
+        # A lista está sempre na ordem de _chave, a mesma do banco (nome_ordenacao, id)
+        return bisect_left(self.contatos, _chave(contato), key=_chave)
+
+    def gravar_contato(self, contato, incluir_no_fim=True):
+        # Insere o contato na posição da ordem ou, se já está na lista, atualiza a linha e
+        # a move se o nome mudou. Com incluir_no_fim=False (nem todas as páginas foram
+        # carregadas) um contato que iria depois da última linha fica para as próximas páginas.
+        antiga = self.linha_do_contato(contato["id"])
+        if antiga is not None and self.contatos[antiga] == contato:
+            return
+        nova = bisect_left(self.contatos, _chave(contato), key=_chave)
+        if antiga is None:
+            if nova == len(self.contatos) and not incluir_no_fim:
+                return
+            self.beginInsertRows(QModelIndex(), nova, nova)
+            self.contatos.insert(nova, contato)
+            self.por_id[contato["id"]] = contato
+            self.endInsertRows()
+        elif nova in (antiga, antiga + 1):
+            self.contatos[antiga] = contato
+            self.por_id[contato["id"]] = contato
+            self.dataChanged.emit(self.index(antiga), self.index(antiga))
+        elif nova == len(self.contatos) and not incluir_no_fim:
+            self.remover_contatos([contato["id"]])
+        else:
+            # nova conta a linha antiga ainda no lugar, como beginMoveRows espera
+            self.beginMoveRows(QModelIndex(), antiga, antiga, QModelIndex(), nova)
+            del self.contatos[antiga]
+            self.contatos.insert(nova - 1 if nova > antiga else nova, contato)
+            self.por_id[contato["id"]] = contato
+            self.endMoveRows()
+
+    def remover_contatos(self, ids):
+        for contato_id in ids:
+            linha = self.linha_do_contato(contato_id)
+            if linha is None:
+                continue
+            self.beginRemoveRows(QModelIndex(), linha, linha)
+            del self.contatos[linha]
+            del self.por_id[contato_id]
+            self.endRemoveRows()
+
+    def aplicar_alteracoes(self, alterados, excluidos, incluir_no_fim=True):
+        # Delta da sincronização: contatos novos ou alterados e ids excluídos
+        if len(alterados) + len(excluidos) <= LIMITE_ALTERACOES_INCREMENTAIS:
+            self.remover_contatos(excluidos)
+            for contato in alterados:
+                self.gravar_contato(contato, incluir_no_fim)
+            return
+
+        excluidos = set(excluidos)
+        alterados = {contato["id"]: contato for contato in alterados}
+        contatos = [alterados.pop(contato["id"], contato) for contato in self.contatos if contato["id"] not in excluidos]
+        if incluir_no_fim:
+            contatos.extend(alterados.values())
+        elif contatos:
+            ultimo = _chave(contatos[-1])
+            contatos.extend(contato for contato in alterados.values() if _chave(contato) < ultimo)
+        contatos.sort(key=_chave)
+        self.definir_contatos(contatos)
+
+    def marcacoes_alteradas(self):
+        # marcados foi alterado por fora (seleção limpa, contatos excluídos)
+        if self.contatos:
+            self.dataChanged.emit(self.index(0), self.index(len(self.contatos) - 1), [Qt.CheckStateRole])
+
+
+class FiltroContatos(QAbstractListModel):
+    # Lista exibida. Sem termo de busca repassa o ModeloContatos, linha a linha; com
+    # termo, self.ids guarda os contatos encontrados no índice da busca (IndiceBusca.buscar),
+    # do mais relevante para o menos ou, com por_nome (AGENDA_BUSCA_ORDEM=nome), em ordem
+    # de nome, e cada linha é desenhada com o registro guardado no índice: um resultado
+    # não precisa estar nas páginas já carregadas. De um termo para o seguinte só as
+    # linhas que mudam são removidas e inseridas (_trocar_ids), sem recriar a lista
+    # nem perder a rolagem; só a passagem entre o modelo e os resultados recria a lista.
+    # Enquanto o índice não fica pronto o termo espera e o modelo continua exibido.
+    # Não é um QSortFilterProxyModel com um invalidateFilter por termo: ele só filtraria
+    # as linhas carregadas do modelo, chamaria filterAcceptsRow (Python) para cada uma
+    # a cada tecla e não segue a ordem de relevância do índice. Os vários pares
+    # begin/end de _trocar_ids são um por trecho contíguo que muda, limitados ao
+    # LIMITE_BUSCA de resultados. É um QAbstractListModel, e não um QAbstractProxyModel,
+    # para que index() continue em C++: a QListView o chama para cada linha a cada layout.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.modelo = None
+        self.indice = None
+        self.termo = ""
+        self.ids = None
+        self.por_nome = config.BUSCA_ORDEM == "nome"
+
+    def definir_modelo(self, modelo):
+        self.beginResetModel()
+        self.modelo = modelo
+        modelo.modelAboutToBeReset.connect(self._antes_de_recriar)
+        modelo.modelReset.connect(self._modelo_recriado)
+        modelo.rowsAboutToBeInserted.connect(self._antes_de_inserir)
+        modelo.rowsInserted.connect(self._inseridas)
+        modelo.rowsAboutToBeRemoved.connect(self._antes_de_remover)
+        modelo.rowsRemoved.connect(self._removidas)
+        modelo.rowsAboutToBeMoved.connect(self._antes_de_mover)
+        modelo.rowsMoved.connect(self._movidas)
+        modelo.dataChanged.connect(self._dados_alterados)
+        self.endResetModel()
+
+    def definir_indice(self, indice):
+        self.indice = indice
+        self.reaplicar()
+
+    def filtrar(self, termo):
+        termo = normalizar_termo(termo)
+        if termo == self.termo:
+            return
+        self.termo = termo
+        self._buscar()
+
+    def reaplicar(self):
+        # O índice mudou: refaz a busca e redesenha as linhas que ficaram, porque um
+        # contato pode ter sido editado sem sair do resultado
+        self._buscar()
+        if self.ids:
+            self.dataChanged.emit(self.index(0), self.index(len(self.ids) - 1), [Qt.DisplayRole])
+
+    def _buscar(self):
+        ids = None
+        if self.termo and self.indice is not None:
+            ids = self.indice.buscar(self.termo)
+            if self.por_nome:
+                ids.sort(key=lambda contato_id: _chave(self.indice.contatos[contato_id]))
+        if ids is None and self.ids is None:
+            return
+        if ids is None or self.ids is None:
+            self.beginResetModel()
+            self.ids = ids
+            self.endResetModel()
+            return
+        self._trocar_ids(ids)
+
+    def _trocar_ids(self, novos):
+        # Ficam as linhas da maior sequência que já está na ordem nova; as demais saem e
+        # os contatos que entraram ou mudaram de lugar são inseridos na posição nova.
+        # Linhas seguidas saem e entram num sinal só
+        mantidos = _mantidos(self.ids, {contato_id: posicao for posicao, contato_id in enumerate(novos)})
+        fim = len(self.ids)
+        while fim > 0:
+            inicio = fim
+            while inicio > 0 and self.ids[inicio - 1] not in mantidos:
+                inicio -= 1
+            if inicio < fim:
+                self.beginRemoveRows(QModelIndex(), inicio, fim - 1)
+                del self.ids[inicio:fim]
+                self.endRemoveRows()
+            fim = inicio - 1
+
+        # Agora self.ids é uma subsequência de novos, na mesma ordem
+        inicio = 0
+        while inicio < len(novos):
+            if inicio < len(self.ids) and self.ids[inicio] == novos[inicio]:
+                inicio += 1
+                continue
+            fim = inicio
+            while fim < len(novos) and novos[fim] not in mantidos:
+                fim += 1
+            self.beginInsertRows(QModelIndex(), inicio, fim - 1)
+            self.ids[inicio:inicio] = novos[inicio:fim]
+            self.endInsertRows()
+            inicio = fim
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.modelo is None:
+            return 0
+        return len(self.modelo.contatos) if self.ids is None else len(self.ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if self.ids is None:
+            return self.modelo.dado(index.row(), role)
+        return dado_contato(self.indice.contatos[self.ids[index.row()]], self.modelo.marcados, role)
+
+    def setData(self, index, valor, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        if self.ids is None:
+            # O modelo emite dataChanged, que volta para cá por _dados_alterados
+            return self.modelo.setData(self.modelo.index(index.row()), valor, role)
+        if role != Qt.CheckStateRole:
+            return False
+        self.modelo.marcar(self.ids[index.row()], Qt.CheckState(valor) == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def flags(self, index):
+        return self.modelo.flags(index)
+
+    # Sem termo as alterações do modelo passam direto; com termo a lista vem do índice
+    # e só muda em filtrar e reaplicar
+
+    def _antes_de_recriar(self):
+        if self.ids is None:
+            self.beginResetModel()
+
+    def _modelo_recriado(self):
+        if self.ids is None:
+            self.endResetModel()
+
+    def _antes_de_inserir(self, parent, primeira, ultima):
+        if self.ids is None:
+            self.beginInsertRows(QModelIndex(), primeira, ultima)
+
+    def _inseridas(self, parent, primeira, ultima):
+        if self.ids is None:
+            self.endInsertRows()
+
+    def _antes_de_remover(self, parent, primeira, ultima):
+        if self.ids is None:
+            self.beginRemoveRows(QModelIndex(), primeira, ultima)
+
+    def _removidas(self, parent, primeira, ultima):
+        if self.ids is None:
+            self.endRemoveRows()
+
+    def _antes_de_mover(self, parent, origem, _, destino_parent, destino):
+        # O modelo só move uma linha por vez (gravar_contato)
+        if self.ids is None:
+            self.beginMoveRows(QModelIndex(), origem, origem, QModelIndex(), destino)
+
+    def _movidas(self, parent, origem, _, destino_parent, destino):
+        if self.ids is None:
+            self.endMoveRows()
+
+    def _dados_alterados(self, inicio, fim, papeis=()):
+        if self.ids is None:
+            self.dataChanged.emit(self.index(inicio.row()), self.index(fim.row()), papeis)
+        elif list(papeis) == [Qt.CheckStateRole] and self.ids:
+            # As marcas valem para as duas listas
+            self.dataChanged.emit(self.index(0), self.index(len(self.ids) - 1), papeis)
+
+
+class DelegadoContato(QStyledItemDelegate):
+    editar_clicado = Signal(object)  # id do contato
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ALTURA_LINHA)
+
+    def _retangulos(self, option, index):
+        # (marca, texto, ícone de editar) dentro da linha, alinhados à esquerda; o texto
+        # usa a fonte da lista
+        linha = option.rect
+        marca = QRect(linha.left() + 5, linha.center().y() - LADO_MARCA // 2, LADO_MARCA, LADO_MARCA)
+        # +1: a largura inteira arredonda para baixo e faria o texto ser cortado
+        largura_texto = option.fontMetrics.horizontalAdvance(index.data(Qt.DisplayRole)) + 1
+        maximo_texto = linha.right() - marca.right() - 3 * ESPACAMENTO - LADO_EDITAR
+        texto = QRect(marca.right() + ESPACAMENTO, linha.top(), max(0, min(largura_texto, maximo_texto)), linha.height())
+        editar = QRect(texto.right() + ESPACAMENTO, linha.center().y() - LADO_EDITAR // 2, LADO_EDITAR, LADO_EDITAR)
+        return marca, texto, editar
+
+    def paint(self, painter, option, index):
+        marca, texto, editar = self._retangulos(option, index)
+        painter.save()
+        if option.state & QStyle.State_MouseOver:
+            painter.fillRect(option.rect, COR_DESTAQUE)
+
+        opcao_marca = QStyleOptionButton()
+        opcao_marca.rect = marca
+        opcao_marca.state = QStyle.State_Enabled
+        opcao_marca.state |= QStyle.State_On if index.data(Qt.CheckStateRole) == Qt.Checked else QStyle.State_Off
+        estilo = option.widget.style() if option.widget else QApplication.style()
+        estilo.drawPrimitive(QStyle.PE_IndicatorCheckBox, opcao_marca, painter, option.widget)
+
+        painter.setFont(option.font)
+        painter.setPen(COR_TEXTO)
+        exibido = option.fontMetrics.elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, texto.width())
+        painter.drawText(texto, Qt.AlignVCenter | Qt.AlignLeft, exibido)
+        # Já no tamanho do ícone e na densidade da tela: desenhar não reescala nada
+        painter.drawPixmap(editar, recursos.pixmap("yy.png", LADO_EDITAR, escala=painter.device().devicePixelRatioF()))
+
+        painter.setPen(QPen(COR_SEPARADOR))
+        painter.drawLine(option.rect.bottomLeft(), option.rect.bottomRight())
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        # Cliques na marca alternam a seleção; no ícone, abrem a edição
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        marca, _, editar = self._retangulos(option, index)
+        posicao = event.position().toPoint()
+        if marca.adjusted(-4, -4, 4, 4).contains(posicao):
+            marcado = index.data(Qt.CheckStateRole) == Qt.Checked
+            return model.setData(index, Qt.Unchecked if marcado else Qt.Checked, Qt.CheckStateRole)
+        if editar.contains(posicao):
+            self.editar_clicado.emit(index.data(IdRole))
+            return True
+        return False
@@ -0,0 +1,268 @@
+# Tempo gasto em cada operação de bancodedados e em cada instrução SQL.
+#
+# As operações públicas de bancodedados são decoradas com @medido (e chamam
+# registrar_erro nos erros que tratam) e os cursores emprestados pelo pool passam
+# por CursorMedido. Instruções mais lentas que AGENDA_METRICAS_CONSULTA_LENTA_MS
+# entram no log de consultas lentas, com o SQL e só o formato dos parâmetros
+# (tipos), nunca os valores.
+#
+# Para ler: metricas.estatisticas() / metricas.relatorio() no próprio processo, ou
+# defina AGENDA_METRICAS_ARQUIVO para gravar um JSON ao sair e rode
+#     python metricas.py metricas.json
+import argparse
+import atexit
+import functools
+import json
+import re
+import threading
+import time
+from collections import deque
+
+import config
+from registro import obter_logger
+
+log = obter_logger("metricas")
+
+# Limites superiores (ms) das faixas dos histogramas; a última faixa é "acima de 5000"
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Evita que SQL montado dinamicamente crie entradas sem fim
+MAX_INSTRUCOES = 500
+
+
+class Histograma(object):
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_MS) + 1)
+        self.total = 0
+        self.soma_ms = 0.0
+        self.maximo_ms = 0.0
+
+    def registrar(self, ms):
+        faixa = 0
+        while faixa < len(LIMITES_MS) and ms > LIMITES_MS[faixa]:
+            faixa += 1
+        self.contagens[faixa] += 1
+        self.total += 1
+        self.soma_ms += ms
+        if ms > self.maximo_ms:
+            self.maximo_ms = ms
+
+    def percentil(self, p):
+        # Limite superior da faixa onde cai o percentil p (0-100)
+        if not self.total:
+            return 0.0
+        alvo = self.total * p / 100.0
+        acumulado = 0
+        for faixa, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                return float(LIMITES_MS[faixa]) if faixa < len(LIMITES_MS) else self.maximo_ms
+        return self.maximo_ms
+
+    def como_dict(self):
+        return {
+            "total": self.total,
+            "soma_ms": round(self.soma_ms, 3),
+            "media_ms": round(self.soma_ms / self.total, 3) if self.total else 0.0,
+            "maximo_ms": round(self.maximo_ms, 3),
+            "p50_ms": self.percentil(50),
+            "p90_ms": self.percentil(90),
+            "p99_ms": self.percentil(99),
+            "faixas_ms": dict(zip([str(limite) for limite in LIMITES_MS] + ["+"], self.contagens)),
+        }
+
+
+class _Medida(object):
+    def __init__(self):
+        self.erros = 0
+        self.histograma = Histograma()
+
+
+_lock = threading.Lock()
+_operacoes = {}
+_instrucoes = {}
+_lentas = deque(maxlen=config.METRICAS_LENTAS_GUARDADAS)
+
+
+def _registrar(tabela, chave, ms, erro):
+    with _lock:
+        medida = tabela.get(chave)
+        if medida is None:
+            if tabela is _instrucoes and len(tabela) >= MAX_INSTRUCOES:
+                chave = "(outras)"
+                medida = tabela.get(chave)
+            if medida is None:
+                medida = tabela[chave] = _Medida()
+        medida.histograma.registrar(ms)
+        if erro:
+            medida.erros += 1
+
+
+# Pilha, por thread, das operações medidas em andamento: True quando a operação registrou
+# um erro que ela mesma tratou
+_em_andamento = threading.local()
+
+
+def registrar_erro():
+    # As operações de bancodedados tratam o erro e devolvem False, None ou [] em vez de
+    # deixá-lo subir; o tratamento chama isto para que o erro conte na operação em andamento
+    pilha = getattr(_em_andamento, "pilha", None)
+    if pilha:
+        pilha[-1] = True
+
+
+def medido(funcao):
+    # Conta chamadas, erros (exceções e registrar_erro) e latência da operação, pelo nome da função
+    if not config.METRICAS:
+        return funcao
+
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        pilha = getattr(_em_andamento, "pilha", None)
+        if pilha is None:
+            pilha = _em_andamento.pilha = []
+        pilha.append(False)
+        inicio = time.perf_counter()
+        erro = True
+        try:
+            resultado = funcao(*args, **kwargs)
+            erro = False
+            return resultado
+        finally:
+            erro = pilha.pop() or erro
+            _registrar(_operacoes, nome, (time.perf_counter() - inicio) * 1000.0, erro)
+    return envolvida
+
+
+def normalizar_sql(sql):
+    sql = re.sub(r"\s+", " ", sql).strip()
+    # Listas IN (%s, %s, ...) de tamanhos diferentes contam como a mesma instrução
+    return re.sub(r"%s(?:, ?%s)+", "%s, ...", sql)
+
+
+def formato_parametros(parametros, lote=False):
+    # Só os tipos: os valores (nomes, emails, senhas) nunca vão para o log
+    def formato(linha):
+        # Tipos repetidos em sequência são agrupados: listas IN viram "(500 x int)"
+        grupos = []
+        for valor in linha or ():
+            tipo = type(valor).__name__
+            if grupos and grupos[-1][0] == tipo:
+                grupos[-1][1] += 1
+            else:
+                grupos.append([tipo, 1])
+        return "(" + ", ".join(tipo if n == 1 else f"{n} x {tipo}" for tipo, n in grupos) + ")"
+    if lote:
+        linhas = list(parametros or ())
+        return f"{len(linhas)} x {formato(linhas[0]) if linhas else '()'}"
+    return formato(parametros)
+
+
+def _registrar_instrucao(sql, parametros, ms, erro, lote=False):
+    sql = normalizar_sql(sql)
+    _registrar(_instrucoes, sql, ms, erro)
+    limite = config.METRICAS_CONSULTA_LENTA_MS
+    if limite >= 0 and ms >= limite:
+        registro = {
+            "momento": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duracao_ms": round(ms, 3),
+            "sql": sql,
+            "parametros": formato_parametros(parametros, lote),
+            "erro": erro,
+        }
+        with _lock:
+            _lentas.append(registro)
+        log.warning("Consulta lenta (%.1f ms): %s %s", registro["duracao_ms"], sql, registro["parametros"])
+
+
+class CursorMedido(object):
+    # Mesma interface do cursor envolvido; mede execute() e executemany()
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        erro = True
+        try:
+            resultado = self._cursor.execute(sql, parametros)
+            erro = False
+            return resultado
+        finally:
+            _registrar_instrucao(sql, parametros, (time.perf_counter() - inicio) * 1000.0, erro)
+
+    def executemany(self, sql, lista_parametros):
+        lista_parametros = list(lista_parametros)
+        inicio = time.perf_counter()
+        erro = True
+        try:
+            resultado = self._cursor.executemany(sql, lista_parametros)
+            erro = False
+            return resultado
+        finally:
+            _registrar_instrucao(sql, lista_parametros, (time.perf_counter() - inicio) * 1000.0, erro, lote=True)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+def estatisticas():
+    with _lock:
+        return {
+            "operacoes": {nome: dict(medida.histograma.como_dict(), erros=medida.erros)
+                          for nome, medida in _operacoes.items()},
+            "instrucoes": {sql: dict(medida.histograma.como_dict(), erros=medida.erros)
+                           for sql, medida in _instrucoes.items()},
+            "lentas": list(_lentas),
+        }
+
+
+def zerar():
+    with _lock:
+        _operacoes.clear()
+        _instrucoes.clear()
+        _lentas.clear()
+
+
+def relatorio(dados=None, limite=20):
+    # Tabela de texto ordenada pelo tempo total, que mostra onde a latência se concentra
+    dados = dados or estatisticas()
+    linhas = []
+    for titulo, chave in (("Operações", "operacoes"), ("Instruções SQL", "instrucoes")):
+        itens = sorted(dados[chave].items(), key=lambda item: item[1]["soma_ms"], reverse=True)[:limite]
+        linhas.append(titulo)
+        linhas.append(f"  {'total ms':>10} {'chamadas':>9} {'erros':>6} {'média':>8} {'p50':>7} {'p99':>7} {'máx':>9}  nome")
+        for nome, medida in itens:
+            linhas.append(f"  {medida['soma_ms']:>10.1f} {medida['total']:>9} {medida['erros']:>6} "
+                          f"{medida['media_ms']:>8.2f} {medida['p50_ms']:>7.0f} {medida['p99_ms']:>7.0f} "
+                          f"{medida['maximo_ms']:>9.1f}  {nome[:100]}")
+        linhas.append("")
+    if dados["lentas"]:
+        linhas.append(f"Consultas lentas (últimas {len(dados['lentas'])})")
+        for registro in dados["lentas"]:
+            linhas.append(f"  {registro['momento']} {registro['duracao_ms']:>9.1f} ms  "
+                          f"{registro['sql'][:100]} {registro['parametros']}")
+    return "\n".join(linhas)
+
+
+def salvar(caminho):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(estatisticas(), arquivo, ensure_ascii=False, indent=2)
+
+
+if config.METRICAS and config.METRICAS_ARQUIVO:
+    atexit.register(salvar, config.METRICAS_ARQUIVO)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mostra as métricas gravadas pelo app (AGENDA_METRICAS_ARQUIVO).")
+    parser.add_argument("arquivo", help="JSON gravado ao sair do app")
+    parser.add_argument("--limite", type=int, default=20, help="linhas por tabela (padrão: 20)")
+    args = parser.parse_args(argv)
+    with open(args.arquivo, encoding="utf-8") as arquivo:
+        print(relatorio(json.load(arquivo), args.limite))
+
+
+if __name__ == "__main__":
+    main()
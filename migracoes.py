@@ -0,0 +1,348 @@
+# Migrações de esquema numeradas, registradas na tabela schema_version.
+#
+# Cada passo é idempotente (verifica tabelas, colunas e índices antes de criá-los),
+# então pode rodar sobre um banco antigo, criado pelas versões que recriavam a
+# tabela contatos, sem perder dados. Para aplicar as pendentes:
+#     python migracoes.py
+from bancodedados import backend, conectar, ErroBanco, SQL_AGORA, _gravar_foto
+from normalizacao import chave_nome, normalizar_telefone
+from registro import obter_logger
+
+log = obter_logger("migracoes")
+
+SQL_SCHEMA_VERSION = {
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INT PRIMARY KEY,
+            descricao VARCHAR(255) NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+
+def _colunas_tabela(cursor, tabela):
+    if backend.nome == "sqlite":
+        # table_xinfo inclui as colunas geradas (003), que o table_info esconde
+        cursor.execute(f"PRAGMA table_xinfo({tabela})")
+        return [linha[1] for linha in cursor.fetchall()]
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (tabela,))
+    return [linha[0] for linha in cursor.fetchall()]
+
+
+def _indices_tabela(cursor, tabela):
+    if backend.nome == "sqlite":
+        cursor.execute(f"PRAGMA index_list({tabela})")
+        return [linha[1] for linha in cursor.fetchall()]
+    cursor.execute(
+        "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (tabela,))
+    return [linha[0] for linha in cursor.fetchall()]
+
+
+def _adicionar_coluna(cursor, tabela, coluna, definicoes):
+    # definicoes: {"mysql": "...", "sqlite": "..."} com o tipo e os modificadores da coluna
+    if coluna not in _colunas_tabela(cursor, tabela):
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicoes[backend.nome]}")
+
+
+def _criar_indice(cursor, tabela, nome, colunas):
+    # O MySQL não tem CREATE INDEX IF NOT EXISTS
+    if nome not in _indices_tabela(cursor, tabela):
+        cursor.execute(f"CREATE INDEX {nome} ON {tabela} ({colunas})")
+
+
+def _m001_tabelas_base(cursor):
+    if backend.nome == "sqlite":
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                contato TEXT,
+                senha_hash TEXT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contatos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER,
+                nome TEXT,
+                telefone TEXT,
+                email TEXT,
+                perfil_rede_social TEXT,
+                notas TEXT,
+                data_nascimento DATE,
+                FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                nome VARCHAR(255) NOT NULL,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                contato VARCHAR(20),
+                senha_hash VARCHAR(256) NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contatos (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                usuario_id INT,
+                nome VARCHAR(255),
+                telefone VARCHAR(20),
+                email VARCHAR(255),
+                perfil_rede_social VARCHAR(255),
+                notas TEXT,
+                data_nascimento DATE,
+                FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+            )
+        """)
+
+    # O agenda.db distribuído foi criado com a coluna "senha"; o código usa "senha_hash"
+    colunas = _colunas_tabela(cursor, "usuarios")
+    if "senha" in colunas and "senha_hash" not in colunas:
+        cursor.execute("ALTER TABLE usuarios RENAME COLUMN senha TO senha_hash")
+
+
+def _m002_indices_contatos(cursor):
+    # Lista ordenada e paginação por (nome, id); o id já vai implícito no índice (InnoDB e SQLite).
+    # A collation padrão do MySQL não diferencia maiúsculas, então serve também à busca por prefixo.
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_nome", "usuario_id, nome")
+    if backend.nome == "sqlite":
+        # O LIKE do SQLite só usa índice para prefixo quando o índice é NOCASE
+        _criar_indice(cursor, "contatos", "idx_contatos_busca_nome", "usuario_id, nome COLLATE NOCASE")
+        _criar_indice(cursor, "contatos", "idx_contatos_busca_telefone", "usuario_id, telefone COLLATE NOCASE")
+        _criar_indice(cursor, "contatos", "idx_contatos_busca_email", "usuario_id, email COLLATE NOCASE")
+    else:
+        _criar_indice(cursor, "contatos", "idx_contatos_usuario_telefone", "usuario_id, telefone")
+        _criar_indice(cursor, "contatos", "idx_contatos_usuario_email", "usuario_id, email")
+
+
+def _m003_colunas_aniversario(cursor):
+    # Colunas geradas a partir de data_nascimento; o SQLite só aceita VIRTUAL em ALTER TABLE
+    _adicionar_coluna(cursor, "contatos", "mes_nascimento", {
+        "mysql": "TINYINT GENERATED ALWAYS AS (MONTH(data_nascimento)) STORED",
+        "sqlite": "INTEGER GENERATED ALWAYS AS (CAST(strftime('%m', data_nascimento) AS INTEGER)) VIRTUAL",
+    })
+    _adicionar_coluna(cursor, "contatos", "dia_nascimento", {
+        "mysql": "TINYINT GENERATED ALWAYS AS (DAYOFMONTH(data_nascimento)) STORED",
+        "sqlite": "INTEGER GENERATED ALWAYS AS (CAST(strftime('%d', data_nascimento) AS INTEGER)) VIRTUAL",
+    })
+    # Aniversariantes de um usuário e de todos os usuários (rotina diária)
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_aniversario", "usuario_id, mes_nascimento, dia_nascimento")
+    _criar_indice(cursor, "contatos", "idx_contatos_aniversario", "mes_nascimento, dia_nascimento")
+
+
+def _m004_repositorio_fotos(cursor):
+    # Fotos endereçadas pelo SHA-256 do conteúdo: imagens iguais são gravadas uma vez só
+    # e a linha do usuário guarda apenas a referência (foto_hash)
+    if backend.nome == "sqlite":
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fotos (
+                hash TEXT PRIMARY KEY,
+                dados BLOB NOT NULL,
+                tamanho INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fotos_miniaturas (
+                hash TEXT NOT NULL,
+                lado INTEGER NOT NULL,
+                dados BLOB NOT NULL,
+                PRIMARY KEY (hash, lado)
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fotos (
+                hash CHAR(64) PRIMARY KEY,
+                dados MEDIUMBLOB NOT NULL,
+                tamanho INT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fotos_miniaturas (
+                hash CHAR(64) NOT NULL,
+                lado SMALLINT NOT NULL,
+                dados BLOB NOT NULL,
+                PRIMARY KEY (hash, lado)
+            )
+        """)
+    _adicionar_coluna(cursor, "usuarios", "foto_hash", {"mysql": "CHAR(64)", "sqlite": "TEXT"})
+
+    # Move os BLOBs antigos de usuarios.foto para a tabela fotos, um usuário por vez
+    if "foto" not in _colunas_tabela(cursor, "usuarios"):
+        return
+    cursor.execute("SELECT id FROM usuarios WHERE foto IS NOT NULL")
+    for (usuario_id,) in cursor.fetchall():
+        cursor.execute("SELECT foto FROM usuarios WHERE id = %s", (usuario_id,))
+        dados = cursor.fetchone()[0]
+        foto_hash = _gravar_foto(cursor, bytes(dados))
+        cursor.execute("UPDATE usuarios SET foto_hash = %s, foto = NULL WHERE id = %s", (foto_hash, usuario_id))
+
+
+def _m005_sincronizacao_contatos(cursor):
+    # atualizado_em marca cada gravação (horário do servidor) e excluido guarda a
+    # exclusão como lápide, para que obter_contatos_desde devolva só o que mudou
+    _adicionar_coluna(cursor, "contatos", "atualizado_em", {
+        "mysql": "DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)",
+        "sqlite": "DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'",
+    })
+    _adicionar_coluna(cursor, "contatos", "excluido", {
+        "mysql": "TINYINT(1) NOT NULL DEFAULT 0",
+        "sqlite": "INTEGER NOT NULL DEFAULT 0",
+    })
+    if backend.nome == "sqlite":
+        # O SQLite não aceita default não constante em ADD COLUMN
+        cursor.execute(f"UPDATE contatos SET atualizado_em = {SQL_AGORA['sqlite']} WHERE atualizado_em = '1970-01-01 00:00:00'")
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_atualizado", "usuario_id, atualizado_em")
+
+
+def _m006_telefone_normalizado(cursor):
+    # Telefone em E.164 ("+5511999999999") para achar um contato pelo número com o
+    # índice, qualquer que seja a forma como foi digitado; NULL se não der para normalizar
+    _adicionar_coluna(cursor, "contatos", "telefone_normalizado", {"mysql": "VARCHAR(16)", "sqlite": "TEXT"})
+
+    # Preenche os contatos existentes em blocos, pela chave primária; atualizado_em
+    # não muda porque nenhum dado visível ao usuário mudou
+    ultimo_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, telefone FROM contatos
+            WHERE id > %s AND telefone IS NOT NULL AND telefone_normalizado IS NULL
+            ORDER BY id LIMIT 5000
+        """, (ultimo_id,))
+        linhas = cursor.fetchall()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1][0]
+        valores = [(normalizar_telefone(telefone), contato_id) for contato_id, telefone in linhas]
+        valores = [(numero, contato_id) for numero, contato_id in valores if numero]
+        if valores:
+            cursor.executemany("UPDATE contatos SET telefone_normalizado = %s WHERE id = %s", valores)
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_telefone", "usuario_id, telefone_normalizado")
+
+
+def _m007_indice_telefone_normalizado(cursor):
+    # A 006 dá ao índice o nome idx_contatos_usuario_telefone, que no MySQL já é o de
+    # (usuario_id, telefone) criado pela 002: _criar_indice pula e o telefone normalizado
+    # fica sem índice. Este é o único lugar que cria o índice com nome próprio. No SQLite
+    # o da 006 indexa a mesma coluna e sai; no MySQL o da 002 fica, porque indexa o
+    # telefone como digitado, usado pela busca por prefixo.
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_telefone_norm", "usuario_id, telefone_normalizado")
+    if backend.nome == "sqlite":
+        cursor.execute("DROP INDEX IF EXISTS idx_contatos_usuario_telefone")
+
+
+def _m008_nome_ordenacao(cursor):
+    # Chave de ordenação da lista (normalizacao.chave_nome: sem acentos e maiúsculas),
+    # comparada byte a byte nos dois backends para que o ORDER BY do banco e a ordem
+    # do cache e da tela sejam a mesma; "" para nome nulo
+    _adicionar_coluna(cursor, "contatos", "nome_ordenacao", {
+        "mysql": "VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL DEFAULT ''",
+        "sqlite": "TEXT NOT NULL DEFAULT ''",
+    })
+
+    # Preenche em blocos pela chave primária, como na 006
+    ultimo_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, nome FROM contatos
+            WHERE id > %s AND nome IS NOT NULL
+            ORDER BY id LIMIT 5000
+        """, (ultimo_id,))
+        linhas = cursor.fetchall()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1][0]
+        cursor.executemany("UPDATE contatos SET nome_ordenacao = %s WHERE id = %s",
+                           [(chave_nome(nome), contato_id) for contato_id, nome in linhas])
+    # Lista ordenada e paginação por (nome_ordenacao, id); o id vai implícito no índice
+    _criar_indice(cursor, "contatos", "idx_contatos_usuario_ordenacao", "usuario_id, nome_ordenacao")
+
+
+def _m009_remover_foto_antiga(cursor):
+    # A 004 moveu as imagens para a tabela fotos e deixou usuarios.foto vazia; no MySQL a
+    # coluna sai. Antes, qualquer foto gravada depois da 004 por uma versão antiga do
+    # programa vai para o repositório, para que nada se perca.
+    # No SQLite ela fica: DROP COLUMN só existe a partir do SQLite 3.35, e o Python pode
+    # vir com uma versão mais antiga (a alternativa seria recriar a tabela usuarios).
+    # A coluna só guarda NULLs, que não ocupam espaço na linha.
+    if backend.nome == "sqlite" or "foto" not in _colunas_tabela(cursor, "usuarios"):
+        return
+    cursor.execute("SELECT id FROM usuarios WHERE foto IS NOT NULL")
+    for (usuario_id,) in cursor.fetchall():
+        cursor.execute("SELECT foto FROM usuarios WHERE id = %s", (usuario_id,))
+        dados = cursor.fetchone()[0]
+        foto_hash = _gravar_foto(cursor, bytes(dados))
+        cursor.execute("UPDATE usuarios SET foto_hash = %s, foto = NULL WHERE id = %s", (foto_hash, usuario_id))
+    cursor.execute("ALTER TABLE usuarios DROP COLUMN foto")
+
+
+# Novas migrações entram no fim da lista com o próximo número; nunca altere uma já publicada
+MIGRACOES = [
+    (1, "tabelas usuarios e contatos", _m001_tabelas_base),
+    (2, "índices compostos de contatos por usuário", _m002_indices_contatos),
+    (3, "colunas e índices de aniversário", _m003_colunas_aniversario),
+    (4, "repositório de fotos por hash e miniaturas", _m004_repositorio_fotos),
+    (5, "marcação de alterações e exclusões de contatos", _m005_sincronizacao_contatos),
+    (6, "telefone normalizado (E.164) e índice por usuário", _m006_telefone_normalizado),
+    (7, "índice do telefone normalizado com nome próprio", _m007_indice_telefone_normalizado),
+    (8, "chave de ordenação do nome, igual no banco e no cache", _m008_nome_ordenacao),
+    (9, "remoção da coluna usuarios.foto (MySQL)", _m009_remover_foto_antiga),
+]
+
+
+def versoes_aplicadas(cursor):
+    cursor.execute(SQL_SCHEMA_VERSION[backend.nome])
+    cursor.execute("SELECT versao FROM schema_version")
+    return {linha[0] for linha in cursor.fetchall()}
+
+
+def aplicar_migracoes():
+    # Aplica, em ordem, as migrações ainda não registradas; retorna as versões aplicadas agora
+    conexao = conectar()
+    if conexao is None:
+        log.error("Erro ao conectar ao banco.")
+        return []
+
+    cursor = None
+    aplicadas = []
+    try:
+        cursor = conexao.cursor()
+        ja_aplicadas = versoes_aplicadas(cursor)
+        conexao.commit()
+        for versao, descricao, migracao in MIGRACOES:
+            if versao in ja_aplicadas:
+                continue
+            migracao(cursor)
+            cursor.execute("INSERT INTO schema_version (versao, descricao) VALUES (%s, %s)", (versao, descricao))
+            conexao.commit()
+            aplicadas.append(versao)
+            log.info("Migração %03d aplicada: %s", versao, descricao)
+        if not aplicadas:
+            log.info("Esquema já está atualizado.")
+        return aplicadas
+    except ErroBanco as e:
+        log.error("Erro ao aplicar migração: %s", e)
+        return aplicadas
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close()
+
+
+if __name__ == "__main__":
+    aplicar_migracoes()
@@ -0,0 +1,73 @@
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PySide6.QtGui import QColor, QImage, QImageReader, QPainter
+
+import config
+from bancodedados import salvar_miniaturas
+from executor_banco import executar
+
+
+def _recortar_quadrado(imagem, lado):
+    # Preenche o quadrado inteiro (como o label redondo da foto) e corta o excesso no centro
+    escalada = imagem.scaled(lado, lado, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    x = (escalada.width() - lado) // 2
+    y = (escalada.height() - lado) // 2
+    return escalada.copy(x, y, lado, lado)
+
+
+def _codificar_jpeg(imagem):
+    # JPEG não tem transparência: compõe sobre a mesma cor de fundo do label da foto
+    if imagem.hasAlphaChannel():
+        fundo = QImage(imagem.size(), QImage.Format_RGB32)
+        fundo.fill(QColor(40, 40, 50))
+        pintor = QPainter(fundo)
+        pintor.drawImage(0, 0, imagem)
+        pintor.end()
+        imagem = fundo
+
+    dados = QByteArray()
+    buffer = QBuffer(dados)
+    buffer.open(QIODevice.WriteOnly)
+    imagem.save(buffer, "JPEG", config.MINIATURA_QUALIDADE)
+    buffer.close()
+    return bytes(dados.data())
+
+
+def gerar_miniaturas(dados, tamanhos=None):
+    # Decodifica a imagem original uma vez e devolve {lado_em_px: bytes_jpeg}
+    imagem = QImage.fromData(dados)
+    if imagem.isNull():
+        return {}
+    return {lado: _codificar_jpeg(_recortar_quadrado(imagem, lado))
+            for lado in (tamanhos or config.MINIATURA_TAMANHOS)}
+
+
+def tamanho_para_exibir(lado_logico, escala_dispositivo=1.0):
+    # Menor miniatura que cobre o label na densidade de pixels da tela
+    necessario = lado_logico * escala_dispositivo
+    for lado in sorted(config.MINIATURA_TAMANHOS):
+        if lado >= necessario:
+            return lado
+    return max(config.MINIATURA_TAMANHOS)
+
+
+def carregar_previa(arquivo, lado):
+    # Pré-visualização do arquivo escolhido decodificando já em tamanho reduzido
+    leitor = QImageReader(arquivo)
+    leitor.setAutoTransform(True)
+    original = leitor.size()
+    if original.isValid():
+        leitor.setScaledSize(original.scaled(QSize(lado, lado), Qt.KeepAspectRatioByExpanding))
+    return leitor.read()
+
+
+def _gerar_e_salvar(foto_hash, dados):
+    miniaturas = gerar_miniaturas(dados)
+    return bool(miniaturas) and salvar_miniaturas(foto_hash, miniaturas)
+
+
+def agendar_miniaturas(foto_hash, dados, ao_concluir=None):
+    # Gera as miniaturas no executor de banco, fora da thread da interface
+    def concluida(salvas):
+        if salvas and ao_concluir:
+            ao_concluir(foto_hash)
+    return executar(_gerar_e_salvar, foto_hash, dados, ao_concluir=concluida)
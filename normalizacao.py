@@ -0,0 +1,87 @@
+# Formas canônicas de nome, email e telefone, usadas para comparar contatos
+# (duplicados.py) independentemente de como o usuário digitou cada campo.
+import re
+import unicodedata
+from functools import lru_cache
+
+import config
+
+_NAO_DIGITOS = re.compile(r"\D")
+
+# Tamanho da coluna contatos.nome_ordenacao
+TAMANHO_CHAVE_NOME = 255
+
+
+@lru_cache(maxsize=65536)
+def _dobrar_palavra(palavra):
+    # Nomes e sobrenomes se repetem muito: cada palavra acentuada é decomposta uma vez só
+    sem_acentos = "".join(c for c in unicodedata.normalize("NFKD", palavra) if not unicodedata.combining(c))
+    return sem_acentos.casefold()
+
+
+def dobrar_texto(texto):
+    # Sem acentos, minúsculo (casefold) e com espaços colapsados: "  João  DA Silva" -> "joao da silva"
+    if not texto:
+        return ""
+    if texto.isascii():
+        return " ".join(texto.lower().split())
+    palavras = (palavra.lower() if palavra.isascii() else _dobrar_palavra(palavra) for palavra in texto.split())
+    return " ".join(palavra for palavra in palavras if palavra)
+
+
+def chave_nome(nome):
+    # Forma do nome que ordena a lista, a mesma no Python (cache, lista da tela) e no banco
+    # (coluna nome_ordenacao, comparada byte a byte); "" para nome nulo. Cortada no
+    # tamanho da coluna para que os dois lados comparem exatamente o mesmo texto
+    return dobrar_texto(nome)[:TAMANHO_CHAVE_NOME]
+
+
+def normalizar_email(email):
+    email = (email or "").strip().lower()
+    return email if "@" in email else ""
+
+
+def normalizar_telefone(telefone, ddi=None, ddd=None):
+    # Número no formato E.164 ("+5511999999999"), ou None se não der para saber o
+    # número completo. Sem código do país assume ddi (padrão: AGENDA_TELEFONE_DDI);
+    # sem DDD só normaliza se ddd (padrão: AGENDA_TELEFONE_DDD) estiver definido.
+    if not telefone:
+        return None
+    ddi = config.TELEFONE_DDI if ddi is None else ddi
+    ddd = config.TELEFONE_DDD if ddd is None else ddd
+    texto = telefone.strip()
+    digitos = _NAO_DIGITOS.sub("", texto)
+
+    if texto.startswith("+"):
+        internacional = digitos
+    elif digitos.startswith("00"):
+        internacional = digitos[2:]
+    else:
+        nacional = digitos
+        if nacional.startswith("0"):
+            # Prefixo de longa distância, opcionalmente com a operadora: 0 XX DDD número
+            nacional = nacional[1:]
+            if len(nacional) in (12, 13):
+                nacional = nacional[2:]
+        if ddi == "55" and len(nacional) in (12, 13) and nacional.startswith("55"):
+            internacional = nacional
+        elif len(nacional) in (10, 11):
+            internacional = ddi + nacional
+        elif len(nacional) in (8, 9) and ddd:
+            internacional = ddi + ddd + nacional
+        else:
+            return None
+
+    # E.164: até 15 dígitos; menos de 8 não identifica ninguém
+    if not 8 <= len(internacional) <= 15 or internacional.startswith("0"):
+        return None
+    return "+" + internacional
+
+
+def chave_telefone(telefone):
+    # Para comparar números: o E.164 quando sai, senão só os dígitos (ex.: número sem DDD)
+    e164 = normalizar_telefone(telefone)
+    if e164:
+        return e164
+    digitos = _NAO_DIGITOS.sub("", telefone or "")
+    return digitos if len(digitos) >= 8 else ""
@@ -0,0 +1,171 @@
+import threading
+import time
+
+from declaracoes import CacheDeclaracoes, CursorPreparado
+
+
+class ErroPool(Exception):
+    pass
+
+
+class ConexaoPool(object):
+    # Conexão emprestada do pool. Repassa tudo para a conexão real,
+    # mas close() devolve a conexão ao pool em vez de encerrá-la.
+    def __init__(self, pool, conexao):
+        self._pool = pool
+        self._conexao = conexao
+
+    def __getattr__(self, nome):
+        if self._conexao is None:
+            raise ErroPool("Conexão já devolvida ao pool.")
+        return getattr(self._conexao, nome)
+
+    def cursor(self, prepared=False, dictionary=False, **opcoes):
+        # cursor(prepared=True) reaproveita as instruções já preparadas nesta conexão
+        if self._conexao is None:
+            raise ErroPool("Conexão já devolvida ao pool.")
+        cache = self._pool.cache_declaracoes(self._conexao) if prepared else None
+        if cache is not None:
+            cursor = CursorPreparado(cache, dictionary)
+        else:
+            cursor = self._conexao.cursor(dictionary=dictionary, **opcoes)
+        if self._pool.envolver_cursor is not None:
+            cursor = self._pool.envolver_cursor(cursor)
+        return cursor
+
+    def close(self):
+        if self._conexao is not None:
+            conexao, self._conexao = self._conexao, None
+            self._pool.devolver(conexao)
+
+
+class PoolConexoes(object):
+    def __init__(self, abrir_conexao, tamanho=5, timeout=10.0, ociosidade_maxima=300.0, verificar_apos=5.0,
+                 criar_cursor_preparado=None, declaracoes_por_conexao=64, envolver_cursor=None):
+        self.abrir_conexao = abrir_conexao
+        # Aplicado a todo cursor emprestado (ex.: metricas.CursorMedido)
+        self.envolver_cursor = envolver_cursor
+        self.criar_cursor_preparado = criar_cursor_preparado
+        self.declaracoes_por_conexao = declaracoes_por_conexao
+        self.tamanho = max(1, tamanho)
+        self.timeout = timeout
+        self.ociosidade_maxima = ociosidade_maxima
+        self.verificar_apos = verificar_apos
+
+        self._condicao = threading.Condition()
+        self._ociosas = []  # pilha de (conexao, momento_devolucao)
+        self._emprestadas = 0
+        self._caches = {}  # id(conexao) -> CacheDeclaracoes
+        self.conexoes_abertas = 0
+        self.conexoes_descartadas = 0
+
+    def obter(self):
+        limite = time.monotonic() + self.timeout
+        expiradas = []
+        with self._condicao:
+            while True:
+                expiradas.extend(self._retirar_expiradas())
+                if self._ociosas:
+                    conexao, devolvida_em = self._ociosas.pop()
+                    break
+                if self._emprestadas < self.tamanho:
+                    conexao, devolvida_em = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise ErroPool("Tempo esgotado aguardando uma conexão livre no pool.")
+                self._condicao.wait(restante)
+            self._emprestadas += 1
+
+        for antiga in expiradas:
+            self._fechar(antiga)
+
+        try:
+            if conexao is not None and time.monotonic() - devolvida_em > self.verificar_apos:
+                if not self._conexao_valida(conexao):
+                    self._fechar(conexao)
+                    conexao = None
+            if conexao is None:
+                conexao = self.abrir_conexao()
+                with self._condicao:
+                    self.conexoes_abertas += 1
+        except Exception:
+            self._liberar_vaga()
+            raise
+        return ConexaoPool(self, conexao)
+
+    def devolver(self, conexao):
+        try:
+            # Descarta transação pendente para não vazar estado entre empréstimos
+            if getattr(conexao, "in_transaction", False):
+                conexao.rollback()
+        except Exception:
+            self._fechar(conexao)
+            self._liberar_vaga()
+            return
+
+        with self._condicao:
+            self._ociosas.append((conexao, time.monotonic()))
+            self._emprestadas -= 1
+            self._condicao.notify()
+
+    def fechar_todas(self):
+        with self._condicao:
+            ociosas = [conexao for conexao, _ in self._ociosas]
+            self._ociosas = []
+        for conexao in ociosas:
+            self._fechar(conexao)
+
+    def cache_declaracoes(self, conexao):
+        # Só a thread que pegou a conexão emprestada usa o cache dela
+        if self.criar_cursor_preparado is None or self.declaracoes_por_conexao <= 0:
+            return None
+        cache = self._caches.get(id(conexao))
+        if cache is None:
+            cache = CacheDeclaracoes(conexao, self.criar_cursor_preparado, self.declaracoes_por_conexao)
+            with self._condicao:
+                self._caches[id(conexao)] = cache
+        return cache
+
+    def estatisticas(self):
+        with self._condicao:
+            return {
+                "tamanho": self.tamanho,
+                "emprestadas": self._emprestadas,
+                "ociosas": len(self._ociosas),
+                "abertas": self.conexoes_abertas,
+                "descartadas": self.conexoes_descartadas,
+            }
+
+    def _retirar_expiradas(self):
+        agora = time.monotonic()
+        # A pilha é ordenada por devolução: as mais antigas ficam no início
+        corte = 0
+        while corte < len(self._ociosas) and agora - self._ociosas[corte][1] > self.ociosidade_maxima:
+            corte += 1
+        expiradas = [conexao for conexao, _ in self._ociosas[:corte]]
+        del self._ociosas[:corte]
+        return expiradas
+
+    def _liberar_vaga(self):
+        with self._condicao:
+            self._emprestadas -= 1
+            self._condicao.notify()
+
+    def _conexao_valida(self, conexao):
+        try:
+            if hasattr(conexao, "is_connected"):
+                return conexao.is_connected()
+            conexao.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _fechar(self, conexao):
+        with self._condicao:
+            self.conexoes_descartadas += 1
+            self._caches.pop(id(conexao), None)
+        try:
+            conexao.close()
+        except Exception:
+            pass
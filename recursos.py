@@ -0,0 +1,118 @@
+# Imagens e ícones da interface (arquivos ao lado deste módulo, não do diretório de
+# trabalho). Cada imagem é lida do disco e decodificada uma vez por tamanho, já no
+# tamanho em que aparece na tela e na densidade de pixels dela, e a mesma instância
+# é entregue a todas as telas e a cada linha da lista. Descarte LRU por bytes
+# (AGENDA_RECURSOS_CACHE_BYTES). Só a thread da interface usa QPixmap, então não há lock.
+import os
+from collections import OrderedDict
+
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QGuiApplication, QIcon, QImageReader, QPixmap
+
+import config
+from registro import obter_logger
+
+log = obter_logger("recursos")
+
+_DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+_pixmaps = OrderedDict()  # (nome, largura, altura, escala) -> QPixmap
+_icones = {}  # nome -> QIcon (o QIcon já guarda os tamanhos que desenhou)
+_bytes_em_uso = 0
+_ausentes = set()  # já avisados no log
+_contadores = {"acertos": 0, "falhas": 0, "descartes": 0}
+
+
+def caminho(nome):
+    return os.path.join(_DIRETORIO, nome)
+
+
+def _escala_da_tela():
+    tela = QGuiApplication.primaryScreen()
+    return tela.devicePixelRatio() if tela is not None else 1.0
+
+
+def _avisar_ausente(nome):
+    if nome not in _ausentes:
+        _ausentes.add(nome)
+        log.warning("Imagem não encontrada: %s", caminho(nome))
+
+
+def _bytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def _carregar(nome, largura, altura, escala):
+    # Decodifica direto no tamanho em pixels físicos (cabendo em largura x altura lógicos)
+    leitor = QImageReader(caminho(nome))
+    leitor.setAutoTransform(True)
+    original = leitor.size()
+    if original.isValid():
+        leitor.setScaledSize(original.scaled(QSize(round(largura * escala), round(altura * escala)),
+                                             Qt.KeepAspectRatio))
+    imagem = leitor.read()
+    if imagem.isNull():
+        _avisar_ausente(nome)
+        return QPixmap()
+    pixmap = QPixmap.fromImage(imagem)
+    pixmap.setDevicePixelRatio(escala)
+    return pixmap
+
+
+def pixmap(nome, largura, altura=None, escala=None):
+    # Imagem para exibir em largura x altura pixels lógicos; escala é a densidade de
+    # pixels de onde ela vai aparecer (padrão: a da tela principal)
+    global _bytes_em_uso
+    altura = largura if altura is None else altura
+    escala = _escala_da_tela() if escala is None else escala
+    chave = (nome, largura, altura, escala)
+    encontrado = _pixmaps.get(chave)
+    if encontrado is not None:
+        _pixmaps.move_to_end(chave)
+        _contadores["acertos"] += 1
+        return encontrado
+
+    _contadores["falhas"] += 1
+    carregado = _carregar(nome, largura, altura, escala)
+    tamanho = _bytes(carregado)
+    if carregado.isNull() or tamanho > config.RECURSOS_CACHE_BYTES:
+        return carregado
+    _pixmaps[chave] = carregado
+    _bytes_em_uso += tamanho
+    while _bytes_em_uso > config.RECURSOS_CACHE_BYTES:
+        _, antigo = _pixmaps.popitem(last=False)
+        _bytes_em_uso -= _bytes(antigo)
+        _contadores["descartes"] += 1
+    return carregado
+
+
+def icone(nome):
+    # Ícone de janela; o QIcon lê o arquivo só quando é desenhado, no tamanho pedido
+    encontrado = _icones.get(nome)
+    if encontrado is not None:
+        _contadores["acertos"] += 1
+        return encontrado
+    _contadores["falhas"] += 1
+    if not os.path.exists(caminho(nome)):
+        _avisar_ausente(nome)
+    encontrado = _icones[nome] = QIcon(caminho(nome))
+    return encontrado
+
+
+def estatisticas():
+    dados = dict(_contadores)
+    dados["imagens"] = len(_pixmaps)
+    dados["icones"] = len(_icones)
+    dados["bytes"] = _bytes_em_uso
+    total = dados["acertos"] + dados["falhas"]
+    dados["taxa_acerto"] = dados["acertos"] / total if total else 0.0
+    return dados
+
+
+def limpar():
+    global _bytes_em_uso
+    _pixmaps.clear()
+    _icones.clear()
+    _bytes_em_uso = 0
+    for nome in _contadores:
+        _contadores[nome] = 0
@@ -0,0 +1,88 @@
+# Log do app. Cada módulo pega o seu com obter_logger("nome_do_modulo") e passa os
+# valores como argumentos (log.debug("... %s", valor)): a mensagem só é montada se
+# o nível estiver habilitado, então um log.debug desligado custa uma comparação.
+#
+# Níveis e formato vêm do config (AGENDA_LOG_*):
+#     AGENDA_LOG_NIVEL=INFO                          nível padrão
+#     AGENDA_LOG_NIVEIS=bancodedados=DEBUG,contatos=WARNING
+#     AGENDA_LOG_JSON=1                              uma linha JSON por registro
+#     AGENDA_LOG_ARQUIVO=agenda.log                  em vez de stderr
+#
+# Campos estruturados vão em extra={...}: viram chaves no JSON e "chave=valor" no texto.
+import json
+import logging
+import sys
+import threading
+
+import config
+
+RAIZ = "agenda"
+
+# Atributos que todo LogRecord tem; o resto veio de extra=
+_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_configurado = False
+_lock = threading.Lock()
+
+
+def _campos(registro):
+    return {chave: valor for chave, valor in vars(registro).items() if chave not in _PADRAO}
+
+
+class FormatadorTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, registro):
+        texto = super().format(registro)
+        campos = _campos(registro)
+        if campos:
+            texto += " " + " ".join(f"{chave}={valor}" for chave, valor in campos.items())
+        return texto
+
+
+class FormatadorJson(logging.Formatter):
+    def format(self, registro):
+        dados = {
+            "momento": self.formatTime(registro),
+            "nivel": registro.levelname,
+            "modulo": registro.name,
+            "mensagem": registro.getMessage(),
+        }
+        dados.update(_campos(registro))
+        if registro.exc_info:
+            dados["excecao"] = self.formatException(registro.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def _nivel(texto, padrao=logging.INFO):
+    nivel = logging.getLevelName(texto.strip().upper())
+    return nivel if isinstance(nivel, int) else padrao
+
+
+def configurar():
+    # Idempotente; obter_logger chama na primeira vez
+    global _configurado
+    with _lock:
+        if _configurado:
+            return
+        raiz = logging.getLogger(RAIZ)
+        raiz.setLevel(_nivel(config.LOG_NIVEL))
+        # Não repassa ao logger raiz do Python: o formato é decidido só aqui
+        raiz.propagate = False
+        if config.LOG_ARQUIVO:
+            saida = logging.FileHandler(config.LOG_ARQUIVO, encoding="utf-8")
+        else:
+            saida = logging.StreamHandler(sys.stderr)
+        saida.setFormatter(FormatadorJson() if config.LOG_JSON else FormatadorTexto())
+        raiz.addHandler(saida)
+        for item in config.LOG_NIVEIS.split(","):
+            if "=" in item:
+                modulo, nivel = item.split("=", 1)
+                logging.getLogger(f"{RAIZ}.{modulo.strip()}").setLevel(_nivel(nivel))
+        _configurado = True
+
+
+def obter_logger(nome):
+    configurar()
+    return logging.getLogger(f"{RAIZ}.{nome}")
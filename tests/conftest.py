@@ -0,0 +1,64 @@
+# Os testes rodam sempre no SQLite, num arquivo temporário: config.py lê as variáveis
+# de ambiente na importação, então elas são definidas antes de qualquer módulo do projeto.
+import os
+import shutil
+import sys
+import tempfile
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DIRETORIO = tempfile.mkdtemp(prefix="agenda-testes-")
+
+os.environ["AGENDA_DB_BACKEND"] = "sqlite"
+os.environ["AGENDA_SQLITE_CAMINHO"] = os.path.join(_DIRETORIO, "agenda.db")
+os.environ["AGENDA_METRICAS_ARQUIVO"] = ""
+os.environ.setdefault("AGENDA_LOG_NIVEL", "WARNING")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, _RAIZ)
+
+import itertools
+
+import pytest
+
+import bancodedados
+from migracoes import aplicar_migracoes
+
+_emails = itertools.count(1)
+
+
+def trocar_banco(caminho):
+    # Aponta o backend para outro arquivo; as conexões ociosas do banco anterior são fechadas
+    bancodedados.obter_pool().fechar_todas()
+    bancodedados.backend.caminho = caminho
+    bancodedados.cache.invalidar()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    bancodedados.obter_pool().fechar_todas()
+    shutil.rmtree(_DIRETORIO, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def banco():
+    # Banco da sessão, com todas as migrações aplicadas
+    aplicar_migracoes()
+    return bancodedados
+
+
+@pytest.fixture
+def banco_vazio(tmp_path):
+    # Arquivo SQLite só do teste, sem tabelas; no fim volta ao banco da sessão
+    anterior = bancodedados.backend.caminho
+    caminho = str(tmp_path / "agenda.db")
+    trocar_banco(caminho)
+    yield caminho
+    trocar_banco(anterior)
+
+
+@pytest.fixture
+def usuario(banco):
+    # Usuário novo a cada teste, para que os contatos de um não apareçam no outro
+    email = f"usuario{next(_emails)}@teste.com"
+    assert banco.salvar_usuario("Usuário", email, "(11) 99999-9999", "senha")
+    autenticado, usuario_id, _, _ = banco.autenticar_usuario(email, "senha")
+    assert autenticado
+    return usuario_id
@@ -0,0 +1,129 @@
+from datetime import date
+
+import pytest
+
+import bancodedados as b
+
+NOMES = ["bruno", "Álvaro", None, "Ana", "ana", "Çarla", "andré"]
+
+
+def _salvar(usuario_id, nome, telefone=None, email=None, **campos):
+    contato_id = b.salvar_contato(nome, email, telefone, campos.get("data_nascimento"), campos.get("perfil_rede_social"),
+                                  campos.get("notas"), usuario_id)
+    assert contato_id
+    return contato_id
+
+
+def _todas_as_paginas(usuario_id, limite):
+    nomes, apos = [], None
+    while True:
+        contatos, apos = b.obter_contatos_pagina(usuario_id, limite=limite, apos=apos)
+        nomes += [contato["nome"] for contato in contatos]
+        if apos is None:
+            return nomes
+
+
+@pytest.fixture
+def sem_cache(monkeypatch):
+    # capacidade 0 desliga o cache: as leituras vão sempre ao banco
+    monkeypatch.setattr(b.cache, "capacidade", 0)
+    b.cache.invalidar()
+
+
+def test_usuario_e_autenticacao(banco):
+    assert banco.salvar_usuario("Ana", "ana.auth@teste.com", "", "segredo")
+    assert not banco.salvar_usuario("Outra Ana", "ana.auth@teste.com", "", "outra")
+
+    autenticado, usuario_id, nome, foto_hash = banco.autenticar_usuario("ana.auth@teste.com", "segredo")
+    assert autenticado and nome == "Ana" and foto_hash is None
+    assert banco.usuario_existe(usuario_id)
+    assert banco.autenticar_usuario("ana.auth@teste.com", "errada") == (False, None, None, None)
+
+
+def test_salvar_e_obter_contato(usuario):
+    contato_id = _salvar(usuario, "Ana", "(11) 99999-9999", "ana@x.com", data_nascimento="1990-05-17", notas="nota")
+
+    contato = b.obter_contato(contato_id)
+    assert contato["nome"] == "Ana" and contato["notas"] == "nota"
+    assert contato["data_nascimento"] == date(1990, 5, 17)
+    assert b.obter_contato_por_telefone(usuario, "+55 11 99999-9999")["id"] == contato_id
+    assert b.obter_contato_por_telefone(usuario, "(11) 98888-8888") is None
+
+
+def test_contato_de_usuario_inexistente(banco):
+    assert not banco.salvar_contato("Ana", None, None, None, None, None, 999999)
+
+
+@pytest.mark.parametrize("cache", ["com_cache", "sem_cache"])
+def test_paginas_na_mesma_ordem_com_e_sem_cache(usuario, cache, request):
+    if cache == "sem_cache":
+        request.getfixturevalue("sem_cache")
+    for nome in NOMES:
+        _salvar(usuario, nome)
+
+    assert _todas_as_paginas(usuario, 3) == [None, "Álvaro", "Ana", "ana", "andré", "bruno", "Çarla"]
+    assert b.contar_contatos(usuario) == len(NOMES)
+
+
+def test_percorrer_contatos_so_com_as_colunas_pedidas(usuario):
+    for nome in NOMES:
+        _salvar(usuario, nome, "1199999999")
+
+    contatos = list(b.percorrer_contatos(usuario, tamanho_lote=2, colunas=("telefone",)))
+
+    assert [contato["nome"] for contato in contatos] == _todas_as_paginas(usuario, 50)
+    assert set(contatos[0]) == {"id", "nome", "telefone"}
+    with pytest.raises(ValueError):
+        b.obter_contatos_pagina(usuario, colunas=("senha_hash",))
+
+
+def test_alteracoes_desde_a_marca(usuario, sem_cache):
+    mantido = _salvar(usuario, "Ana")
+    excluido = _salvar(usuario, "Bia")
+    alterados, excluidos, marca = b.obter_contatos_desde(usuario)
+    assert {contato["id"] for contato in alterados} == {mantido, excluido} and excluidos == []
+
+    assert b.deletar_contato(excluido)
+    assert b.atualizar_contato(mantido, "Ana Maria", None, "", None, None, None)
+    alterados, excluidos, nova_marca = b.obter_contatos_desde(usuario, marca)
+
+    assert [contato["nome"] for contato in alterados] == ["Ana Maria"]
+    assert excluidos == [excluido]
+    # O SQLite grava milissegundos: no mesmo milissegundo a marca se repete
+    assert nova_marca >= marca
+    assert b.obter_contato(excluido) is None
+
+
+def test_cache_acompanha_as_gravacoes(usuario):
+    primeiro = _salvar(usuario, "Bia")
+    assert [contato["nome"] for contato in b.obter_contatos(usuario)] == ["Bia"]
+
+    segundo = _salvar(usuario, "Ana")
+    b.atualizar_contato(primeiro, "Carla", None, None, None, None, None)
+
+    assert [(contato["id"], contato["nome"]) for contato in b.obter_contatos(usuario)] == [(segundo, "Ana"), (primeiro, "Carla")]
+    assert b.cache.contatos(usuario) is not None
+
+
+def test_mesclar_contatos(usuario):
+    manter = _salvar(usuario, "Ana", email="ana@x.com")
+    remover = _salvar(usuario, "Ana", "(11) 99999-9999")
+
+    assert b.mesclar_contatos(usuario, manter, [remover], {"telefone": "(11) 99999-9999", "notas": "mesclado"})
+
+    assert b.obter_contato(remover) is None
+    contato = b.obter_contato(manter)
+    assert contato["telefone"] == "(11) 99999-9999" and contato["notas"] == "mesclado"
+    # Contato já excluído não recebe a mescla
+    assert not b.mesclar_contatos(usuario, remover, [manter], {"notas": "x"})
+    with pytest.raises(ValueError):
+        b.mesclar_contatos(usuario, manter, [], {"usuario_id": 1})
+
+
+def test_foto_do_usuario(banco, usuario):
+    foto = b"\x89PNG foto"
+
+    assert banco.atualizar_foto_usuario(usuario, foto)
+
+    assert banco.obter_foto_usuario(usuario) == foto
+    assert banco.obter_ref_foto_usuario(usuario) == banco.hash_foto(foto)
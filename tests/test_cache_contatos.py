@@ -0,0 +1,122 @@
+import cache_contatos
+from cache_contatos import CacheUsuarios
+
+
+class Relogio(object):
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+def _contato(contato_id, nome):
+    return {"id": contato_id, "nome": nome, "telefone": ""}
+
+
+def _nomes(contatos):
+    return [contato["nome"] for contato in contatos]
+
+
+def test_contatos_em_ordem_de_nome_sem_acentos():
+    cache = CacheUsuarios()
+    cache.guardar_contatos(1, [_contato(1, "bruno"), _contato(2, "Álvaro"), _contato(3, None), _contato(4, "Ana")])
+
+    assert _nomes(cache.contatos(1)) == [None, "Álvaro", "Ana", "bruno"]
+
+
+def test_pagina_continua_depois_do_cursor():
+    cache = CacheUsuarios()
+    cache.guardar_contatos(1, [_contato(contato_id, nome) for contato_id, nome in enumerate("edcba", 1)])
+
+    contatos, proximo = cache.pagina(1, 2)
+    assert _nomes(contatos) == ["a", "b"] and proximo == ("b", 4)
+    contatos, proximo = cache.pagina(1, 3, proximo)
+    assert _nomes(contatos) == ["c", "d", "e"] and proximo is None
+
+
+def test_lista_expira_pelo_ttl(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_contatos, "time", relogio)
+    cache = CacheUsuarios(ttl=10)
+    cache.guardar_contatos(1, [_contato(1, "Ana")])
+
+    relogio.agora += 9
+    assert cache.total(1) == 1
+    relogio.agora += 2
+    assert cache.contatos(1) is None
+    assert cache.contato(1) is None
+
+
+def test_usuario_menos_usado_sai_primeiro():
+    cache = CacheUsuarios(capacidade=2)
+    for usuario_id in (1, 2):
+        cache.guardar_contatos(usuario_id, [_contato(usuario_id, "Ana")])
+    cache.contatos(1)
+
+    cache.guardar_contatos(3, [_contato(3, "Ana")])
+
+    assert cache.contatos(2) is None
+    assert cache.contatos(1) is not None and cache.contatos(3) is not None
+    assert cache.estatisticas()["descartes"] == 1
+
+
+def test_lista_grande_demais_nao_fica_em_cache():
+    cache = CacheUsuarios(max_contatos=2)
+    cache.guardar_contatos(1, [_contato(contato_id, "Ana") for contato_id in range(3)])
+
+    assert cache.contatos(1) is None
+    assert cache.muito_grande(1)
+
+
+def test_gravacoes_atualizam_a_lista_no_lugar():
+    cache = CacheUsuarios()
+    cache.guardar_contatos(1, [_contato(1, "Carla"), _contato(2, "Bia")])
+
+    cache.inserir_contato(1, _contato(3, "Ana"))
+    cache.atualizar_contato(1, {"nome": "Davi"})
+    cache.remover_contato(2)
+
+    assert _nomes(cache.contatos(1)) == ["Ana", "Davi"]
+    assert cache.contato(2) is None
+
+
+def test_alteracoes_sincronizadas_avancam_a_marca():
+    cache = CacheUsuarios()
+    cache.guardar_contatos(1, [_contato(1, "Ana"), _contato(2, "Bia")], marca=10)
+
+    cache.aplicar_alteracoes(1, [_contato(3, "Caio")], [1], desde=10, marca=20)
+    assert _nomes(cache.contatos(1)) == ["Bia", "Caio"]
+    assert cache.marca(1) == 20
+
+    # Delta que começou depois da marca da lista pode ter pulado alterações: a marca fica
+    cache.aplicar_alteracoes(1, [], [], desde=30, marca=40)
+    assert cache.marca(1) == 20
+
+
+def test_invalidar_descarta_o_usuario():
+    cache = CacheUsuarios()
+    cache.guardar_contatos(1, [_contato(1, "Ana")])
+    cache.guardar_contatos(2, [_contato(2, "Bia")])
+
+    cache.invalidar(1)
+
+    assert cache.contatos(1) is None and cache.contato(1) is None
+    assert cache.contatos(2) is not None
+    cache.invalidar()
+    assert cache.contatos(2) is None
+
+
+def test_imagens_saem_por_espaco():
+    cache = CacheUsuarios(bytes_imagens=10)
+    cache.guardar_imagem("a", None, b"12345")
+    cache.guardar_imagem("b", None, b"12345")
+    cache.imagem("a")
+
+    cache.guardar_imagem("c", 100, b"123")
+
+    assert cache.imagem("b") is None
+    assert cache.imagem("a") == b"12345" and cache.imagem("c", 100) == b"123"
+    # Maior que o espaço todo: nem entra
+    cache.guardar_imagem("d", None, b"x" * 11)
+    assert cache.imagem("d") is None
@@ -0,0 +1,68 @@
+from duplicados import agrupar_duplicados, chaves_bloqueio, _normalizados
+
+
+def _contato(contato_id, nome, telefone=None, email=None, **campos):
+    return dict(id=contato_id, nome=nome, telefone=telefone, email=email, **campos)
+
+
+def test_mesmo_telefone_em_formas_diferentes():
+    grupos = agrupar_duplicados([
+        _contato(1, "Ana", "(11) 99999-9999"),
+        _contato(2, "Ana Paula", "+55 11 99999-9999"),
+        _contato(3, "Bia", "(11) 98888-8888"),
+    ])
+
+    assert len(grupos) == 1
+    assert [contato["id"] for contato in grupos[0].contatos] == [1, 2]
+    assert grupos[0].motivos == ["telefone"]
+
+
+def test_grupos_ligados_por_chaves_diferentes():
+    # 1 e 2 pelo email, 2 e 3 pelo telefone: um grupo só
+    grupos = agrupar_duplicados([
+        _contato(1, "Ana", email="ANA@x.com"),
+        _contato(2, "Ana S", "11999999999", "ana@x.com"),
+        _contato(3, "A. Silva", "(11) 99999-9999"),
+    ])
+
+    assert len(grupos) == 1 and len(grupos[0].contatos) == 3
+    assert grupos[0].motivos == ["email", "telefone"]
+
+
+def test_mesmo_nome_com_telefones_diferentes_nao_e_duplicado():
+    grupos = agrupar_duplicados([
+        _contato(1, "Ana Silva", "(11) 99999-9999"),
+        _contato(2, "ANA SÍLVA", "(21) 98888-8888"),
+        _contato(3, "Ana Silva"),
+    ])
+
+    # O 3 não tem telefone: junta-se ao primeiro com o mesmo nome
+    assert [[contato["id"] for contato in grupo.contatos] for grupo in grupos] == [[1, 3]]
+
+
+def test_primeiro_nome_sozinho_nao_e_chave():
+    assert chaves_bloqueio(_normalizados(_contato(1, "Ana"))) == []
+
+
+def test_mantem_o_mais_completo_e_mescla_os_campos():
+    grupo, = agrupar_duplicados([
+        _contato(1, "Ana Silva", "(11) 99999-9999", notas="amiga"),
+        _contato(2, "Ana Silva", "11 99999-9999", "ana@x.com", perfil_rede_social="@ana", notas="trabalho"),
+        _contato(3, "Ana Silva", email="outra@x.com"),
+    ])
+
+    assert grupo.manter["id"] == 2
+    assert [contato["id"] for contato in grupo.remover] == [1, 3]
+    campos = grupo.campos_mesclados()
+    assert campos["telefone"] == "11 99999-9999" and campos["email"] == "ana@x.com"
+    # O email diferente e as notas dos outros vão para as notas
+    assert campos["notas"] == "trabalho\namiga\nEmail: outra@x.com"
+
+
+def test_maiores_grupos_primeiro():
+    grupos = agrupar_duplicados([
+        _contato(1, "Bia Souza"), _contato(2, "Bia Souza"),
+        _contato(3, "Ana Lima"), _contato(4, "Ana Lima"), _contato(5, "ana lima"),
+    ])
+
+    assert [len(grupo.contatos) for grupo in grupos] == [3, 2]
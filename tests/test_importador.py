@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from bancodedados import obter_contatos_pagina, percorrer_contatos
+from importador import detectar_formato, importar_contatos, ler_csv, normalizar_data, preparar_contato
+
+
+def test_csv_com_cabecalho_de_outros_programas():
+    arquivo = io.StringIO('Name;E-mail;Mobile Phone;Birthday\n"Silva; Ana";ana@x.com;11999999999;17/05/1990\nBia\n')
+
+    assert list(ler_csv(arquivo)) == [
+        {"nome": "Silva; Ana", "email": "ana@x.com", "telefone": "11999999999", "data_nascimento": "17/05/1990"},
+        {"nome": "Bia"},
+    ]
+
+
+def test_csv_vazio():
+    assert list(ler_csv(io.StringIO(""))) == []
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("1990-05-17", "1990-05-17"),
+    ("17/05/1990", "1990-05-17"),
+    ("19900517", "1990-05-17"),
+    ("--0517", "0001-05-17"),
+    ("", None),
+])
+def test_normalizar_data(valor, esperado):
+    assert normalizar_data(valor) == esperado
+
+
+def test_preparar_contato():
+    assert preparar_contato({"nome": "  "}) is None
+    nome, email, telefone, data_nascimento, perfil, notas = preparar_contato(
+        {"nome": " Ana ", "telefone": "1" * 30, "data_nascimento": "data inválida"})
+    assert (nome, email, telefone, data_nascimento, perfil, notas) == ("Ana", "", "1" * 20, None, "", "")
+
+
+def test_detectar_formato():
+    assert detectar_formato("contatos.VCF") == "vcard"
+    assert detectar_formato("contatos.txt") == "csv"
+
+
+def test_importa_em_lotes(usuario, tmp_path):
+    caminho = tmp_path / "contatos.csv"
+    caminho.write_text("nome,telefone\n" + "".join(f"Contato {numero:02d},1199999{numero:04d}\n" for numero in range(25))
+                       + ",sem nome\n", encoding="utf-8")
+    lotes = []
+
+    resultado = importar_contatos(str(caminho), usuario, tamanho_lote=10, progresso=lambda r: lotes.append(r.importados))
+
+    assert (resultado.importados, resultado.rejeitados) == (25, 1)
+    assert lotes == [10, 20, 25]
+    assert len(list(percorrer_contatos(usuario))) == 25
+    contatos, _ = obter_contatos_pagina(usuario, limite=1)
+    assert contatos[0]["nome"] == "Contato 00"
+
+
+def test_usuario_inexistente(banco, tmp_path):
+    caminho = tmp_path / "contatos.vcf"
+    caminho.write_text("BEGIN:VCARD\nFN:Ana\nEND:VCARD\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        importar_contatos(str(caminho), 999999)
@@ -0,0 +1,86 @@
+from indice_busca import IndiceBusca, texto_busca, trigramas
+
+
+def _indice(*nomes, **opcoes):
+    indice = IndiceBusca(**opcoes)
+    for contato_id, nome in enumerate(nomes, 1):
+        indice.adicionar({"id": contato_id, "nome": nome, "telefone": ""})
+    return indice
+
+
+def test_texto_busca_sem_acentos_com_telefone_so_em_digitos():
+    texto = texto_busca({"nome": "João", "telefone": "(11) 9999-0000", "email": "Joao@X.com"})
+    assert texto.split("\n")[:4] == ["joao", "(11) 9999-0000", "1199990000", "joao@x.com"]
+
+
+def test_trigramas_com_espaco_nas_pontas():
+    assert trigramas("ana") == {" an", "ana", "na "}
+
+
+def test_niveis_nome_palavra_e_meio():
+    indice = _indice("Mariana Costa", "Ana Maria", "Joana Lima", "Luana Ana", "Pedro")
+
+    # Nome começando pelo termo, depois uma palavra começando por ele, depois no meio;
+    # dentro do nível, em ordem de nome
+    assert indice.buscar("ana") == [2, 4, 3, 1]
+
+
+def test_termo_sem_acentos_acha_nome_acentuado():
+    indice = _indice("José Álvares", "Jose Barros")
+    assert indice.buscar("ALVARES") == [1]
+    assert indice.buscar("josé") == [1, 2]
+
+
+def test_busca_aproximada_pela_similaridade_minima():
+    # "silvs" e "silva" têm 3 de 5 trigramas em comum: Dice 0.6
+    assert _indice("Ana Silva", similaridade_minima=0.5).buscar("silvs") == [1]
+    assert _indice("Ana Silva", similaridade_minima=0.7).buscar("silvs") == []
+
+
+def test_exatos_antes_dos_parecidos():
+    indice = _indice("Ana Silvo", "Ana Silva", similaridade_minima=0.5)
+    assert indice.buscar("silva") == [2, 1]
+
+
+def test_palavras_curtas_nao_entram_na_aproximada():
+    assert _indice("Bia").buscar("bi x") == []
+
+
+def test_limite_de_resultados():
+    indice = _indice(*[f"Ana {numero:03d}" for numero in range(50)])
+    assert indice.buscar("ana", limite=5) == [1, 2, 3, 4, 5]
+    assert indice.buscar("ana", limite=0) == []
+
+
+def test_remover_tira_a_palavra_do_vocabulario():
+    indice = _indice("Ana Silva", "Bia Silva")
+
+    indice.remover(1)
+    assert "ana" not in indice.ids_por_palavra
+    assert "silva" in indice.ids_por_palavra
+    assert " an" not in indice.palavras_por_trigrama
+
+    indice.remover(2)
+    assert indice.ids_por_palavra == {} and indice.palavras_por_trigrama == {}
+    assert len(indice) == 0
+
+
+def test_adicionar_de_novo_atualiza_o_contato():
+    indice = _indice("Ana Silva")
+
+    indice.adicionar({"id": 1, "nome": "Bia Souza", "telefone": "1"})
+
+    assert indice.buscar("ana") == [] and indice.buscar("souza") == [1]
+    assert "silva" not in indice.ids_por_palavra
+    assert indice.contatos[1] == {"id": 1, "nome": "Bia Souza", "telefone": "1"}
+
+
+def test_alteracao_descarta_buscas_recentes():
+    indice = _indice("Ana Silva")
+    assert indice.buscar("an") == [1]
+    assert indice.buscar("ana") == [1]
+
+    indice.aplicar_alteracoes([{"id": 2, "nome": "Anabel", "telefone": ""}], [1])
+
+    assert indice.buscar("ana") == [2]
+    assert indice.buscar("silvs") == []
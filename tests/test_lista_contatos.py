@@ -0,0 +1,48 @@
+import random
+
+from lista_contatos import _mantidos
+
+
+def _posicoes(novos):
+    return {contato_id: posicao for posicao, contato_id in enumerate(novos)}
+
+
+def _maior_crescente(valores):
+    # Tamanho da subsequência crescente mais longa, por programação dinâmica (n²)
+    tamanhos = []
+    for i, valor in enumerate(valores):
+        tamanhos.append(1 + max([tamanhos[j] for j in range(i) if valores[j] < valor], default=0))
+    return max(tamanhos, default=0)
+
+
+def test_mesma_ordem_mantem_todos():
+    assert _mantidos([1, 2, 3], _posicoes([1, 2, 3])) == {1, 2, 3}
+
+
+def test_quem_saiu_nao_e_mantido():
+    assert _mantidos([1, 2, 3, 4], _posicoes([4, 1, 3])) == {1, 3}
+
+
+def test_contato_que_mudou_de_lugar_sai_e_entra():
+    # 3 foi para o início: os outros ficam
+    assert _mantidos([1, 2, 3, 4], _posicoes([3, 1, 2, 4])) == {1, 2, 4}
+
+
+def test_listas_vazias():
+    assert _mantidos([], _posicoes([1, 2])) == set()
+    assert _mantidos([1, 2], {}) == set()
+
+
+def test_maior_sequencia_em_ordem_aleatoria():
+    aleatorio = random.Random(7)
+    for _ in range(200):
+        ids = aleatorio.sample(range(40), aleatorio.randint(0, 20))
+        novos = aleatorio.sample(range(40), aleatorio.randint(0, 20))
+        posicoes = _posicoes(novos)
+
+        mantidos = _mantidos(ids, posicoes)
+
+        # Os mantidos ficam na mesma ordem nas duas listas e nenhuma sequência é maior
+        sequencia = [posicoes[contato_id] for contato_id in ids if contato_id in mantidos]
+        assert sequencia == sorted(sequencia)
+        assert len(mantidos) == _maior_crescente([posicoes[contato_id] for contato_id in ids if contato_id in posicoes])
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import bancodedados
+import migracoes
+from migracoes import MIGRACOES, aplicar_migracoes
+
+VERSOES = [versao for versao, _, _ in MIGRACOES]
+
+# agenda.db distribuído com o projeto: o esquema antigo, de antes das migrações
+_AGENDA_ANTIGA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agenda.db")
+
+
+def _consultar(caminho, sql, parametros=()):
+    conexao = sqlite3.connect(caminho)
+    try:
+        return conexao.execute(sql, parametros).fetchall()
+    finally:
+        conexao.close()
+
+
+def _colunas(caminho, tabela):
+    return {linha[1] for linha in _consultar(caminho, f"PRAGMA table_xinfo({tabela})")}
+
+
+def _indices(caminho, tabela):
+    return {linha[1] for linha in _consultar(caminho, f"PRAGMA index_list({tabela})")}
+
+
+def _aplicar_de_novo():
+    # Roda cada migração outra vez sobre o esquema já migrado, como num banco em que a
+    # migração foi aplicada mas a versão não chegou a ser registrada
+    conexao = bancodedados.conectar()
+    cursor = conexao.cursor()
+    try:
+        for _, _, migracao in MIGRACOES:
+            migracao(cursor)
+        conexao.commit()
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+def test_banco_novo_recebe_todas_as_migracoes(banco_vazio):
+    assert aplicar_migracoes() == VERSOES
+    assert aplicar_migracoes() == []
+
+    assert [linha[0] for linha in _consultar(banco_vazio, "SELECT versao FROM schema_version ORDER BY versao")] == VERSOES
+    assert {"atualizado_em", "excluido", "telefone_normalizado", "nome_ordenacao",
+            "mes_nascimento", "dia_nascimento"} <= _colunas(banco_vazio, "contatos")
+    assert "foto_hash" in _colunas(banco_vazio, "usuarios")
+
+
+def test_migracoes_sao_idempotentes(banco_vazio):
+    aplicar_migracoes()
+    colunas, indices = _colunas(banco_vazio, "contatos"), _indices(banco_vazio, "contatos")
+
+    _aplicar_de_novo()
+
+    assert _colunas(banco_vazio, "contatos") == colunas
+    assert _indices(banco_vazio, "contatos") == indices
+
+
+def test_indice_do_telefone_normalizado_tem_nome_proprio(banco_vazio):
+    aplicar_migracoes()
+    indices = _indices(banco_vazio, "contatos")
+
+    assert "idx_contatos_usuario_telefone_norm" in indices
+    # O da 006 indexava a mesma coluna e sai na 007
+    assert "idx_contatos_usuario_telefone" not in indices
+
+
+def test_banco_antigo_e_migrado_sem_perder_dados(banco_vazio):
+    shutil.copyfile(_AGENDA_ANTIGA, banco_vazio)
+    foto = b"\x89PNG foto antiga"
+    conexao = sqlite3.connect(banco_vazio)
+    with conexao:
+        conexao.execute("DELETE FROM contatos")
+        conexao.execute("DELETE FROM usuarios")
+        conexao.execute("INSERT INTO usuarios (id, nome, email, senha, foto) VALUES (1, 'Ana', 'ana@x.com', 'h', ?)",
+                        (foto,))
+        conexao.executemany("INSERT INTO contatos (usuario_id, nome, telefone) VALUES (1, ?, ?)",
+                            [("Élio Souza", "(11) 98888-7777"), ("ana", "sem número"), (None, None)])
+    conexao.close()
+
+    assert aplicar_migracoes() == VERSOES
+
+    usuarios = _consultar(banco_vazio, "SELECT senha_hash, foto, foto_hash FROM usuarios")
+    assert usuarios == [("h", None, hashlib.sha256(foto).hexdigest())]
+    assert _consultar(banco_vazio, "SELECT dados FROM fotos") == [(foto,)]
+    contatos = _consultar(banco_vazio, "SELECT nome, telefone_normalizado, nome_ordenacao, excluido FROM contatos ORDER BY id")
+    assert contatos == [
+        ("Élio Souza", "+5511988887777", "elio souza", 0),
+        ("ana", None, "ana", 0),
+        (None, None, "", 0),
+    ]
+
+
+def test_coluna_foto_antiga_fica_no_sqlite(banco_vazio):
+    shutil.copyfile(_AGENDA_ANTIGA, banco_vazio)
+
+    aplicar_migracoes()
+
+    # DROP COLUMN só roda no MySQL (veja _m009_remover_foto_antiga)
+    assert "foto" in _colunas(banco_vazio, "usuarios")
+    assert migracoes.backend.nome == "sqlite"
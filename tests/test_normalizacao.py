@@ -0,0 +1,63 @@
+import pytest
+
+import config
+from normalizacao import TAMANHO_CHAVE_NOME, chave_nome, chave_telefone, dobrar_texto, normalizar_email, normalizar_telefone
+
+
+@pytest.mark.parametrize("telefone", [
+    "(11) 99999-9999",
+    "11999999999",
+    "+55 11 99999-9999",
+    "0055 11 99999-9999",
+    "011 99999-9999",
+    "0 21 11 99999-9999",
+    "5511999999999",
+])
+def test_formas_do_mesmo_numero_viram_o_mesmo_e164(telefone):
+    assert normalizar_telefone(telefone, ddi="55", ddd="") == "+5511999999999"
+
+
+def test_fixo_com_ddd():
+    assert normalizar_telefone("(21) 3333-4444", ddi="55", ddd="") == "+552133334444"
+
+
+def test_numero_local_so_com_ddd_padrao():
+    assert normalizar_telefone("99999-9999", ddi="55", ddd="") is None
+    assert normalizar_telefone("99999-9999", ddi="55", ddd="31") == "+5531999999999"
+
+
+def test_numero_internacional_mantem_o_pais():
+    assert normalizar_telefone("+1 (415) 555-2671", ddi="55", ddd="") == "+14155552671"
+
+
+@pytest.mark.parametrize("telefone", [None, "", "sem número", "123", "+1234567890123456"])
+def test_sem_numero_completo(telefone):
+    assert normalizar_telefone(telefone, ddi="55", ddd="") is None
+
+
+def test_chave_telefone_usa_os_digitos_sem_e164(monkeypatch):
+    monkeypatch.setattr(config, "TELEFONE_DDD", "")
+    assert chave_telefone("(11) 99999-9999") == "+5511999999999"
+    assert chave_telefone("99999-9999") == "999999999"
+    assert chave_telefone("12-34") == ""
+
+
+def test_dobrar_texto():
+    assert dobrar_texto("  João  DA Silva ") == "joao da silva"
+    assert dobrar_texto("ÉRICA Müller") == "erica muller"
+    assert dobrar_texto(None) == ""
+
+
+def test_chave_nome_ordena_sem_acentos_nem_maiusculas():
+    nomes = ["bruno", "Álvaro", "Ana", "Çarla", "andré"]
+    assert sorted(nomes, key=chave_nome) == ["Álvaro", "Ana", "andré", "bruno", "Çarla"]
+    assert chave_nome(None) == ""
+
+
+def test_chave_nome_cabe_na_coluna():
+    assert len(chave_nome("á" * (TAMANHO_CHAVE_NOME + 10))) == TAMANHO_CHAVE_NOME
+
+
+def test_normalizar_email():
+    assert normalizar_email("  Ana@Exemplo.COM ") == "ana@exemplo.com"
+    assert normalizar_email("sem arroba") == ""
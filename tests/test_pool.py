@@ -0,0 +1,90 @@
+import pytest
+
+from pool import ErroPool, PoolConexoes
+
+
+class ConexaoFalsa(object):
+    def __init__(self):
+        self.conectada = True
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.fechada = False
+
+    def is_connected(self):
+        return self.conectada
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.fechada = True
+
+
+def _pool(**opcoes):
+    abertas = []
+
+    def abrir():
+        abertas.append(ConexaoFalsa())
+        return abertas[-1]
+
+    return PoolConexoes(abrir, **opcoes), abertas
+
+
+def test_conexao_devolvida_e_reaproveitada():
+    pool, abertas = _pool()
+    pool.obter().close()
+    pool.obter().close()
+
+    assert len(abertas) == 1
+    assert pool.estatisticas()["abertas"] == 1
+
+
+def test_conexao_e_verificada_depois_de_ociosa():
+    # verificar_apos negativo: toda conexão ociosa passa pelo ping antes do empréstimo
+    pool, abertas = _pool(verificar_apos=-1)
+    pool.obter().close()
+    abertas[0].conectada = False
+
+    conexao = pool.obter()
+
+    assert len(abertas) == 2 and abertas[0].fechada
+    assert conexao._conexao is abertas[1]
+    assert pool.estatisticas()["descartadas"] == 1
+
+
+def test_conexao_ociosa_demais_e_fechada():
+    pool, abertas = _pool(ociosidade_maxima=-1)
+    pool.obter().close()
+
+    pool.obter()
+
+    assert abertas[0].fechada
+    assert len(abertas) == 2
+
+
+def test_transacao_pendente_e_descartada_na_devolucao():
+    pool, abertas = _pool()
+    conexao = pool.obter()
+    abertas[0].in_transaction = True
+    conexao.close()
+
+    assert abertas[0].rollbacks == 1
+    assert pool.estatisticas()["ociosas"] == 1
+
+
+def test_conexao_devolvida_nao_pode_ser_usada():
+    pool, _ = _pool()
+    conexao = pool.obter()
+    conexao.close()
+
+    with pytest.raises(ErroPool):
+        conexao.cursor()
+
+
+def test_pool_cheio_esgota_o_tempo():
+    pool, _ = _pool(tamanho=1, timeout=0.01)
+    pool.obter()
+
+    with pytest.raises(ErroPool):
+        pool.obter()
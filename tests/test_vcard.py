@@ -0,0 +1,71 @@
+from datetime import date
+
+from vcard import escrever_vcard, ler_vcards
+
+
+def _ler(texto):
+    return list(ler_vcards(texto.splitlines(keepends=True)))
+
+
+def test_le_vcard_30():
+    contatos = _ler(
+        "BEGIN:VCARD\r\n"
+        "VERSION:3.0\r\n"
+        "FN:Ana Silva\r\n"
+        "N:Silva;Ana;;;\r\n"
+        "item1.TEL;TYPE=CELL:+55 11 99999-9999\r\n"
+        "TEL;TYPE=HOME:1133334444\r\n"
+        "EMAIL;TYPE=INTERNET:ana@x.com\r\n"
+        "BDAY:1990-05-17\r\n"
+        "NOTE:linha um\\nlinha\\, dois\r\n"
+        "END:VCARD\r\n"
+    )
+
+    assert contatos == [{
+        "nome": "Ana Silva", "telefone": "+55 11 99999-9999", "email": "ana@x.com",
+        "data_nascimento": "1990-05-17", "notas": "linha um\nlinha, dois",
+    }]
+
+
+def test_le_vcard_21_quoted_printable_e_linhas_dobradas():
+    contatos = _ler(
+        "BEGIN:VCARD\n"
+        "VERSION:2.1\n"
+        "N;CHARSET=UTF-8;ENCODING=QUOTED-PRINTABLE:Concei=C3=A7=C3=A3o;Jo=\n"
+        "=C3=A3o;;;\n"
+        "TEL;CELL;PREF:11999999999\n"
+        "NOTE:uma nota\n"
+        " continuada\n"
+        "END:VCARD\n"
+        "BEGIN:VCARD\n"
+        "TEL;VALUE=uri:tel:+5511988887777\n"
+        "END:VCARD\n"
+    )
+
+    assert contatos[0] == {"nome": "João Conceição", "telefone": "11999999999", "notas": "uma notacontinuada"}
+    assert contatos[1] == {"telefone": "+5511988887777"}
+
+
+def test_escreve_e_le_de_volta():
+    contato = {
+        "nome": "Ana Maria Silva", "telefone": "(11) 99999-9999", "email": "ana@x.com",
+        "data_nascimento": date(1990, 5, 17), "perfil_rede_social": "https://x.com/ana",
+        "notas": "nota; com, vírgula\ne quebra " + "longa " * 20,
+    }
+    for versao in ("3.0", "4.0"):
+        texto = escrever_vcard(contato, versao)
+        assert all(len(linha.encode("utf-8")) <= 75 for linha in texto.split("\r\n"))
+
+        lido, = _ler(texto)
+
+        assert lido["nome"] == contato["nome"]
+        assert lido["telefone"] == contato["telefone"]
+        assert lido["email"] == contato["email"]
+        assert lido["perfil_rede_social"] == contato["perfil_rede_social"]
+        assert lido["notas"] == contato["notas"]
+
+
+def test_aniversario_sem_ano():
+    contato = {"nome": "Ana", "data_nascimento": date(1, 5, 17)}
+    assert "BDAY:--05-17\r\n" in escrever_vcard(contato, "3.0")
+    assert "BDAY:--0517\r\n" in escrever_vcard(contato, "4.0")
@@ -0,0 +1,176 @@
+import quopri
+
+
+def _desfazer_escape(valor):
+    resultado = []
+    i = 0
+    while i < len(valor):
+        caractere = valor[i]
+        if caractere == "\\" and i + 1 < len(valor):
+            proximo = valor[i + 1]
+            resultado.append("\n" if proximo in "nN" else proximo)
+            i += 2
+            continue
+        resultado.append(caractere)
+        i += 1
+    return "".join(resultado)
+
+
+def _linhas_logicas(linhas):
+    # Junta linhas dobradas (continuação começa com espaço/tab) e
+    # quebras suaves do quoted-printable do vCard 2.1 (linha terminando em "=")
+    atual = None
+    for linha in linhas:
+        linha = linha.rstrip("\r\n")
+        if atual is not None and linha[:1] in (" ", "\t"):
+            atual += linha[1:]
+            continue
+        if atual is not None and atual.endswith("=") and "QUOTED-PRINTABLE" in atual.split(":", 1)[0].upper():
+            atual = atual[:-1] + linha
+            continue
+        if atual is not None:
+            yield atual
+        atual = linha
+    if atual is not None:
+        yield atual
+
+
+def _separar_propriedade(linha):
+    if ":" not in linha:
+        return None, {}, ""
+    cabecalho, valor = linha.split(":", 1)
+    partes = cabecalho.split(";")
+    nome = partes[0].split(".")[-1].upper()  # remove prefixo de grupo (item1.TEL)
+    parametros = {}
+    for parametro in partes[1:]:
+        if "=" in parametro:
+            chave, conteudo = parametro.split("=", 1)
+            parametros[chave.upper()] = conteudo.strip('"')
+        else:
+            # vCard 2.1 permite parâmetros sem nome (TEL;CELL;PREF)
+            parametros.setdefault("TYPE", "")
+            parametros["TYPE"] += ("," if parametros["TYPE"] else "") + parametro
+    return nome, parametros, valor
+
+
+def _decodificar(parametros, valor):
+    if parametros.get("ENCODING", "").upper() == "QUOTED-PRINTABLE":
+        charset = parametros.get("CHARSET", "utf-8")
+        try:
+            return quopri.decodestring(valor.encode("latin-1", "ignore")).decode(charset, "replace")
+        except LookupError:
+            return quopri.decodestring(valor.encode("latin-1", "ignore")).decode("utf-8", "replace")
+    return valor
+
+
+def _nome_estruturado(valor):
+    # N:Sobrenome;Nome;Nomes adicionais;Prefixo;Sufixo
+    partes = [_desfazer_escape(parte).strip() for parte in valor.split(";")]
+    partes += [""] * (5 - len(partes))
+    sobrenome, nome, adicionais, prefixo, sufixo = partes[:5]
+    return " ".join(parte for parte in (prefixo, nome, adicionais, sobrenome, sufixo) if parte)
+
+
+# Lê cartões vCard (2.1, 3.0 e 4.0) de forma incremental, gerando um dicionário por contato
+def ler_vcards(linhas):
+    cartao = None
+    for linha in _linhas_logicas(linhas):
+        nome, parametros, valor = _separar_propriedade(linha)
+        if nome is None:
+            continue
+        if nome == "BEGIN" and valor.strip().upper() == "VCARD":
+            cartao = {}
+            continue
+        if cartao is None:
+            continue
+        if nome == "END" and valor.strip().upper() == "VCARD":
+            if "nome" not in cartao and "nome_estruturado" in cartao:
+                cartao["nome"] = cartao["nome_estruturado"]
+            cartao.pop("nome_estruturado", None)
+            yield cartao
+            cartao = None
+            continue
+
+        valor = _decodificar(parametros, valor)
+        if nome == "FN":
+            cartao["nome"] = _desfazer_escape(valor).strip()
+        elif nome == "N":
+            cartao["nome_estruturado"] = _nome_estruturado(valor)
+        elif nome == "TEL":
+            # vCard 4.0 pode trazer "tel:+55..." como URI
+            cartao.setdefault("telefone", _desfazer_escape(valor).strip().replace("tel:", "", 1))
+        elif nome == "EMAIL":
+            cartao.setdefault("email", _desfazer_escape(valor).strip())
+        elif nome == "BDAY":
+            cartao["data_nascimento"] = valor.strip()
+        elif nome in ("URL", "X-SOCIALPROFILE"):
+            cartao.setdefault("perfil_rede_social", _desfazer_escape(valor).strip())
+        elif nome == "NOTE":
+            cartao["notas"] = _desfazer_escape(valor)
+
+
+# Escrita
+
+VERSOES = ("3.0", "4.0")
+
+
+def _escapar(valor):
+    return (str(valor).replace("\\", "\\\\").replace("\r\n", "\n").replace("\n", "\\n")
+            .replace(",", "\\,").replace(";", "\\;"))
+
+
+def _dobrar(linha):
+    # Linhas de no máximo 75 octetos; a continuação começa com um espaço (RFC 6350 3.2)
+    if len(linha.encode("utf-8")) <= 75:
+        return linha
+    partes = []
+    atual, tamanho = "", 0
+    for caractere in linha:
+        octetos = len(caractere.encode("utf-8"))
+        if tamanho + octetos > 75:
+            partes.append(atual)
+            atual, tamanho = " ", 1
+        atual += caractere
+        tamanho += octetos
+    partes.append(atual)
+    return "\r\n".join(partes)
+
+
+def _data_vcard(data, versao):
+    if not hasattr(data, "year"):
+        return str(data)
+    if data.year == 1:
+        # Ano 1 é o "sem ano" dos formulários e do importador
+        return f"--{data.month:02d}{data.day:02d}" if versao == "4.0" else f"--{data.month:02d}-{data.day:02d}"
+    return data.strftime("%Y%m%d") if versao == "4.0" else data.isoformat()
+
+
+# Um contato (dicionário com as colunas de contatos) como texto vCard 3.0 ou 4.0
+def escrever_vcard(contato, versao="3.0"):
+    if versao not in VERSOES:
+        raise ValueError(f"Versão de vCard não suportada: {versao}")
+    nome = contato.get("nome") or ""
+    partes_nome = nome.rsplit(" ", 1)
+    sobrenome, primeiro = (partes_nome[1], partes_nome[0]) if len(partes_nome) == 2 else ("", nome)
+    linhas = [
+        "BEGIN:VCARD",
+        f"VERSION:{versao}",
+        f"FN:{_escapar(nome)}",
+        f"N:{_escapar(sobrenome)};{_escapar(primeiro)};;;",
+    ]
+    if contato.get("telefone"):
+        tipo = "TYPE=CELL" if versao == "3.0" else "VALUE=text;TYPE=cell"
+        linhas.append(f"TEL;{tipo}:{_escapar(contato['telefone'])}")
+    if contato.get("email"):
+        linhas.append(f"EMAIL;TYPE=INTERNET:{_escapar(contato['email'])}" if versao == "3.0"
+                      else f"EMAIL:{_escapar(contato['email'])}")
+    if contato.get("data_nascimento"):
+        linhas.append(f"BDAY:{_data_vcard(contato['data_nascimento'], versao)}")
+    if contato.get("perfil_rede_social"):
+        # URL é do tipo URI, sem escapes de texto
+        url = str(contato["perfil_rede_social"]).replace("\r", "").replace("\n", "")
+        linhas.append(f"URL:{url}")
+    if contato.get("notas"):
+        linhas.append(f"NOTE:{_escapar(contato['notas'])}")
+    linhas.append("END:VCARD")
+    return "\r\n".join(_dobrar(linha) for linha in linhas) + "\r\n"